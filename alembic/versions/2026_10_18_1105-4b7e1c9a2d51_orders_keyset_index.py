@@ -0,0 +1,32 @@
+"""orders keyset index
+
+Revision ID: 4b7e1c9a2d51
+Revises: 36b0ff74352c
+Create Date: 2026-10-18 11:05:12.318204
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4b7e1c9a2d51"
+down_revision: Union[str, None] = "36b0ff74352c"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_orders_start_date_id",
+        "orders",
+        ["start_date", "id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_start_date_id", table_name="orders")
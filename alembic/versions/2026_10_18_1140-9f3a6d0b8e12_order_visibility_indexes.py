@@ -0,0 +1,59 @@
+"""order visibility indexes
+
+Revision ID: 9f3a6d0b8e12
+Revises: 4b7e1c9a2d51
+Create Date: 2026-10-18 11:40:37.902115
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9f3a6d0b8e12"
+down_revision: Union[str, None] = "4b7e1c9a2d51"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        op.f("ix_orders_employee_id"), "orders", ["employee_id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_orders_administrator_id"),
+        "orders",
+        ["administrator_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_orders_customer_car_id"),
+        "orders",
+        ["customer_car_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_customer_cars_customer_id"),
+        "customer_cars",
+        ["customer_id"],
+        unique=False,
+    )
+    op.create_index(
+        op.f("ix_order_service_order_id"),
+        "order_service",
+        ["order_id"],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    op.drop_index(op.f("ix_order_service_order_id"), table_name="order_service")
+    op.drop_index(
+        op.f("ix_customer_cars_customer_id"), table_name="customer_cars"
+    )
+    op.drop_index(op.f("ix_orders_customer_car_id"), table_name="orders")
+    op.drop_index(op.f("ix_orders_administrator_id"), table_name="orders")
+    op.drop_index(op.f("ix_orders_employee_id"), table_name="orders")
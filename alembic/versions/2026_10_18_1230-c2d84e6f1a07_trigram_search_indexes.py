@@ -0,0 +1,51 @@
+"""trigram search indexes
+
+Revision ID: c2d84e6f1a07
+Revises: 9f3a6d0b8e12
+Create Date: 2026-10-18 12:30:04.551937
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "c2d84e6f1a07"
+down_revision: Union[str, None] = "9f3a6d0b8e12"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # На SQLite поиск работает без индекса, pg_trgm есть только в Postgres
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_brands_name_trgm",
+        "brands",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+    op.create_index(
+        "ix_cars_model_trgm",
+        "cars",
+        ["model"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"model": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        return
+
+    op.drop_index("ix_cars_model_trgm", table_name="cars")
+    op.drop_index("ix_brands_name_trgm", table_name="brands")
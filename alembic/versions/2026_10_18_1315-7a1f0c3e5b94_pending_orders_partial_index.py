@@ -0,0 +1,34 @@
+"""pending orders partial index
+
+Revision ID: 7a1f0c3e5b94
+Revises: c2d84e6f1a07
+Create Date: 2026-10-18 13:15:48.120377
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "7a1f0c3e5b94"
+down_revision: Union[str, None] = "c2d84e6f1a07"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_orders_pending_end_date",
+        "orders",
+        ["end_date"],
+        unique=False,
+        postgresql_where=sa.text("status <> 0"),
+        sqlite_where=sa.text("status <> 0"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_orders_pending_end_date", table_name="orders")
@@ -0,0 +1,54 @@
+"""order totals
+
+Revision ID: e5b1d7a9c3f2
+Revises: 7a1f0c3e5b94
+Create Date: 2026-10-18 14:20:11.503218
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "e5b1d7a9c3f2"
+down_revision: Union[str, None] = "7a1f0c3e5b94"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "orders",
+        sa.Column("total_price", sa.Integer(), server_default="0", nullable=False),
+    )
+    op.add_column(
+        "orders",
+        sa.Column("total_time_minutes", sa.Integer(), server_default="0", nullable=False),
+    )
+    # Заполняем итоги существующих заказов теми же правилами, что и в API:
+    # цена в рублях и время в минутах округляются вниз для каждой услуги
+    op.execute(
+        """
+        UPDATE orders SET
+            total_price = COALESCE((
+                SELECT SUM(services.price / 100)
+                FROM order_service
+                JOIN services ON services.id = order_service.service_id
+                WHERE order_service.order_id = orders.id
+            ), 0),
+            total_time_minutes = COALESCE((
+                SELECT SUM(services.time / 60)
+                FROM order_service
+                JOIN services ON services.id = order_service.service_id
+                WHERE order_service.order_id = orders.id
+            ), 0)
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("orders", "total_time_minutes")
+    op.drop_column("orders", "total_price")
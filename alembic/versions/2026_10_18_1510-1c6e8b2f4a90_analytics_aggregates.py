@@ -0,0 +1,103 @@
+"""analytics aggregates
+
+Revision ID: 1c6e8b2f4a90
+Revises: e5b1d7a9c3f2
+Create Date: 2026-10-18 15:10:37.846120
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "1c6e8b2f4a90"
+down_revision: Union[str, None] = "e5b1d7a9c3f2"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "analytics_dirty_days",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column(
+            "marked_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("day", name=op.f("pk_analytics_dirty_days")),
+    )
+    op.create_table(
+        "analytics_daily",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("orders_count", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Integer(), nullable=False),
+        sa.Column("duration_minutes", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", name=op.f("pk_analytics_daily")),
+    )
+    op.create_table(
+        "analytics_daily_services",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("service_id", sa.Integer(), nullable=False),
+        sa.Column("orders_count", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["service_id"],
+            ["services.id"],
+            name=op.f("fk_analytics_daily_services_service_id_services"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("day", "service_id", name=op.f("pk_analytics_daily_services")),
+    )
+    op.create_table(
+        "analytics_daily_employees",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("employee_id", sa.Integer(), nullable=False),
+        sa.Column("orders_count", sa.Integer(), nullable=False),
+        sa.Column("revenue", sa.Integer(), nullable=False),
+        sa.Column("duration_minutes", sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["employee_id"],
+            ["user.id"],
+            name=op.f("fk_analytics_daily_employees_employee_id_user"),
+            ondelete="CASCADE",
+        ),
+        sa.PrimaryKeyConstraint("day", "employee_id", name=op.f("pk_analytics_daily_employees")),
+    )
+    op.create_table(
+        "analytics_hourly",
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("hour", sa.Integer(), nullable=False),
+        sa.Column("orders_count", sa.Integer(), nullable=False),
+        sa.PrimaryKeyConstraint("day", "hour", name=op.f("pk_analytics_hourly")),
+    )
+
+    # Все дни с заказами помечаются для первого пересчета
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute(
+            """
+            INSERT INTO analytics_dirty_days (day)
+            SELECT DISTINCT (start_date AT TIME ZONE 'Asia/Krasnoyarsk')::date
+            FROM orders WHERE start_date IS NOT NULL
+            """
+        )
+    else:
+        op.execute(
+            """
+            INSERT INTO analytics_dirty_days (day)
+            SELECT DISTINCT date(start_date, '+7 hours')
+            FROM orders WHERE start_date IS NOT NULL
+            """
+        )
+
+
+def downgrade() -> None:
+    op.drop_table("analytics_hourly")
+    op.drop_table("analytics_daily_employees")
+    op.drop_table("analytics_daily_services")
+    op.drop_table("analytics_daily")
+    op.drop_table("analytics_dirty_days")
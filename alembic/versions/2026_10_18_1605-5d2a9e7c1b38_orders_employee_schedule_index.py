@@ -0,0 +1,37 @@
+"""orders employee schedule index
+
+Revision ID: 5d2a9e7c1b38
+Revises: 1c6e8b2f4a90
+Create Date: 2026-10-18 16:05:12.290554
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "5d2a9e7c1b38"
+down_revision: Union[str, None] = "1c6e8b2f4a90"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_orders_employee_id_start_date",
+        "orders",
+        ["employee_id", "start_date"],
+        unique=False,
+    )
+    # Составной индекс покрывает и поиск только по employee_id
+    op.drop_index(op.f("ix_orders_employee_id"), table_name="orders")
+
+
+def downgrade() -> None:
+    op.create_index(
+        op.f("ix_orders_employee_id"), "orders", ["employee_id"], unique=False
+    )
+    op.drop_index("ix_orders_employee_id_start_date", table_name="orders")
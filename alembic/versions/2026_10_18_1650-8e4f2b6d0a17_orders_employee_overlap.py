@@ -0,0 +1,61 @@
+"""orders employee overlap
+
+Revision ID: 8e4f2b6d0a17
+Revises: 5d2a9e7c1b38
+Create Date: 2026-10-18 16:50:03.774129
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "8e4f2b6d0a17"
+down_revision: Union[str, None] = "5d2a9e7c1b38"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_TRIGGER = """
+CREATE TRIGGER tr_orders_employee_overlap_{name} BEFORE {event} ON orders
+WHEN NEW.employee_id IS NOT NULL AND NEW.start_date < NEW.end_date
+BEGIN
+    SELECT RAISE(ABORT, 'ex_orders_employee_overlap')
+    WHERE EXISTS (
+        SELECT 1 FROM orders
+        WHERE employee_id = NEW.employee_id
+          AND id IS NOT NEW.id
+          AND start_date < NEW.end_date
+          AND end_date > NEW.start_date
+          AND start_date < end_date
+    );
+END
+"""
+
+
+# Перед обновлением существующие пересекающиеся заказы нужно развести вручную,
+# иначе ограничение не создастся
+def upgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("CREATE EXTENSION IF NOT EXISTS btree_gist")
+        op.execute(
+            "ALTER TABLE orders ADD CONSTRAINT ex_orders_employee_overlap "
+            "EXCLUDE USING gist (employee_id WITH =, tstzrange(start_date, end_date, '[)') WITH &&)"
+        )
+    else:
+        op.execute(SQLITE_TRIGGER.format(name="insert", event="INSERT"))
+        op.execute(
+            SQLITE_TRIGGER.format(
+                name="update", event="UPDATE OF employee_id, start_date, end_date"
+            )
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.execute("ALTER TABLE orders DROP CONSTRAINT ex_orders_employee_overlap")
+    else:
+        op.execute("DROP TRIGGER IF EXISTS tr_orders_employee_overlap_update")
+        op.execute("DROP TRIGGER IF EXISTS tr_orders_employee_overlap_insert")
@@ -0,0 +1,42 @@
+"""catalog versions
+
+Revision ID: 3b9d5f1e7c26
+Revises: 8e4f2b6d0a17
+Create Date: 2026-10-18 17:40:21.508317
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "3b9d5f1e7c26"
+down_revision: Union[str, None] = "8e4f2b6d0a17"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    catalog_versions = op.create_table(
+        "catalog_versions",
+        sa.Column("name", sa.String(length=50), nullable=False),
+        sa.Column("version", sa.Integer(), nullable=False),
+        sa.Column(
+            "updated_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("name", name=op.f("pk_catalog_versions")),
+    )
+    op.bulk_insert(
+        catalog_versions,
+        [{"name": name, "version": 1} for name in ("services", "brands", "cars")],
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("catalog_versions")
@@ -0,0 +1,239 @@
+"""orders partitioning
+
+Revision ID: 6a3c9e1f7b52
+Revises: 3b9d5f1e7c26
+Create Date: 2026-10-18 18:30:47.129054
+
+"""
+
+from datetime import datetime, timezone
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "6a3c9e1f7b52"
+down_revision: Union[str, None] = "3b9d5f1e7c26"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# секции на столько месяцев вперед; дальше их создает задача
+# tasks.ensure_order_partitions
+MONTHS_AHEAD = 3
+
+SQLITE_ORDER_START_DATE_TRIGGER = """
+CREATE TRIGGER tr_order_service_order_start_date_{name} AFTER {event} ON order_service
+WHEN NEW.order_id IS NOT NULL
+BEGIN
+    UPDATE order_service
+    SET order_start_date = (SELECT start_date FROM orders WHERE orders.id = NEW.order_id)
+    WHERE id = NEW.id;
+END
+"""
+
+SQLITE_START_DATE_CASCADE_TRIGGER = """
+CREATE TRIGGER tr_orders_start_date_cascade AFTER UPDATE OF start_date ON orders
+BEGIN
+    UPDATE order_service SET order_start_date = NEW.start_date WHERE order_id = NEW.id;
+END
+"""
+
+# Exclusion constraint нельзя создать на секционированной таблице (он
+# проверялся бы только внутри секции) — то же условие проверяет триггер.
+# Заказы работника проверяются под advisory lock по employee_id, иначе две
+# параллельные транзакции не увидели бы друг друга. Ошибка та же, что у
+# ограничения: exclusion_violation с его именем.
+PG_OVERLAP_FUNCTION = """
+CREATE FUNCTION orders_employee_overlap() RETURNS trigger LANGUAGE plpgsql AS $$
+BEGIN
+    IF NEW.employee_id IS NULL OR NOT NEW.start_date < NEW.end_date THEN
+        RETURN NEW;
+    END IF;
+    PERFORM pg_advisory_xact_lock(hashtext('orders_employee_overlap'), NEW.employee_id);
+    IF EXISTS (
+        SELECT 1 FROM orders
+        WHERE employee_id = NEW.employee_id
+          AND id <> NEW.id
+          AND start_date < NEW.end_date
+          AND end_date > NEW.start_date
+          AND start_date < end_date
+    ) THEN
+        RAISE EXCEPTION 'conflicting key value violates exclusion constraint "ex_orders_employee_overlap"'
+            USING ERRCODE = 'exclusion_violation',
+                  CONSTRAINT = 'ex_orders_employee_overlap',
+                  TABLE = 'orders';
+    END IF;
+    RETURN NEW;
+END
+$$
+"""
+
+PG_OVERLAP_TRIGGER = """
+CREATE TRIGGER tr_orders_employee_overlap
+BEFORE INSERT OR UPDATE OF employee_id, start_date, end_date ON orders
+FOR EACH ROW EXECUTE FUNCTION orders_employee_overlap()
+"""
+
+ORDERS_FOREIGN_KEYS = (
+    ("administrator_id", "user"),
+    ("customer_car_id", "customer_cars"),
+    ("employee_id", "user"),
+)
+
+
+def _create_indexes() -> None:
+    # индекс на родительской таблице создается и во всех секциях
+    op.create_index(op.f("ix_orders_administrator_id"), "orders", ["administrator_id"])
+    op.create_index(op.f("ix_orders_customer_car_id"), "orders", ["customer_car_id"])
+    op.create_index("ix_orders_start_date_id", "orders", ["start_date", "id"])
+    op.create_index("ix_orders_employee_id_start_date", "orders", ["employee_id", "start_date"])
+    op.create_index(
+        "ix_orders_pending_end_date",
+        "orders",
+        ["end_date"],
+        postgresql_where=sa.text("status <> 0"),
+    )
+
+
+def _create_foreign_keys() -> None:
+    for column, referred_table in ORDERS_FOREIGN_KEYS:
+        op.create_foreign_key(
+            op.f(f"fk_orders_{column}_{referred_table}"),
+            "orders",
+            referred_table,
+            [column],
+            ["id"],
+        )
+
+
+def _rebuild_orders(partitioned: bool) -> None:
+    # Таблица создается заново и заполняется из старой: включить
+    # секционирование у существующей таблицы Postgres не умеет
+    op.execute("ALTER TABLE orders RENAME TO orders_previous")
+    op.execute("ALTER TABLE orders_previous RENAME CONSTRAINT pk_orders TO pk_orders_previous")
+    for index in (
+        "ix_orders_administrator_id",
+        "ix_orders_customer_car_id",
+        "ix_orders_start_date_id",
+        "ix_orders_employee_id_start_date",
+        "ix_orders_pending_end_date",
+    ):
+        op.drop_index(index, table_name="orders_previous")
+
+    if partitioned:
+        op.execute(
+            "CREATE TABLE orders (LIKE orders_previous INCLUDING DEFAULTS) "
+            "PARTITION BY RANGE (start_date)"
+        )
+        op.alter_column("orders", "start_date", nullable=False)
+        op.create_primary_key("pk_orders", "orders", ["id", "start_date"])
+        _create_partitions()
+    else:
+        op.execute("CREATE TABLE orders (LIKE orders_previous INCLUDING DEFAULTS)")
+        op.alter_column("orders", "start_date", nullable=True)
+        op.create_primary_key("pk_orders", "orders", ["id"])
+    _create_foreign_keys()
+
+    op.execute("INSERT INTO orders SELECT * FROM orders_previous")
+    # последовательность id принадлежит старой таблице и удалилась бы с ней
+    sequence = op.get_bind().scalar(sa.text("SELECT pg_get_serial_sequence('orders_previous', 'id')"))
+    op.execute(f"ALTER SEQUENCE {sequence} OWNED BY orders.id")
+    op.execute("DROP TABLE orders_previous")
+    _create_indexes()
+    op.execute("ANALYZE orders")
+
+
+def _month_start(value: datetime) -> datetime:
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def _next_month(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def _create_partitions() -> None:
+    # месячные секции от самого раннего заказа до MONTHS_AHEAD месяцев
+    # вперед; что не попало ни в одну — в orders_default
+    first = op.get_bind().scalar(sa.text("SELECT min(start_date) FROM orders_previous"))
+    now = datetime.now(timezone.utc)
+    month = _month_start(min(first, now) if first else now)
+    last = _month_start(now)
+    for _ in range(MONTHS_AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        op.execute(
+            f"CREATE TABLE orders_y{month:%Y}m{month:%m} PARTITION OF orders "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_next_month(month).isoformat()}')"
+        )
+        month = _next_month(month)
+    op.execute("CREATE TABLE orders_default PARTITION OF orders DEFAULT")
+
+
+def upgrade() -> None:
+    op.add_column(
+        "order_service",
+        sa.Column("order_start_date", sa.DateTime(timezone=True), nullable=True),
+    )
+    op.execute(
+        """
+        UPDATE order_service SET order_start_date = (
+            SELECT start_date FROM orders WHERE orders.id = order_service.order_id
+        )
+        WHERE order_id IS NOT NULL
+        """
+    )
+
+    if op.get_bind().dialect.name != "postgresql":
+        op.execute(SQLITE_ORDER_START_DATE_TRIGGER.format(name="insert", event="INSERT"))
+        op.execute(SQLITE_ORDER_START_DATE_TRIGGER.format(name="update", event="UPDATE OF order_id"))
+        op.execute(SQLITE_START_DATE_CASCADE_TRIGGER)
+        return
+
+    # ключ секционирования входит в первичный ключ, заказ без start_date
+    # некуда положить
+    missing = op.get_bind().scalar(sa.text("SELECT count(*) FROM orders WHERE start_date IS NULL"))
+    if missing:
+        raise RuntimeError(f"{missing} orders have no start_date; set it before partitioning")
+
+    op.drop_constraint("fk_order_service_order_id_orders", "order_service", type_="foreignkey")
+    op.execute("ALTER TABLE orders DROP CONSTRAINT ex_orders_employee_overlap")
+    _rebuild_orders(partitioned=True)
+
+    # Перенос заказа во времени переносит строку в другую секцию и каскадом
+    # обновляет order_service (Postgres 15+)
+    op.execute(
+        "ALTER TABLE order_service ADD CONSTRAINT fk_order_service_order_id_orders "
+        "FOREIGN KEY (order_id, order_start_date) REFERENCES orders (id, start_date) "
+        "MATCH FULL ON UPDATE CASCADE"
+    )
+    op.execute(PG_OVERLAP_FUNCTION)
+    op.execute(PG_OVERLAP_TRIGGER)
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "postgresql":
+        op.execute("DROP TRIGGER IF EXISTS tr_orders_start_date_cascade")
+        op.execute("DROP TRIGGER IF EXISTS tr_order_service_order_start_date_update")
+        op.execute("DROP TRIGGER IF EXISTS tr_order_service_order_start_date_insert")
+        with op.batch_alter_table("order_service") as batch_op:
+            batch_op.drop_column("order_start_date")
+        return
+
+    op.execute("DROP TRIGGER tr_orders_employee_overlap ON orders")
+    op.execute("DROP FUNCTION orders_employee_overlap()")
+    op.drop_constraint("fk_order_service_order_id_orders", "order_service", type_="foreignkey")
+    _rebuild_orders(partitioned=False)
+    op.execute(
+        "ALTER TABLE orders ADD CONSTRAINT ex_orders_employee_overlap "
+        "EXCLUDE USING gist (employee_id WITH =, tstzrange(start_date, end_date, '[)') WITH &&)"
+    )
+    op.create_foreign_key(
+        op.f("fk_order_service_order_id_orders"),
+        "order_service",
+        "orders",
+        ["order_id"],
+        ["id"],
+    )
+    op.drop_column("order_service", "order_start_date")
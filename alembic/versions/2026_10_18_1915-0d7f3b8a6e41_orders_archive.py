@@ -0,0 +1,120 @@
+"""orders archive
+
+Revision ID: 0d7f3b8a6e41
+Revises: 6a3c9e1f7b52
+Create Date: 2026-10-18 19:15:12.604381
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0d7f3b8a6e41"
+down_revision: Union[str, None] = "6a3c9e1f7b52"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "orders_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("administrator_id", sa.Integer(), nullable=True),
+        sa.Column("customer_car_id", sa.Integer(), nullable=True),
+        sa.Column("employee_id", sa.Integer(), nullable=True),
+        sa.Column("status", sa.Integer(), nullable=True),
+        sa.Column("start_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("end_date", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("notified", sa.Boolean(), nullable=True),
+        sa.Column("total_price", sa.Integer(), nullable=False),
+        sa.Column("total_time_minutes", sa.Integer(), nullable=False),
+        sa.Column(
+            "archived_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("(CURRENT_TIMESTAMP)"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["administrator_id"],
+            ["user.id"],
+            name=op.f("fk_orders_archive_administrator_id_user"),
+        ),
+        sa.ForeignKeyConstraint(
+            ["customer_car_id"],
+            ["customer_cars.id"],
+            name=op.f("fk_orders_archive_customer_car_id_customer_cars"),
+        ),
+        sa.ForeignKeyConstraint(
+            ["employee_id"],
+            ["user.id"],
+            name=op.f("fk_orders_archive_employee_id_user"),
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_orders_archive")),
+    )
+    op.create_index(
+        op.f("ix_orders_archive_administrator_id"), "orders_archive", ["administrator_id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_orders_archive_customer_car_id"), "orders_archive", ["customer_car_id"], unique=False
+    )
+    op.create_index(
+        op.f("ix_orders_archive_employee_id"), "orders_archive", ["employee_id"], unique=False
+    )
+    op.create_index(
+        "ix_orders_archive_start_date_id", "orders_archive", ["start_date", "id"], unique=False
+    )
+    op.create_table(
+        "order_service_archive",
+        sa.Column("id", sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column("service_id", sa.Integer(), nullable=True),
+        sa.Column("order_id", sa.Integer(), nullable=True),
+        sa.ForeignKeyConstraint(
+            ["order_id"],
+            ["orders_archive.id"],
+            name=op.f("fk_order_service_archive_order_id_orders_archive"),
+        ),
+        sa.ForeignKeyConstraint(
+            ["service_id"],
+            ["services.id"],
+            name=op.f("fk_order_service_archive_service_id_services"),
+        ),
+        sa.PrimaryKeyConstraint("id", name=op.f("pk_order_service_archive")),
+    )
+    op.create_index(
+        op.f("ix_order_service_archive_order_id"), "order_service_archive", ["order_id"], unique=False
+    )
+
+
+def downgrade() -> None:
+    # Архивные заказы возвращаются в рабочие таблицы, чтобы не потерять историю
+    op.execute(
+        """
+        INSERT INTO orders (
+            id, administrator_id, customer_car_id, employee_id, status,
+            start_date, end_date, notified, total_price, total_time_minutes
+        )
+        SELECT
+            id, administrator_id, customer_car_id, employee_id, status,
+            start_date, end_date, notified, total_price, total_time_minutes
+        FROM orders_archive
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO order_service (id, service_id, order_id, order_start_date)
+        SELECT order_service_archive.id, service_id, order_id, orders_archive.start_date
+        FROM order_service_archive
+        LEFT JOIN orders_archive ON orders_archive.id = order_service_archive.order_id
+        """
+    )
+    op.drop_index(op.f("ix_order_service_archive_order_id"), table_name="order_service_archive")
+    op.drop_table("order_service_archive")
+    op.drop_index("ix_orders_archive_start_date_id", table_name="orders_archive")
+    op.drop_index(op.f("ix_orders_archive_employee_id"), table_name="orders_archive")
+    op.drop_index(op.f("ix_orders_archive_customer_car_id"), table_name="orders_archive")
+    op.drop_index(op.f("ix_orders_archive_administrator_id"), table_name="orders_archive")
+    op.drop_table("orders_archive")
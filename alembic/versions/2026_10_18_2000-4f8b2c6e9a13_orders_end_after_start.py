@@ -0,0 +1,108 @@
+"""orders end after start
+
+Revision ID: 4f8b2c6e9a13
+Revises: 0d7f3b8a6e41
+Create Date: 2026-10-18 20:00:36.518207
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "4f8b2c6e9a13"
+down_revision: Union[str, None] = "0d7f3b8a6e41"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# SQLite добавляет ограничение пересозданием таблицы (batch). Триггеры orders
+# удаляются вместе со старой таблицей, а триггеры order_service, которые на
+# нее ссылаются, не дают ее переименовать — все они пересоздаются
+SQLITE_OVERLAP_TRIGGER = """
+CREATE TRIGGER tr_orders_employee_overlap_{name} BEFORE {event} ON orders
+WHEN NEW.employee_id IS NOT NULL AND NEW.start_date < NEW.end_date
+BEGIN
+    SELECT RAISE(ABORT, 'ex_orders_employee_overlap')
+    WHERE EXISTS (
+        SELECT 1 FROM orders
+        WHERE employee_id = NEW.employee_id
+          AND id IS NOT NEW.id
+          AND start_date < NEW.end_date
+          AND end_date > NEW.start_date
+          AND start_date < end_date
+    );
+END
+"""
+
+SQLITE_START_DATE_CASCADE_TRIGGER = """
+CREATE TRIGGER tr_orders_start_date_cascade AFTER UPDATE OF start_date ON orders
+BEGIN
+    UPDATE order_service SET order_start_date = NEW.start_date WHERE order_id = NEW.id;
+END
+"""
+
+SQLITE_ORDER_START_DATE_TRIGGER = """
+CREATE TRIGGER tr_order_service_order_start_date_{name} AFTER {event} ON order_service
+WHEN NEW.order_id IS NOT NULL
+BEGIN
+    UPDATE order_service
+    SET order_start_date = (SELECT start_date FROM orders WHERE orders.id = NEW.order_id)
+    WHERE id = NEW.id;
+END
+"""
+
+SQLITE_TRIGGERS = (
+    "tr_orders_employee_overlap_insert",
+    "tr_orders_employee_overlap_update",
+    "tr_orders_start_date_cascade",
+    "tr_order_service_order_start_date_insert",
+    "tr_order_service_order_start_date_update",
+)
+
+
+def _drop_sqlite_triggers() -> None:
+    for trigger in SQLITE_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+def _create_sqlite_triggers() -> None:
+    op.execute(SQLITE_OVERLAP_TRIGGER.format(name="insert", event="INSERT"))
+    op.execute(
+        SQLITE_OVERLAP_TRIGGER.format(name="update", event="UPDATE OF employee_id, start_date, end_date")
+    )
+    op.execute(SQLITE_START_DATE_CASCADE_TRIGGER)
+    op.execute(SQLITE_ORDER_START_DATE_TRIGGER.format(name="insert", event="INSERT"))
+    op.execute(SQLITE_ORDER_START_DATE_TRIGGER.format(name="update", event="UPDATE OF order_id"))
+
+
+# Перед обновлением заказы с end_date раньше start_date нужно исправить
+# вручную, иначе ограничение не создастся
+def upgrade() -> None:
+    reversed_orders = op.get_bind().scalar(
+        sa.text("SELECT count(*) FROM orders WHERE end_date < start_date")
+    )
+    if reversed_orders:
+        raise RuntimeError(f"{reversed_orders} orders end before they start; fix them before upgrading")
+
+    if op.get_bind().dialect.name == "postgresql":
+        op.create_check_constraint(op.f("ck_orders_end_after_start"), "orders", "end_date >= start_date")
+        return
+
+    _drop_sqlite_triggers()
+    with op.batch_alter_table("orders") as batch_op:
+        batch_op.create_check_constraint(op.f("ck_orders_end_after_start"), "end_date >= start_date")
+    _create_sqlite_triggers()
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name == "postgresql":
+        op.drop_constraint(op.f("ck_orders_end_after_start"), "orders", type_="check")
+        return
+
+    _drop_sqlite_triggers()
+    with op.batch_alter_table("orders") as batch_op:
+        batch_op.drop_constraint(op.f("ck_orders_end_after_start"), type_="check")
+    _create_sqlite_triggers()
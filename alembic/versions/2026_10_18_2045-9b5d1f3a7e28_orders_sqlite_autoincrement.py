@@ -0,0 +1,116 @@
+"""orders sqlite autoincrement
+
+Revision ID: 9b5d1f3a7e28
+Revises: 4f8b2c6e9a13
+Create Date: 2026-10-18 20:45:09.381642
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "9b5d1f3a7e28"
+down_revision: Union[str, None] = "4f8b2c6e9a13"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Без AUTOINCREMENT SQLite выдает новой строке max(id) + 1, и id заказов,
+# перенесенных в orders_archive, выдавались бы повторно. В Postgres id берутся
+# из последовательностей, там ничего не меняется.
+#
+# Таблицы пересоздаются (batch). Триггеры orders и order_service ссылаются
+# друг на друга и не дают переименовать таблицу — они пересоздаются тоже
+SQLITE_OVERLAP_TRIGGER = """
+CREATE TRIGGER tr_orders_employee_overlap_{name} BEFORE {event} ON orders
+WHEN NEW.employee_id IS NOT NULL AND NEW.start_date < NEW.end_date
+BEGIN
+    SELECT RAISE(ABORT, 'ex_orders_employee_overlap')
+    WHERE EXISTS (
+        SELECT 1 FROM orders
+        WHERE employee_id = NEW.employee_id
+          AND id IS NOT NEW.id
+          AND start_date < NEW.end_date
+          AND end_date > NEW.start_date
+          AND start_date < end_date
+    );
+END
+"""
+
+SQLITE_START_DATE_CASCADE_TRIGGER = """
+CREATE TRIGGER tr_orders_start_date_cascade AFTER UPDATE OF start_date ON orders
+BEGIN
+    UPDATE order_service SET order_start_date = NEW.start_date WHERE order_id = NEW.id;
+END
+"""
+
+SQLITE_ORDER_START_DATE_TRIGGER = """
+CREATE TRIGGER tr_order_service_order_start_date_{name} AFTER {event} ON order_service
+WHEN NEW.order_id IS NOT NULL
+BEGIN
+    UPDATE order_service
+    SET order_start_date = (SELECT start_date FROM orders WHERE orders.id = NEW.order_id)
+    WHERE id = NEW.id;
+END
+"""
+
+SQLITE_TRIGGERS = (
+    "tr_orders_employee_overlap_insert",
+    "tr_orders_employee_overlap_update",
+    "tr_orders_start_date_cascade",
+    "tr_order_service_order_start_date_insert",
+    "tr_order_service_order_start_date_update",
+)
+
+
+def _drop_sqlite_triggers() -> None:
+    for trigger in SQLITE_TRIGGERS:
+        op.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+
+
+def _create_sqlite_triggers() -> None:
+    op.execute(SQLITE_OVERLAP_TRIGGER.format(name="insert", event="INSERT"))
+    op.execute(
+        SQLITE_OVERLAP_TRIGGER.format(name="update", event="UPDATE OF employee_id, start_date, end_date")
+    )
+    op.execute(SQLITE_START_DATE_CASCADE_TRIGGER)
+    op.execute(SQLITE_ORDER_START_DATE_TRIGGER.format(name="insert", event="INSERT"))
+    op.execute(SQLITE_ORDER_START_DATE_TRIGGER.format(name="update", event="UPDATE OF order_id"))
+
+
+
+def _rebuild(autoincrement: bool) -> None:
+    _drop_sqlite_triggers()
+    for table in ("orders", "order_service"):
+        with op.batch_alter_table(
+            table, recreate="always", table_kwargs={"sqlite_autoincrement": autoincrement}
+        ):
+            pass
+    _create_sqlite_triggers()
+
+
+def upgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    _rebuild(autoincrement=True)
+    # счетчик продолжается после самого большого id, в том числе архивного
+    for table, archive in (("orders", "orders_archive"), ("order_service", "order_service_archive")):
+        op.execute(sa.text("DELETE FROM sqlite_sequence WHERE name = :name").bindparams(name=table))
+        op.execute(
+            sa.text(
+                f"INSERT INTO sqlite_sequence (name, seq) "
+                f"SELECT :name, coalesce(max(id), 0) FROM "
+                f"(SELECT id FROM {table} UNION ALL SELECT id FROM {archive})"
+            ).bindparams(name=table)
+        )
+
+
+def downgrade() -> None:
+    if op.get_bind().dialect.name != "sqlite":
+        return
+
+    _rebuild(autoincrement=False)
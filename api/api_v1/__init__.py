@@ -2,6 +2,7 @@ from fastapi import APIRouter, Depends
 from fastapi.security import HTTPBearer
 
 from core.config import settings
+from .analytics import analytics_router
 from .auth import router as auth_router
 from .brand import brand_router
 from .car import car_router
@@ -28,4 +29,5 @@ router.include_router(car_router)
 router.include_router(order_service_router)
 router.include_router(order_router)
 router.include_router(customer_car_router)
+router.include_router(analytics_router)
 
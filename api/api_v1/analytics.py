@@ -0,0 +1,83 @@
+from datetime import date, timedelta
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.authentication.dependecy import check_access
+from core.config import settings
+from core.models import db_helper, User
+from core.schemas.analytics import (
+    AnalyticsRefreshRead,
+    DailyRevenueRead,
+    EmployeeRevenueRead,
+    HourlyOrdersRead,
+    ServiceRevenueRead,
+)
+from crud.carwash import analytics as analytics_crud
+
+analytics_router = APIRouter(
+    prefix=settings.api.v1.analytics,
+    tags=["Analytics"],
+)
+
+# Все отчеты читаются из предагрегированных таблиц, поэтому не зависят от
+# объема истории. Данные обновляются задачей refresh_analytics (или POST /refresh).
+
+
+def date_range(
+    date_from: Optional[date] = Query(None, description="По умолчанию — 30 дней до date_to"),
+    date_to: Optional[date] = Query(None, description="Включительно, по умолчанию — сегодня"),
+) -> tuple[date, date]:
+    date_to = date_to or date.today()
+    date_from = date_from or date_to - timedelta(days=30)
+    if date_from > date_to:
+        raise HTTPException(status_code=400, detail="date_from must not be after date_to")
+    return date_from, date_to
+
+
+@analytics_router.get("/revenue/daily", response_model=list[DailyRevenueRead])
+async def api_daily_revenue(
+    period: tuple[date, date] = Depends(date_range),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
+    user: User = Depends(check_access([1])),
+):
+    return await analytics_crud.get_daily_revenue(session, *period)
+
+
+@analytics_router.get("/revenue/services", response_model=list[ServiceRevenueRead])
+async def api_service_revenue(
+    period: tuple[date, date] = Depends(date_range),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
+    user: User = Depends(check_access([1])),
+):
+    return await analytics_crud.get_service_revenue(session, *period)
+
+
+@analytics_router.get("/revenue/employees", response_model=list[EmployeeRevenueRead])
+async def api_employee_revenue(
+    period: tuple[date, date] = Depends(date_range),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
+    user: User = Depends(check_access([1])),
+):
+    return await analytics_crud.get_employee_revenue(session, *period)
+
+
+@analytics_router.get("/orders/hourly", response_model=list[HourlyOrdersRead])
+async def api_hourly_orders(
+    period: tuple[date, date] = Depends(date_range),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
+    user: User = Depends(check_access([1])),
+):
+    return await analytics_crud.get_hourly_orders(session, *period)
+
+
+@analytics_router.post("/refresh", response_model=AnalyticsRefreshRead)
+async def api_refresh_analytics(
+    session: AsyncSession = Depends(db_helper.session_getter),
+    user: User = Depends(check_access([1])),
+):
+    refreshed_days = await analytics_crud.refresh_analytics(
+        session, max_days=settings.analytics.refresh_max_days
+    )
+    return {"refreshed_days": refreshed_days}
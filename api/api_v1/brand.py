@@ -15,6 +15,7 @@ from core.schemas.carwash import (
 )
 from crud.carwash import brand as brand_crud
 from crud.carwash.brand import get_filtered_brands
+from crud.carwash.catalog_version import BRANDS, catalog_etag
 
 brand_router = APIRouter(
     prefix=settings.api.v1.brands,
@@ -28,28 +29,29 @@ async def get_brands_api(
     limit: int = Query(10, ge=1),  
     page: int = Query(1, ge=1),  
     name: Optional[str] = None,  
-    sort_by: Optional[str] = Query("id", regex="^(id|name)$"),  
+    sort_by: Optional[str] = Query("id", regex="^(id|name|relevance)$"),  
     order: Optional[str] = Query("asc", regex="^(asc|desc)$"), 
-    user: User = Depends(check_access([1]))
+    user: User = Depends(check_access([1])),
+    _: None = Depends(catalog_etag(BRANDS)),
 ):
     brands = await get_filtered_brands(
         session=session,
         name=name,
         sort_by=sort_by,
-        order=order
+        order=order,
+        limit=limit,
+        page=page,
     )
 
-    offset = (page - 1) * limit
-    paginated_brands = brands[offset:offset + limit]
-
-    return paginated_brands
+    return brands
 
 
 @brand_router.get("/{brand_id}", response_model=BrandRead)
 async def get_brand(
     brand_id: int,
     session: AsyncSession = Depends(db_helper.session_getter),
-    user: User = Depends(check_access([1]))
+    user: User = Depends(check_access([1])),
+    _: None = Depends(catalog_etag(BRANDS)),
 ):
     brand = await brand_crud.get_brand(session=session, brand_id=brand_id)
     if not brand:
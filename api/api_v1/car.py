@@ -16,6 +16,7 @@ from core.schemas.carwash import (
 )
 from crud.carwash import car as car_crud
 from crud.carwash.car import get_cars
+from crud.carwash.catalog_version import BRANDS, CARS, catalog_etag
 
 car_router = APIRouter(
     prefix=settings.api.v1.cars,
@@ -27,8 +28,8 @@ car_router = APIRouter(
 async def get_car(
     car_id: int,
     session: AsyncSession = Depends(db_helper.session_getter),
-    user: User = Depends(check_access([1]))
-
+    user: User = Depends(check_access([1])),
+    _: None = Depends(catalog_etag(CARS, BRANDS)),
 ):
     car = await car_crud.get_car(session=session, car_id=car_id)
     return car
@@ -39,29 +40,23 @@ async def get_cars_api(
         limit: int = Query(10, ge=1),
         page: int = Query(1, ge=1),  
         brand: Optional[str] = None, 
-        sort_by: Optional[str] = Query("id", regex="^(id|model)$"),  
+        model: Optional[str] = None,
+        sort_by: Optional[str] = Query("id", regex="^(id|model|relevance)$"),  
         order: Optional[str] = Query("asc", regex="^(asc|desc)$"), 
-        user:   User = Depends(check_access([1]))
+        user:   User = Depends(check_access([1])),
+        _: None = Depends(catalog_etag(CARS, BRANDS)),
 ):
+    cars = await get_cars(
+        session,
+        brand=brand,
+        model=model,
+        sort_by=sort_by,
+        order=order,
+        limit=limit,
+        page=page,
+    )
 
-    cars = await get_cars(session)
-
-
-    if brand:
-        cars = [car for car in cars if brand.lower() in car.brand.name.lower()]
-
-
-    if sort_by:
-        if not hasattr(Car, sort_by):
-            raise HTTPException(status_code=400, detail=f"Invalid sort_by value: {sort_by}")
-
-        reverse = order == "desc"
-        cars = sorted(cars, key=lambda car: getattr(car, sort_by), reverse=reverse)
-
-    offset = (page - 1) * limit
-    cars_paginated = cars[offset:offset + limit]
-
-    return cars_paginated
+    return cars
 # Создание нового автомобиля
 @car_router.post("", response_model=CarRead, status_code=status.HTTP_201_CREATED)
 async def create_car(
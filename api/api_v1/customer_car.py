@@ -21,7 +21,7 @@ customer_car_router = APIRouter(
 # Получение списка всех автомобилей клиентов
 @customer_car_router.get("", response_model=list[CustomerCarRead])
 async def api_get_customer_cars(
-    session: AsyncSession = Depends(db_helper.session_getter),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
     limit: int = Query(10, ge=1), 
     page: int = Query(1, ge=1), 
     sort_by: Optional[str] = Query("id", regex="^(id|car_model|customer_name)$"), 
@@ -35,20 +35,19 @@ async def api_get_customer_cars(
         user_id=user.id,
         car_model=car_model,
         sort_by=sort_by,
-        order=order
+        order=order,
+        limit=limit,
+        page=page,
     )
 
-    offset = (page - 1) * limit
-    customer_cars_paginated = customer_cars[offset:offset + limit]
-
-    return customer_cars_paginated
+    return customer_cars
 
 
 # Получение информации о автомобиле клиента по id
 @customer_car_router.get("/{customer_car_id}", response_model=CustomerCarBase)
 async def get_customer_car(
     customer_car_id: int,
-    session: AsyncSession = Depends(db_helper.session_getter),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
     user: User = Depends(fastapi_users.current_user())
 ):
 
@@ -1,6 +1,8 @@
+from datetime import date, datetime, timedelta
 from typing import Optional, List
 
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Request, Response
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.sql.functions import current_user
 import asyncio
@@ -10,9 +12,13 @@ from core.authentication.dependecy import check_access
 # check_order_list_access, check_order_by_id
 from core.config import settings
 from core.models import db_helper, Order, User
-from core.schemas.carwash import OrderCreate, OrderRead, OrderUpdate, OrderBase
+from core.schemas.carwash import OrderCreate, OrderRead, OrderUpdate, OrderBase, EmployeeAvailability
+from create_fastapi_app import CustomORJSONResponse
 from crud.carwash import order as order_crud
-from crud.carwash.order import get_orders, get_order
+from crud.carwash.availability import get_availability, services_duration
+from crud.carwash.order import get_orders, get_order, get_orders_lean, get_archived_order
+from crud.carwash.order_export import EXPORT_MEDIA_TYPES, export_orders
+from crud.carwash.service_catalog import service_catalog
 
 order_router = APIRouter(
     prefix=settings.api.v1.orders,
@@ -22,17 +28,24 @@ order_router = APIRouter(
 
 # Customer_car - в ней поиск по моделям машины
 
+# Курсор следующей страницы отдается в заголовке X-Next-Cursor, его нужно
+# передать в параметре cursor (page при этом игнорируется).
+# start_from/start_to — интервал start_date [start_from, start_to)
 @order_router.get("/orders", response_model=List[OrderRead])
 async def api_get_orders(
-    session: AsyncSession = Depends(db_helper.session_getter),
+    response: Response,
+    session: AsyncSession = Depends(db_helper.read_session_getter),
     limit: int = Query(10, ge=1),
     page: int = Query(1, ge=1),
     sort_by: Optional[str] = Query("id", regex="^(id|start_date)$"),
     order: Optional[str] = Query("asc", regex="^(asc|desc)$"),
     status: Optional[int] = Query(None, ge=0, le=1),
+    cursor: Optional[str] = Query(None),
+    start_from: Optional[datetime] = Query(None),
+    start_to: Optional[datetime] = Query(None),
     user: User = Depends(fastapi_users.current_user()),
 ):
-    orders = await get_orders(
+    orders, next_cursor = await get_orders(
         user=user,
         session=session,
         limit=limit,
@@ -40,20 +53,127 @@ async def api_get_orders(
         sort_by=sort_by,
         order=order,
         status=status,
+        cursor=cursor,
+        start_from=start_from,
+        start_to=start_to,
     )
+    if next_cursor:
+        response.headers["X-Next-Cursor"] = next_cursor
 
-    serialized_orders = [await OrderRead.from_orm(order) for order in orders]
+    services = await service_catalog.get_index(session)
+    serialized_orders = [await OrderRead.from_orm(order, services) for order in orders]
 
     return serialized_orders
 
+# Тот же список в том же формате, но без ORM-объектов и валидации pydantic:
+# строки собираются из выбранных колонок и сразу сериализуются orjson.
+# include_archived — вместе с заказами из orders_archive
+@order_router.get(
+    "/orders/lean",
+    response_class=CustomORJSONResponse,
+    responses={200: {"model": List[OrderRead]}},
+)
+async def api_get_orders_lean(
+    session: AsyncSession = Depends(db_helper.read_session_getter),
+    limit: int = Query(10, ge=1),
+    page: int = Query(1, ge=1),
+    sort_by: Optional[str] = Query("id", regex="^(id|start_date)$"),
+    order: Optional[str] = Query("asc", regex="^(asc|desc)$"),
+    status: Optional[int] = Query(None, ge=0, le=1),
+    cursor: Optional[str] = Query(None),
+    start_from: Optional[datetime] = Query(None),
+    start_to: Optional[datetime] = Query(None),
+    include_archived: bool = Query(False),
+    user: User = Depends(fastapi_users.current_user()),
+):
+    orders, next_cursor = await get_orders_lean(
+        user=user,
+        session=session,
+        limit=limit,
+        page=page,
+        sort_by=sort_by,
+        order=order,
+        status=status,
+        cursor=cursor,
+        start_from=start_from,
+        start_to=start_to,
+        include_archived=include_archived,
+    )
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return CustomORJSONResponse(orders, headers=headers)
+
+# Свободные окна работников под работу заданной длительности: либо
+# duration_minutes, либо service_ids (длительность — сумма времени услуг)
+@order_router.get("/availability", response_model=List[EmployeeAvailability])
+async def api_get_availability(
+    day: date = Query(default_factory=date.today),
+    days: int = Query(1, ge=1, le=settings.schedule.max_days),
+    duration_minutes: Optional[int] = Query(None, ge=1),
+    service_ids: Optional[List[int]] = Query(None),
+    employee_id: Optional[List[int]] = Query(None),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
+    user: User = Depends(check_access([1])),
+):
+    if duration_minutes is not None:
+        duration = timedelta(minutes=duration_minutes)
+    elif service_ids:
+        duration = await services_duration(session, service_ids)
+    else:
+        raise HTTPException(status_code=400, detail="Pass duration_minutes or service_ids")
+
+    return await get_availability(
+        session, day_from=day, days=days, duration=duration, employee_ids=employee_id
+    )
+
+
+# Выгрузка всех заказов для бухгалтерии потоком: память сервера не зависит
+# от количества заказов. Фильтр по start_date: start_from <= start_date < start_to
+@order_router.get(
+    "/export",
+    response_class=StreamingResponse,
+    responses={200: {"content": {media_type: {} for media_type in EXPORT_MEDIA_TYPES.values()}}},
+)
+async def api_export_orders(
+    request: Request,
+    export_format: str = Query("ndjson", alias="format", regex="^(ndjson|csv)$"),
+    start_from: Optional[datetime] = Query(None),
+    start_to: Optional[datetime] = Query(None),
+    include_archived: bool = Query(False),
+    user: User = Depends(check_access([1])),
+):
+    if start_from and start_to and start_from >= start_to:
+        raise HTTPException(status_code=400, detail="start_from must be earlier than start_to")
+
+    filename = f"orders.{export_format}"
+    return StreamingResponse(
+        export_orders(
+            db_helper.read_session_factory(request),
+            export_format=export_format,
+            start_from=start_from,
+            start_to=start_to,
+            batch_size=settings.export.batch_size,
+            include_archived=include_archived,
+        ),
+        media_type=EXPORT_MEDIA_TYPES[export_format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
 @order_router.get("/{order_id}", response_model=OrderRead)
 async def get_order_by_id(
     order_id: int,
-    session: AsyncSession = Depends(db_helper.session_getter),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
+    include_archived: bool = Query(False),
     user: User = Depends(fastapi_users.current_user())
 ):
-    order = await get_order(session, order_id, user)
-    serialized_orders = await OrderRead.from_orm(order)
+    try:
+        order = await get_order(session, order_id, user)
+    except HTTPException as exc:
+        # заказ мог быть перенесен в orders_archive
+        if exc.status_code != 404 or not include_archived:
+            raise
+        return await get_archived_order(session, order_id, user)
+    services = await service_catalog.get_index(session)
+    serialized_orders = await OrderRead.from_orm(order, services)
 
     return serialized_orders
 
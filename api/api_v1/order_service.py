@@ -3,7 +3,8 @@ from typing import Optional
 from fastapi import APIRouter, Depends, HTTPException, status, Query
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from core.authentication.dependecy import check_access, check_order_list_access22
+from api.api_v1.fastapi_users import fastapi_users
+from core.authentication.dependecy import check_access
 from core.config import settings
 from core.models import db_helper, OrderService, User
 from crud.carwash import order_service as order_service_crud
@@ -17,27 +18,25 @@ order_service_router = APIRouter(
 
 @order_service_router.get("", response_model=list[OrderServiceRead])
 async def api_get_order_services(
-    session: AsyncSession = Depends(db_helper.session_getter),
+    session: AsyncSession = Depends(db_helper.read_session_getter),
     limit: int = Query(10, ge=1),
     page: int = Query(1, ge=1),
     sort_by: Optional[str] = Query("id", regex="^(id|service_name|order_id)$"),
     order: Optional[str] = Query("asc", regex="^(asc|desc)$"),
     order_id: Optional[int] = Query(None),
-    orders: list[OrderService] = Depends(check_order_list_access22()),
+    user: User = Depends(fastapi_users.current_user()),
 ):
-
     order_services = await get_order_services(
         session=session,
-        orders=orders,
+        user=user,
         order_id=order_id,
         sort_by=sort_by,
-        order=order
+        order=order,
+        limit=limit,
+        page=page,
     )
 
-    offset = (page - 1) * limit
-    order_services_paginated = order_services[offset:offset + limit]
-
-    return order_services_paginated
+    return order_services
 
 
 
@@ -46,11 +45,12 @@ async def api_get_order_services(
 @order_service_router.get("/{order_service_id}", response_model=OrderServiceRead)
 async def get_order_service(
     order_service_id: int,
-    session: AsyncSession = Depends(db_helper.session_getter),
-    orders: list[OrderService] = Depends(check_order_list_access22()),  
+    session: AsyncSession = Depends(db_helper.read_session_getter),
+    user: User = Depends(fastapi_users.current_user()),
 ):
-    order_service = next((service for service in orders if service.id == order_service_id), None)
-
+    order_service = await order_service_crud.get_order_service(
+        session=session, order_service_id=order_service_id, user=user
+    )
 
     if not order_service:
         raise HTTPException(status_code=404, detail="OrderService not found")
@@ -8,6 +8,8 @@ from core.config import settings
 from core.models import db_helper, Service, User
 from core.schemas.carwash import ServiceCreate, ServiceRead, ServiceUpdate, Price, Time
 from crud.carwash import service as service_crud
+from crud.carwash.catalog_version import SERVICES, catalog_etag
+from crud.carwash.service_catalog import service_catalog
 
 service_router = APIRouter(
     prefix=settings.api.v1.services,
@@ -21,20 +23,15 @@ async def api_get_services(
     page: int = Query(1, ge=1),
     sort_by: Optional[str] = Query("id", regex="^(id|name|price)$"),
     order: Optional[str] = Query("asc", regex="^(asc|desc)$"),
+    _: None = Depends(catalog_etag(SERVICES)),
 ):
-    services = await service_crud.get_services(session=session)
-
-    if sort_by:
-        if not hasattr(Service, sort_by):
-            raise HTTPException(status_code=400, detail=f"Invalid sort_by value: {sort_by}")
-
-        reverse = order == "desc"
-        services = sorted(services, key=lambda service: getattr(service, sort_by), reverse=reverse)
-
-    offset = (page - 1) * limit
-    services_paginated = services[offset:offset + limit]
-
-    return [ServiceRead.from_orm(service) for service in services_paginated]
+    return await service_catalog.get_services(
+        session=session,
+        sort_by=sort_by or "id",
+        order=order or "asc",
+        limit=limit,
+        page=page,
+    )
 
 
 
@@ -43,11 +40,12 @@ async def api_get_services(
 async def get_service(
     service_id: int,
     session: AsyncSession = Depends(db_helper.session_getter),
+    _: None = Depends(catalog_etag(SERVICES)),
 ):
-    service = await service_crud.get_service(session=session, service_id=service_id)
+    service = await service_catalog.get_service(session=session, service_id=service_id)
     if not service:
         raise HTTPException(status_code=404, detail="Service not found")
-    return service.to_response()
+    return service
 
 
 @service_router.post("", response_model=ServiceRead, status_code=status.HTTP_201_CREATED)
@@ -4,10 +4,8 @@ from typing import (
 )
 
 from fastapi import Depends
-from fastapi_users.authentication.strategy.db import (
-    DatabaseStrategy,
-)
 
+from core.authentication.strategy import CachedDatabaseStrategy
 from core.config import settings
 from .access_tokens import get_access_tokens_db
 
@@ -21,8 +19,8 @@ def get_database_strategy(
         "AccessTokenDatabase[AccessToken]",
         Depends(get_access_tokens_db),
     ],
-) -> DatabaseStrategy:
-    return DatabaseStrategy(
+) -> CachedDatabaseStrategy:
+    return CachedDatabaseStrategy(
         database=access_tokens_db,
         lifetime_seconds=settings.access_token.lifetime_seconds,
     )
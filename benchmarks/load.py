@@ -0,0 +1,362 @@
+"""
+Нагрузочный прогон всех роутеров api/api_v1.
+
+Каждый сценарий (один эндпоинт с типичными параметрами) выполняется
+--requests раз в --concurrency параллельных потоков. Для каждого
+сценария считаются p50/p95/p99 задержки, пропускная способность, доля
+ошибок и число SQL-запросов на HTTP-запрос (по db_queries_total из
+/metrics). Результат пишется в JSON, чтобы сравнивать коммиты между собой.
+
+По умолчанию приложение запускается в этом же процессе поверх --url;
+с --base-url запросы уходят на уже запущенный сервер (он должен
+смотреть в ту же базу, что и --url — из нее берутся id для запросов;
+число SQL-запросов точное только при одном воркере сервера).
+
+Запуск:
+    python -m benchmarks.seed --size medium
+    python -m benchmarks.load --concurrency 16 --requests 500 --output before.json
+    python -m benchmarks.load --scenarios orders. --output after.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import platform
+import random
+import statistics
+import subprocess
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Callable, NamedTuple, Optional
+
+import httpx
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from benchmarks.seed import (
+    BENCHMARK_EMAIL,
+    BENCHMARK_PASSWORD,
+    BENCHMARK_TOKEN,
+    DEFAULT_URL,
+    renew_benchmark_token,
+)
+from core.config import settings
+from core.metrics import TimedAsyncAdaptedQueuePool, instrument_engine
+from core.models import Brand, Car, Customer_Car, Order, OrderService, Service, User, db_helper
+from crud.carwash.analytics import refresh_analytics
+
+V1 = settings.api.prefix + settings.api.v1.prefix
+PREFIX = {
+    name: V1 + getattr(settings.api.v1, name)
+    for name in (
+        "auth", "users", "brands", "services", "cars", "customer_cars",
+        "order_services", "orders", "analytics",
+    )
+}
+
+
+class Dataset(NamedTuple):
+    """Диапазоны id и дат в базе — из них строятся параметры запросов."""
+
+    admin_id: int
+    ids: dict[str, tuple[int, int]]
+    employee_ids: list[int]
+    first_day: datetime
+    last_day: datetime
+
+    def pick(self, rnd: random.Random, name: str) -> int:
+        low, high = self.ids[name]
+        return rnd.randint(low, high)
+
+    def pick_day(self, rnd: random.Random) -> datetime:
+        span = max((self.last_day - self.first_day).days, 1)
+        return self.first_day + timedelta(days=rnd.randrange(span))
+
+
+class Scenario(NamedTuple):
+    name: str
+    method: str
+    # (rnd, dataset, номер запроса) -> (путь, параметры httpx.request)
+    build: Callable[[random.Random, Dataset, int], tuple[str, dict]]
+    write: bool = False
+
+
+def get(path: Callable[[random.Random, Dataset], str]):
+    return lambda rnd, data, number: (path(rnd, data), {})
+
+
+def create_order(rnd: random.Random, data: Dataset, number: int) -> tuple[str, dict]:
+    # каждый запрос в своем двухчасовом слоте далеко в будущем — без 409
+    start = datetime.now(timezone.utc).replace(minute=0, second=0, microsecond=0)
+    start += timedelta(days=3650, hours=2 * number)
+    return PREFIX["orders"], {
+        "json": {
+            "administrator_id": data.admin_id,
+            "customer_car_id": data.pick(rnd, "customer_cars"),
+            "employee_id": rnd.choice(data.employee_ids),
+            "status": 1,
+            "start_date": start.isoformat(),
+            "end_date": (start + timedelta(hours=1)).isoformat(),
+        }
+    }
+
+
+def export_day(rnd: random.Random, data: Dataset) -> str:
+    day = data.pick_day(rnd)
+    return (
+        f"{PREFIX['orders']}/export?start_from={day.date()}T00:00:00Z"
+        f"&start_to={(day + timedelta(days=1)).date()}T00:00:00Z"
+    )
+
+
+SCENARIOS = [
+    Scenario(
+        "auth.login",
+        "POST",
+        lambda rnd, data, number: (
+            PREFIX["auth"] + "/login",
+            {"data": {"username": BENCHMARK_EMAIL, "password": BENCHMARK_PASSWORD}},
+        ),
+    ),
+    Scenario("users.me", "GET", get(lambda rnd, data: PREFIX["users"] + "/me")),
+    Scenario("brands.list", "GET", get(lambda rnd, data: f"{PREFIX['brands']}?limit=20&page={rnd.randint(1, 20)}")),
+    Scenario(
+        "brands.search",
+        "GET",
+        get(lambda rnd, data: f"{PREFIX['brands']}?name=Brand {rnd.randint(1, 99)}&sort_by=relevance&limit=20"),
+    ),
+    Scenario("brands.get", "GET", get(lambda rnd, data: f"{PREFIX['brands']}/{data.pick(rnd, 'brands')}")),
+    Scenario("services.list", "GET", get(lambda rnd, data: f"{PREFIX['services']}?limit=20&sort_by=price")),
+    Scenario("services.get", "GET", get(lambda rnd, data: f"{PREFIX['services']}/{data.pick(rnd, 'services')}")),
+    Scenario("cars.list", "GET", get(lambda rnd, data: f"{PREFIX['cars']}?limit=20&page={rnd.randint(1, 20)}")),
+    Scenario(
+        "cars.search",
+        "GET",
+        get(lambda rnd, data: f"{PREFIX['cars']}?brand=Brand {rnd.randint(1, 99)}&sort_by=relevance&limit=20"),
+    ),
+    Scenario("cars.get", "GET", get(lambda rnd, data: f"{PREFIX['cars']}/car/{data.pick(rnd, 'cars')}")),
+    Scenario(
+        "customer_cars.list",
+        "GET",
+        get(lambda rnd, data: f"{PREFIX['customer_cars']}?limit=20&page={rnd.randint(1, 20)}"),
+    ),
+    Scenario(
+        "customer_cars.get",
+        "GET",
+        get(lambda rnd, data: f"{PREFIX['customer_cars']}/{data.pick(rnd, 'customer_cars')}"),
+    ),
+    Scenario(
+        "order_services.list",
+        "GET",
+        get(lambda rnd, data: f"{PREFIX['order_services']}?order_id={data.pick(rnd, 'orders')}"),
+    ),
+    Scenario(
+        "order_services.get",
+        "GET",
+        get(lambda rnd, data: f"{PREFIX['order_services']}/{data.pick(rnd, 'order_services')}"),
+    ),
+    Scenario(
+        "orders.list",
+        "GET",
+        get(lambda rnd, data: f"{PREFIX['orders']}/orders?limit=50&sort_by=start_date&order=desc"),
+    ),
+    Scenario(
+        "orders.lean",
+        "GET",
+        get(lambda rnd, data: f"{PREFIX['orders']}/orders/lean?limit=50&sort_by=start_date&order=desc"),
+    ),
+    Scenario("orders.get", "GET", get(lambda rnd, data: f"{PREFIX['orders']}/{data.pick(rnd, 'orders')}")),
+    Scenario(
+        "orders.availability",
+        "GET",
+        get(lambda rnd, data: f"{PREFIX['orders']}/availability?days=1&duration_minutes=60"),
+    ),
+    Scenario("orders.export", "GET", get(export_day)),
+    Scenario("orders.create", "POST", create_order, write=True),
+    Scenario("analytics.daily", "GET", get(lambda rnd, data: f"{PREFIX['analytics']}/revenue/daily")),
+    Scenario("analytics.services", "GET", get(lambda rnd, data: f"{PREFIX['analytics']}/revenue/services")),
+    Scenario("analytics.employees", "GET", get(lambda rnd, data: f"{PREFIX['analytics']}/revenue/employees")),
+    Scenario("analytics.hourly", "GET", get(lambda rnd, data: f"{PREFIX['analytics']}/orders/hourly")),
+]
+
+
+async def load_dataset(session: AsyncSession) -> Dataset:
+    ids = {}
+    for name, column in (
+        ("brands", Brand.id),
+        ("services", Service.id),
+        ("cars", Car.id),
+        ("customer_cars", Customer_Car.id),
+        ("orders", Order.id),
+        ("order_services", OrderService.id),
+    ):
+        low, high = (await session.execute(select(func.min(column), func.max(column)))).one()
+        ids[name] = (low or 1, high or 1)
+
+    admin_id = await session.scalar(select(func.min(User.id)).where(User.role_id == 1))
+    employee_ids = (await session.scalars(select(User.id).where(User.role_id == 2))).all()
+    first_day, last_day = (
+        await session.execute(select(func.min(Order.start_date), func.max(Order.start_date)))
+    ).one()
+    now = datetime.now(timezone.utc)
+    return Dataset(admin_id, ids, list(employee_ids), first_day or now, last_day or now)
+
+
+def parse_queries_total(metrics_text: str) -> float:
+    for line in metrics_text.splitlines():
+        if line.startswith("db_queries_total "):
+            return float(line.split()[1])
+    return 0.0
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    data: Dataset,
+    requests: int,
+    concurrency: int,
+    seed_value: int,
+    counter: list[int],
+) -> dict:
+    rnd = random.Random(f"{seed_value}:{scenario.name}")
+    # запросы строятся заранее: генерация параметров не попадает в замер
+    prepared = []
+    for _ in range(requests):
+        counter[0] += 1
+        prepared.append(scenario.build(rnd, data, counter[0]))
+
+    latencies: list[float] = []
+    statuses: dict[int, int] = {}
+    queue = iter(prepared)
+
+    async def worker() -> None:
+        for path, kwargs in queue:
+            started = time.perf_counter()
+            response = await client.request(scenario.method, path, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            statuses[response.status_code] = statuses.get(response.status_code, 0) + 1
+
+    queries_before = parse_queries_total((await client.get(settings.metrics.path)).text)
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    queries_after = parse_queries_total((await client.get(settings.metrics.path)).text)
+
+    percentiles = statistics.quantiles(latencies, n=100, method="inclusive")
+    return {
+        "requests": requests,
+        "errors": sum(count for status, count in statuses.items() if status >= 400),
+        "statuses": {str(status): count for status, count in sorted(statuses.items())},
+        "p50_ms": round(percentiles[49] * 1000, 3),
+        "p95_ms": round(percentiles[94] * 1000, 3),
+        "p99_ms": round(percentiles[98] * 1000, 3),
+        "throughput_rps": round(requests / elapsed, 1),
+        "queries_per_request": round((queries_after - queries_before) / requests, 2),
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def main(args: argparse.Namespace) -> None:
+    # core.config включает DEBUG для корневого логгера — логи драйвера искажают замеры
+    logging.getLogger().setLevel(logging.WARNING)
+
+    engine = create_async_engine(
+        args.url,
+        poolclass=TimedAsyncAdaptedQueuePool,
+        pool_size=args.concurrency,
+        max_overflow=0,
+    )
+    instrument_engine(engine)
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    async with session_factory() as session:
+        await renew_benchmark_token(session)
+        if not args.skip_analytics:
+            await refresh_analytics(session, max_days=100_000)
+        data = await load_dataset(session)
+
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+    else:
+        # приложение в этом процессе работает с базой бенчмарка
+        from main import main_app
+
+        db_helper.engine = engine
+        db_helper.session_factory = session_factory
+        # исключение приложения — это ответ 500, а не падение прогона
+        transport = httpx.ASGITransport(app=main_app, raise_app_exceptions=False)
+        base_url = "http://benchmark"
+
+    scenarios = [
+        scenario
+        for scenario in SCENARIOS
+        if (not args.scenarios or any(scenario.name.startswith(prefix) for prefix in args.scenarios))
+        and not (args.read_only and scenario.write)
+    ]
+    results = {}
+    counter = [0]
+    try:
+        async with httpx.AsyncClient(
+            transport=transport,
+            base_url=base_url,
+            headers={"Authorization": f"Bearer {BENCHMARK_TOKEN}"},
+            timeout=60,
+        ) as client:
+            print(f"{'scenario':<22}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'rps':>9}{'q/req':>7}{'err':>6}")
+            for scenario in scenarios:
+                # прогрев: кэши справочников и токена, скомпилированные запросы
+                warmup = max(args.concurrency, 2)
+                await run_scenario(client, scenario, data, warmup, args.concurrency, args.seed, counter)
+                results[scenario.name] = await run_scenario(
+                    client, scenario, data, args.requests, args.concurrency, args.seed, counter
+                )
+                result = results[scenario.name]
+                print(
+                    f"{scenario.name:<22}{result['p50_ms']:>9.2f}{result['p95_ms']:>9.2f}{result['p99_ms']:>9.2f}"
+                    f"{result['throughput_rps']:>9.1f}{result['queries_per_request']:>7.2f}{result['errors']:>6}"
+                )
+    finally:
+        await engine.dispose()
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "dialect": engine.dialect.name,
+            "base_url": args.base_url,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "seed": args.seed,
+            "python": platform.python_version(),
+            "id_ranges": data.ids,
+        },
+        "scenarios": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=DEFAULT_URL, help="URL базы, заполненной benchmarks.seed")
+    parser.add_argument("--base-url", help="адрес запущенного сервера вместо приложения в процессе")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=200, help="запросов на сценарий")
+    parser.add_argument("--scenarios", nargs="*", help="префиксы имен сценариев, например orders. brands.list")
+    parser.add_argument("--read-only", action="store_true", help="без сценариев, изменяющих данные")
+    parser.add_argument("--skip-analytics", action="store_true", help="не пересчитывать аналитику перед прогоном")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", help="файл для JSON-отчета")
+    args = parser.parse_args()
+    if args.requests < 2:
+        parser.error("--requests must be at least 2 to compute percentiles")
+    asyncio.run(main(args))
@@ -0,0 +1,129 @@
+"""
+Сравнение полного и облегченного пути списка заказов.
+
+Для каждой страницы замеряется путь от запроса к базе до готовых байт ответа:
+  full — get_orders + OrderRead.from_orm + валидация response_model + orjson;
+  lean — get_orders_lean + orjson.
+
+Запуск:
+    python -m benchmarks.order_list --orders 5000 --limit 100 --repeat 50
+"""
+import argparse
+import asyncio
+import gc
+import logging
+import statistics
+import time
+import tracemalloc
+from typing import Awaitable, Callable, List
+
+import orjson
+from pydantic import TypeAdapter
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from benchmarks.seed import DEFAULT_URL, create_schema, seed
+from core.models import User
+from core.schemas.carwash import OrderRead
+from create_fastapi_app import CustomORJSONResponse
+from crud.carwash.order import get_orders, get_orders_lean
+from crud.carwash.service_catalog import service_catalog
+
+order_list_adapter = TypeAdapter(List[OrderRead])
+
+
+async def render_full(session, user: User, limit: int, page: int) -> bytes:
+    orders, _ = await get_orders(user=user, session=session, limit=limit, page=page)
+    services = await service_catalog.get_index(session)
+    serialized = [await OrderRead.from_orm(order, services) for order in orders]
+    # Так FastAPI обрабатывает response_model=List[OrderRead]
+    content = order_list_adapter.dump_python(
+        order_list_adapter.validate_python(serialized), mode="json"
+    )
+    return CustomORJSONResponse.render(content)
+
+
+async def render_lean(session, user: User, limit: int, page: int) -> bytes:
+    orders, _ = await get_orders_lean(user=user, session=session, limit=limit, page=page)
+    return CustomORJSONResponse.render(orders)
+
+
+async def measure(
+    session_factory: async_sessionmaker,
+    render: Callable[..., Awaitable[bytes]],
+    user: User,
+    limit: int,
+    pages: int,
+    repeat: int,
+) -> dict:
+    wall, cpu = [], []
+    for i in range(repeat):
+        page = i % pages + 1
+        # Новая сессия на каждый запрос, как в приложении
+        async with session_factory() as session:
+            wall_start, cpu_start = time.perf_counter(), time.process_time()
+            await render(session, user, limit, page)
+            cpu.append(time.process_time() - cpu_start)
+            wall.append(time.perf_counter() - wall_start)
+
+    gc.collect()
+    tracemalloc.start()
+    async with session_factory() as session:
+        await render(session, user, limit, 1)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "wall_ms": statistics.median(wall) * 1000,
+        "cpu_ms": statistics.median(cpu) * 1000,
+        "peak_kib": peak / 1024,
+    }
+
+
+async def main(args: argparse.Namespace) -> None:
+    # core.config включает DEBUG для корневого логгера — логи драйвера искажают замеры
+    logging.getLogger().setLevel(logging.WARNING)
+    engine = await create_schema(args.url, drop=not args.no_seed)
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async with session_factory() as session:
+        if args.no_seed:
+            user = await session.get(User, 1)
+        else:
+            user = await seed(session, orders=args.orders)
+
+    # Оба пути должны отдавать один и тот же JSON
+    async with session_factory() as session:
+        full = orjson.loads(await render_full(session, user, args.limit, 1))
+    async with session_factory() as session:
+        lean = orjson.loads(await render_lean(session, user, args.limit, 1))
+    assert full == lean, "full и lean пути вернули разные данные"
+
+    pages = max(1, args.orders // args.limit)
+    results = {}
+    for name, render in (("full", render_full), ("lean", render_lean)):
+        # прогрев: снимок справочника услуг, кэш скомпилированных запросов
+        async with session_factory() as session:
+            await render(session, user, args.limit, 1)
+        results[name] = await measure(session_factory, render, user, args.limit, pages, args.repeat)
+
+    print(f"orders={args.orders} limit={args.limit} repeat={args.repeat}")
+    print(f"{'path':<6}{'wall ms':>10}{'cpu ms':>10}{'peak KiB':>12}")
+    for name, result in results.items():
+        print(f"{name:<6}{result['wall_ms']:>10.2f}{result['cpu_ms']:>10.2f}{result['peak_kib']:>12.1f}")
+    full, lean = results["full"], results["lean"]
+    print(
+        f"lean vs full: cpu x{full['cpu_ms'] / lean['cpu_ms']:.1f}, "
+        f"memory x{full['peak_kib'] / lean['peak_kib']:.1f}"
+    )
+
+    await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=DEFAULT_URL, help="URL базы (по умолчанию SQLite-файл)")
+    parser.add_argument("--orders", type=int, default=5000)
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    parser.add_argument("--no-seed", action="store_true", help="не пересоздавать и не заполнять базу")
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,180 @@
+"""
+Пропускная способность чтения SQLite при одном постоянном писателе.
+
+Сравниваются два режима на одном файле:
+  default — движок с настройками драйвера по умолчанию (журнал DELETE,
+            общий пул для чтения и записи, без PRAGMA);
+  tuned   — DatabaseHelper в режиме SQLite: WAL, synchronous=NORMAL, mmap,
+            busy_timeout, очередь писателей и отдельный пул чтения.
+
+Читатели в цикле запрашивают страницу списка заказов (get_orders_lean),
+каждый раз в новой сессии, как HTTP-запрос. Писатель в это время меняет
+случайные заказы, по одному UPDATE на транзакцию.
+
+Запуск:
+    python -m benchmarks.sqlite_concurrency --readers 16 --duration 10
+    python -m benchmarks.sqlite_concurrency --url sqlite+aiosqlite:///kiosk.sqlite --modes tuned
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import statistics
+import time
+
+from sqlalchemy import func, select, text, update
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from benchmarks.seed import BENCHMARK_EMAIL, SIZES, create_schema, seed
+from core.metrics import instrument_engine
+from core.models import Order, User
+from core.models.db_helper import DatabaseHelper
+from crud.carwash.order import get_orders_lean
+
+DEFAULT_URL = "sqlite+aiosqlite:///benchmark_sqlite.sqlite"
+
+
+def percentile_ms(values: list[float], percent: int) -> float:
+    if len(values) < 2:
+        return round(values[0] * 1000, 3) if values else 0.0
+    return round(statistics.quantiles(values, n=100, method="inclusive")[percent - 1] * 1000, 3)
+
+
+async def ensure_seeded(url: str, size: str) -> None:
+    path = make_url(url).database
+    if path and os.path.exists(path):
+        return
+    engine = await create_schema(url)
+    async with async_sessionmaker(engine, expire_on_commit=False)() as session:
+        await seed(session, **SIZES[size])
+    await engine.dispose()
+
+
+async def run(
+    read_factory: async_sessionmaker[AsyncSession],
+    write_factory: async_sessionmaker[AsyncSession],
+    readers: int,
+    duration: float,
+    page_limit: int,
+    seed_value: int,
+) -> dict:
+    async with read_factory() as session:
+        admin = await session.scalar(select(User).where(User.email == BENCHMARK_EMAIL))
+        max_order_id = await session.scalar(select(func.max(Order.id)))
+    # первые страницы: OFFSET на дальних страницах мерил бы сам OFFSET
+    pages = max(1, min(50, max_order_id // page_limit))
+
+    read_latencies: list[float] = []
+    write_latencies: list[float] = []
+    errors: dict[str, int] = {}
+    deadline = time.perf_counter() + duration
+
+    def record_error(exc: Exception) -> None:
+        name = str(getattr(exc, "orig", exc)) or type(exc).__name__
+        errors[name] = errors.get(name, 0) + 1
+
+    async def reader(number: int) -> None:
+        rnd = random.Random(f"{seed_value}:reader:{number}")
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with read_factory() as session:
+                    await get_orders_lean(
+                        user=admin, session=session, limit=page_limit, page=rnd.randrange(1, pages + 1)
+                    )
+            except Exception as exc:
+                record_error(exc)
+                continue
+            read_latencies.append(time.perf_counter() - started)
+
+    async def writer() -> None:
+        rnd = random.Random(f"{seed_value}:writer")
+        while time.perf_counter() < deadline:
+            started = time.perf_counter()
+            try:
+                async with write_factory() as session:
+                    await session.execute(
+                        update(Order)
+                        .where(Order.id == rnd.randrange(1, max_order_id + 1))
+                        .values(notified=~Order.notified)
+                    )
+                    await session.commit()
+            except Exception as exc:
+                record_error(exc)
+                continue
+            write_latencies.append(time.perf_counter() - started)
+            # писатель не отбирает event loop у читателей целиком
+            await asyncio.sleep(0)
+
+    await asyncio.gather(writer(), *(reader(number) for number in range(readers)))
+    return {
+        "reads_per_second": round(len(read_latencies) / duration, 1),
+        "read_p50_ms": percentile_ms(read_latencies, 50),
+        "read_p95_ms": percentile_ms(read_latencies, 95),
+        "read_p99_ms": percentile_ms(read_latencies, 99),
+        "writes_per_second": round(len(write_latencies) / duration, 1),
+        "write_p95_ms": percentile_ms(write_latencies, 95),
+        "errors": errors,
+    }
+
+
+async def run_default(args: argparse.Namespace) -> dict:
+    engine = create_async_engine(args.url)
+    instrument_engine(engine)
+    try:
+        # режим журнала хранится в файле — возвращаем значение по умолчанию
+        async with engine.connect() as connection:
+            await connection.execute(text("PRAGMA journal_mode = DELETE"))
+        session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+        return await run(
+            session_factory, session_factory, args.readers, args.duration, args.limit, args.seed
+        )
+    finally:
+        await engine.dispose()
+
+
+async def run_tuned(args: argparse.Namespace) -> dict:
+    helper = DatabaseHelper(url=args.url)
+    try:
+        await helper.warm_up(args.readers)
+        await helper.replicas.start()
+        return await run(
+            helper.replicas.pick(), helper.session_factory, args.readers, args.duration, args.limit, args.seed
+        )
+    finally:
+        await helper.dispose()
+
+
+MODES = {"default": run_default, "tuned": run_tuned}
+
+
+async def main(args: argparse.Namespace) -> None:
+    # core.config включает DEBUG для корневого логгера — логи драйвера искажают замеры
+    logging.getLogger().setLevel(logging.WARNING)
+    await ensure_seeded(args.url, args.size)
+
+    print(
+        f"{'mode':<10}{'reads/s':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}"
+        f"{'writes/s':>10}{'w p95 ms':>10}  errors"
+    )
+    for mode in args.modes:
+        result = await MODES[mode](args)
+        print(
+            f"{mode:<10}{result['reads_per_second']:>10.1f}{result['read_p50_ms']:>9.2f}"
+            f"{result['read_p95_ms']:>9.2f}{result['read_p99_ms']:>9.2f}"
+            f"{result['writes_per_second']:>10.1f}{result['write_p95_ms']:>10.2f}  {result['errors'] or '-'}"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=DEFAULT_URL, help="SQLite-файл; заполняется benchmarks.seed, если его нет")
+    parser.add_argument("--size", choices=SIZES, default="small")
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=10.0, help="секунд на режим")
+    parser.add_argument("--limit", type=int, default=20, help="заказов на странице")
+    parser.add_argument("--modes", nargs="*", choices=MODES, default=list(MODES))
+    parser.add_argument("--seed", type=int, default=42)
+    asyncio.run(main(parser.parse_args()))
@@ -0,0 +1,132 @@
+"""
+Сквозная проверка заказов через API на SQLite: создание, список, изменение
+и свободные окна работника.
+
+Даты заказа передаются с поясом +07:00. SQLite хранит их в UTC (UTCDateTime),
+и API должен вернуть тот же момент времени, а свободные окна — не пересекать
+заказ. Скрипт завершается с ошибкой на первом же расхождении.
+
+Запуск:
+    python -m benchmarks.sqlite_smoke
+    python -m benchmarks.sqlite_smoke --url sqlite+aiosqlite:///smoke.sqlite
+"""
+import argparse
+import asyncio
+import logging
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+
+import httpx
+from sqlalchemy import select, text
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from benchmarks.seed import BENCHMARK_TOKEN, create_schema, seed
+from core.config import settings
+from core.models import Customer_Car, User, db_helper
+from core.models.carwash import LOCAL_TIMEZONE
+
+ORDERS = settings.api.prefix + settings.api.v1.prefix + settings.api.v1.orders
+
+
+def check(condition: bool, message: str) -> None:
+    if not condition:
+        raise SystemExit(f"FAIL: {message}")
+    print(f"ok: {message}")
+
+
+async def main(args: argparse.Namespace) -> None:
+    logging.getLogger().setLevel(logging.WARNING)
+
+    engine = await create_schema(args.url)
+    session_factory = async_sessionmaker(engine, autoflush=False, expire_on_commit=False)
+    async with session_factory() as session:
+        admin = await seed(session, orders=200, customers=20, employees=3)
+        employee_id = await session.scalar(select(User.id).where(User.role_id == 2).order_by(User.id))
+        customer_car_id = await session.scalar(select(Customer_Car.id).order_by(Customer_Car.id))
+
+    # приложение в этом процессе работает с проверочной базой
+    from main import main_app
+
+    db_helper.engine = engine
+    db_helper.session_factory = session_factory
+
+    # заказ в будущем, на день без заказов из seed
+    day = date.today() + timedelta(days=30)
+    start = LOCAL_TIMEZONE.localize(datetime.combine(day, time(10)))
+    end = start + timedelta(hours=1)
+    try:
+        async with httpx.AsyncClient(
+            transport=httpx.ASGITransport(app=main_app, raise_app_exceptions=False),
+            base_url="http://smoke",
+            headers={"Authorization": f"Bearer {BENCHMARK_TOKEN}"},
+        ) as client:
+            response = await client.post(
+                ORDERS,
+                json={
+                    "administrator_id": admin.id,
+                    "customer_car_id": customer_car_id,
+                    "employee_id": employee_id,
+                    "start_date": start.isoformat(),
+                    "end_date": end.isoformat(),
+                },
+            )
+            check(response.status_code == 201, f"create order: {response.status_code}")
+            order_id = response.json()["id"]
+
+            async with session_factory() as session:
+                stored = await session.scalar(
+                    text("SELECT start_date FROM orders WHERE id = :id"), {"id": order_id}
+                )
+            check(stored.startswith(f"{day:%Y-%m-%d} 03:00:00"), f"stored in UTC: {stored}")
+
+            response = await client.get(f"{ORDERS}/{order_id}")
+            check(response.status_code == 200, f"get order: {response.status_code}")
+            check(
+                datetime.fromisoformat(response.json()["start_date"]) == start,
+                f"get order keeps start_date: {response.json()['start_date']}",
+            )
+
+            window = {"start_from": start.isoformat(), "start_to": end.isoformat()}
+            for path in (f"{ORDERS}/orders", f"{ORDERS}/orders/lean"):
+                response = await client.get(path, params=window)
+                check(response.status_code == 200, f"list {path}: {response.status_code}")
+                found = [order for order in response.json() if order["id"] == order_id]
+                check(
+                    len(found) == 1 and datetime.fromisoformat(found[0]["start_date"]) == start,
+                    f"list {path} returns the order at its start_date",
+                )
+
+            response = await client.patch(f"{ORDERS}/{order_id}", json={"administrator_id": admin.id})
+            check(response.status_code == 200, f"patch order: {response.status_code}")
+
+            response = await client.get(
+                f"{ORDERS}/availability",
+                params={"day": day.isoformat(), "duration_minutes": 30, "employee_id": employee_id},
+            )
+            check(response.status_code == 200, f"availability: {response.status_code}")
+            slots = [
+                (datetime.fromisoformat(slot["start"]), datetime.fromisoformat(slot["end"]))
+                for slot in response.json()[0]["slots"]
+            ]
+            check(
+                all(slot_end <= start or slot_start >= end for slot_start, slot_end in slots),
+                "availability does not overlap the order",
+            )
+            check(
+                any(slot_end == start for _, slot_end in slots)
+                and any(slot_start == end for slot_start, _ in slots),
+                "availability is free right before and after the order",
+            )
+    finally:
+        await engine.dispose()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument(
+        "--url",
+        default=f"sqlite+aiosqlite:///{os.path.join(tempfile.gettempdir(), 'carwash_smoke.sqlite')}",
+        help="URL SQLite-базы; схема пересоздается",
+    )
+    asyncio.run(main(parser.parse_args()))
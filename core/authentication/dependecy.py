@@ -26,44 +26,6 @@ def check_access(allowed_roles: List[int]):
 
 
 
-def check_order_list_access22() -> Callable[..., Awaitable[list[OrderService]]]:
-    async def dependency(
-        session: AsyncSession = Depends(db_helper.session_getter),
-        user: User = Depends(fastapi_users.current_user()),
-    ):
-        logger.info(f"User ID: {user.id}")
-
-        query = select(OrderService).join(Order).options(
-            joinedload(OrderService.order)
-        ).filter(
-            or_(
-                Order.employee_id == user.id,
-                Order.administrator_id == user.id,
-                Order.customer_car_id.in_(
-                    select(Customer_Car.id).filter(Customer_Car.customer_id == user.id)
-                ),
-            )
-        )
-
-
-
-        async with session:
-            result = await session.execute(query)
-            order_services = result.scalars().all()
-
-        for order_service in order_services:
-            logger.info(
-                f"OrderService id {order_service.id}: order_id={order_service.order.id}, "
-                f"employee_id={order_service.order.employee_id}, "
-                f"administrator_id={order_service.order.administrator_id}, "
-                f"customer_car_id={order_service.order.customer_car_id}"
-            )
-
-        return order_services
-
-    return dependency
-
-
 # async def check_order_by_id(
 #     order_id: int,
 #     session: AsyncSession = Depends(db_helper.session_getter),
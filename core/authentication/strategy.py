@@ -0,0 +1,133 @@
+import hashlib
+from datetime import datetime, timedelta, timezone
+from typing import Any, Optional
+
+from fastapi_users.authentication.strategy.db import DatabaseStrategy
+from fastapi_users.manager import BaseUserManager
+from sqlalchemy import select, inspect
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import make_transient_to_detached
+
+from core.cache import LRUCache, invalidation_bus
+from core.config import settings
+from core.models import AccessToken, User
+
+ACCESS_TOKEN_TOPIC = "access_tokens"
+
+USER_COLUMNS = tuple(attr.key for attr in inspect(User).column_attrs)
+
+
+def token_key(token: str) -> str:
+    # В кэше и в NOTIFY используется только хэш токена, не сам токен
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class AccessTokenCache:
+    """
+    Кэш token -> снимок пользователя для DatabaseStrategy.
+
+    Запись живет не дольше settings.cache.access_token_ttl и не дольше самого
+    токена. Сбрасывается при logout и при изменении пользователя (в том числе
+    в других воркерах через invalidation_bus). Отдельного индекса user ->
+    токены нет: он не знал бы о вытеснении из LRU и рос бы без ограничений,
+    а сброс по пользователю редок и просто проходит по кэшу.
+    """
+
+    def __init__(self, ttl: float, maxsize: int) -> None:
+        self.ttl = ttl
+        self._tokens: LRUCache[str, tuple[int, dict[str, Any]]] = LRUCache(maxsize)
+
+    def get(self, key: str) -> Optional[User]:
+        item = self._tokens.get(key)
+        if item is None:
+            return None
+        _, snapshot = item
+        user = User(**snapshot)
+        make_transient_to_detached(user)
+        return user
+
+    def set(self, key: str, user: User, token_expires_in: Optional[float]) -> None:
+        ttl = self.ttl if token_expires_in is None else min(self.ttl, token_expires_in)
+        snapshot = {column: getattr(user, column) for column in USER_COLUMNS}
+        self._tokens.set(key, (user.id, snapshot), ttl)
+
+    def invalidate_token(self, key: str) -> None:
+        self._tokens.pop(key)
+
+    def invalidate_user(self, user_id: int) -> None:
+        self._tokens.pop_where(lambda item: item[0] == user_id)
+
+    def clear(self) -> None:
+        self._tokens.clear()
+
+    def on_invalidation(self, key: Optional[str]) -> None:
+        if key is None:
+            self.clear()
+        elif key.startswith("user:"):
+            self.invalidate_user(int(key.removeprefix("user:")))
+        else:
+            self.invalidate_token(key)
+
+
+access_token_cache = AccessTokenCache(
+    ttl=settings.cache.access_token_ttl,
+    maxsize=settings.cache.access_token_maxsize,
+)
+invalidation_bus.subscribe(ACCESS_TOKEN_TOPIC, access_token_cache.on_invalidation)
+
+
+async def invalidate_user_tokens(session: AsyncSession, user_id: int) -> None:
+    await invalidation_bus.publish(session, ACCESS_TOKEN_TOPIC, f"user:{user_id}")
+
+
+class CachedDatabaseStrategy(DatabaseStrategy):
+    """
+    DatabaseStrategy, который для "горячих" токенов не ходит в базу, а при
+    промахе загружает токен и пользователя одним запросом.
+    """
+
+    async def read_token(
+        self,
+        token: Optional[str],
+        user_manager: BaseUserManager[User, int],
+    ) -> Optional[User]:
+        if token is None:
+            return None
+
+        key = token_key(token)
+        user = access_token_cache.get(key)
+        if user is not None:
+            return user
+
+        now = datetime.now(timezone.utc)
+        stmt = (
+            select(AccessToken.created_at, User)
+            .join(User, AccessToken.user_id == User.id)
+            .where(AccessToken.token == token)
+        )
+        if self.lifetime_seconds:
+            stmt = stmt.where(
+                AccessToken.created_at >= now - timedelta(seconds=self.lifetime_seconds)
+            )
+
+        result = await self.database.session.execute(stmt)
+        row = result.first()
+        if row is None:
+            return None
+
+        created_at, user = row
+        token_expires_in = None
+        if self.lifetime_seconds:
+            if created_at.tzinfo is None:
+                created_at = created_at.replace(tzinfo=timezone.utc)
+            expires_at = created_at + timedelta(seconds=self.lifetime_seconds)
+            token_expires_in = (expires_at - now).total_seconds()
+
+        access_token_cache.set(key, user, token_expires_in)
+        return user
+
+    async def destroy_token(self, token: str, user: User) -> None:
+        await super().destroy_token(token, user)
+        await invalidation_bus.publish(
+            self.database.session, ACCESS_TOKEN_TOPIC, token_key(token)
+        )
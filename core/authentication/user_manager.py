@@ -1,11 +1,12 @@
 import logging
-from typing import Optional, TYPE_CHECKING
+from typing import Any, Optional, TYPE_CHECKING
 
 from fastapi_users import (
     BaseUserManager,
     IntegerIDMixin,
 )
 
+from core.authentication.strategy import invalidate_user_tokens
 from core.config import settings
 from core.models import User
 
@@ -52,3 +53,34 @@ class UserManager(IntegerIDMixin, BaseUserManager[User, int]):
             user.id,
             token,
         )
+
+    # Снимок пользователя хранится в кэше токенов — после любых изменений
+    # (роль, активность, пароль, удаление) его нужно сбросить во всех воркерах
+    async def on_after_update(
+        self,
+        user: User,
+        update_dict: dict[str, Any],
+        request: Optional["Request"] = None,
+    ):
+        await invalidate_user_tokens(self.user_db.session, user.id)
+
+    async def on_after_verify(
+        self,
+        user: User,
+        request: Optional["Request"] = None,
+    ):
+        await invalidate_user_tokens(self.user_db.session, user.id)
+
+    async def on_after_reset_password(
+        self,
+        user: User,
+        request: Optional["Request"] = None,
+    ):
+        await invalidate_user_tokens(self.user_db.session, user.id)
+
+    async def on_after_delete(
+        self,
+        user: User,
+        request: Optional["Request"] = None,
+    ):
+        await invalidate_user_tokens(self.user_db.session, user.id)
@@ -0,0 +1,12 @@
+__all__ = (
+    "InvalidationBus",
+    "LRUCache",
+    "invalidation_bus",
+)
+
+from core.config import settings
+
+from .invalidation import InvalidationBus
+from .lru import LRUCache
+
+invalidation_bus = InvalidationBus(channel=settings.cache.invalidation_channel)
@@ -0,0 +1,115 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Callable, Optional
+from uuid import uuid4
+
+import orjson
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+log = logging.getLogger(__name__)
+
+Handler = Callable[[Optional[str]], None]
+
+
+class InvalidationBus:
+    """
+    Рассылка сбросов in-process кэшей между воркерами.
+
+    Каждый воркер подписывает свои кэши на темы (topic). publish() сразу
+    сбрасывает кэш в текущем процессе и, на Postgres, отправляет NOTIFY —
+    остальные воркеры получают его через LISTEN и сбрасывают свои копии.
+    На других диалектах (SQLite) шина работает только внутри процесса.
+    """
+
+    reconnect_delay: float = 1.0
+
+    def __init__(self, channel: str) -> None:
+        self.channel = channel
+        self.origin = uuid4().hex
+        self._handlers: dict[str, list[Handler]] = defaultdict(list)
+        self._listener_task: Optional[asyncio.Task] = None
+
+    def subscribe(self, topic: str, handler: Handler) -> None:
+        self._handlers[topic].append(handler)
+
+    def dispatch(self, topic: str, key: Optional[str] = None) -> None:
+        for handler in self._handlers.get(topic, ()):
+            handler(key)
+
+    def dispatch_all(self) -> None:
+        for topic in list(self._handlers):
+            self.dispatch(topic)
+
+    async def publish(
+        self,
+        session: AsyncSession,
+        topic: str,
+        key: Optional[str] = None,
+    ) -> None:
+        """
+        Вызывается после commit изменения, которое должно сбросить кэш.
+        """
+        self.dispatch(topic, key)
+
+        if session.bind.dialect.name != "postgresql":
+            return
+
+        payload = orjson.dumps(
+            {"origin": self.origin, "topic": topic, "key": key}
+        ).decode()
+        await session.execute(select(func.pg_notify(self.channel, payload)))
+        await session.commit()
+
+    async def start(self, engine: AsyncEngine) -> None:
+        if engine.dialect.name != "postgresql" or self._listener_task:
+            return
+        self._listener_task = asyncio.create_task(self._listen(engine))
+
+    async def stop(self) -> None:
+        if self._listener_task is None:
+            return
+        self._listener_task.cancel()
+        try:
+            await self._listener_task
+        except asyncio.CancelledError:
+            pass
+        self._listener_task = None
+
+    async def _listen(self, engine: AsyncEngine) -> None:
+        while True:
+            terminated = asyncio.Event()
+            try:
+                async with engine.connect() as connection:
+                    await self._subscribe_connection(connection, terminated)
+                    await terminated.wait()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                log.exception("Cache invalidation listener failed")
+
+            # Пока соединения не было, уведомления могли потеряться
+            self.dispatch_all()
+            await asyncio.sleep(self.reconnect_delay)
+
+    async def _subscribe_connection(
+        self,
+        connection: AsyncConnection,
+        terminated: asyncio.Event,
+    ) -> None:
+        raw_connection = await connection.get_raw_connection()
+        driver_connection = raw_connection.driver_connection
+        driver_connection.add_termination_listener(lambda _: terminated.set())
+        await driver_connection.add_listener(self.channel, self._on_notify)
+        log.info("Listening for cache invalidations on %r", self.channel)
+
+    def _on_notify(self, connection, pid, channel, payload: str) -> None:
+        try:
+            message = orjson.loads(payload)
+        except orjson.JSONDecodeError:
+            log.warning("Malformed cache invalidation payload: %r", payload)
+            return
+        if message.get("origin") == self.origin:
+            return
+        self.dispatch(message["topic"], message.get("key"))
@@ -1,4 +1,7 @@
-from pydantic import BaseModel
+import os
+from typing import Annotated, Optional, Union
+
+from pydantic import AnyUrl, BaseModel, UrlConstraints
 from pydantic import PostgresDsn
 from pydantic_settings import (
     BaseSettings,
@@ -25,6 +28,7 @@ class ApiV1Prefix(BaseModel):
     order_services: str = "/order_services"
     orders: str = "/orders"
     customer_cars: str = "/customer_cars"
+    analytics: str = "/analytics"
 class ApiPrefix(BaseModel):
     prefix: str = "/api"
     v1: ApiV1Prefix = ApiV1Prefix()
@@ -38,12 +42,57 @@ class ApiPrefix(BaseModel):
         return path.removeprefix("/")
 
 
+# sqlite+aiosqlite:///путь/к/файлу — режим без Postgres (киоски, тесты)
+SqliteDsn = Annotated[AnyUrl, UrlConstraints(allowed_schemes=["sqlite+aiosqlite"])]
+
+
+class SqliteConfig(BaseModel):
+    # WAL: читатели не блокируют писателя и друг друга
+    journal_mode: str = "WAL"
+    # в режиме WAL NORMAL не теряет целостность, fsync только на checkpoint
+    synchronous: str = "NORMAL"
+    mmap_size: int = 256 * 1024 * 1024
+    # кэш страниц одного соединения, КиБ
+    cache_size_kib: int = 16 * 1024
+    # ожидание блокировки другим процессом вместо немедленного database is locked
+    busy_timeout_ms: int = 5000
+    # соединения записи; запись внутри процесса все равно идет по одной
+    pool_size: int = 5
+    # соединения только для чтения (PRAGMA query_only) для GET-эндпоинтов
+    read_pool_size: int = 10
+
+
 class DatabaseConfig(BaseModel):
-    url: PostgresDsn
+    url: Union[PostgresDsn, SqliteDsn]
     echo: bool = False
     echo_pool: bool = False
     pool_size: int = 50
     max_overflow: int = 10
+    # Лимит соединений приложения с базой на все процессы: пул каждого
+    # воркера ужимается до max_connections // workers. Postgres по умолчанию
+    # принимает 100 соединений — остаток для миграций, adminer и т.п.
+    max_connections: int = 80
+    # число воркеров uvicorn; по умолчанию — WEB_CONCURRENCY, иначе 1
+    workers: Optional[int] = None
+    # столько соединений открывается при старте, чтобы первые запросы не
+    # ждали установки соединения
+    pool_warmup: int = 5
+    # Режим для PgBouncer (pool_mode = transaction): без своего пула
+    # (NullPool) и без именованных prepared statements asyncpg
+    pgbouncer: bool = False
+    # прямой адрес Postgres в обход PgBouncer — для LISTEN сброса кэшей,
+    # который в режиме transaction не работает
+    direct_url: Optional[PostgresDsn] = None
+
+    # реплики только для чтения; без них все запросы идут в primary.
+    # Для SQLite — копии файла базы, у них проверяется только доступность
+    replica_urls: list[Union[PostgresDsn, SqliteDsn]] = []
+    # реплика, отстающая сильнее, исключается до следующей проверки
+    replica_max_lag_seconds: float = 5.0
+    replica_check_interval_seconds: float = 5.0
+    # после изменяющего запроса клиент столько секунд читает из primary
+    read_your_writes_seconds: int = 10
+    read_your_writes_cookie: str = "db_primary_until"
 
     naming_convention: dict[str, str] = {
         "ix": "ix_%(column_0_label)s",
@@ -52,20 +101,88 @@ class DatabaseConfig(BaseModel):
         "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
         "pk": "pk_%(table_name)s",
     }
+    sqlite: SqliteConfig = SqliteConfig()
 
+    @property
+    def worker_count(self) -> int:
+        if self.workers:
+            return self.workers
+        # эту же переменную uvicorn берет как значение --workers по умолчанию
+        return int(os.environ.get("WEB_CONCURRENCY", 1))
 
-class DatabaseConfig_SQLITE(BaseModel):
-    url: str
-    echo: bool = False
-    # future: bool = True
-
-    naming_convention: dict[str, str] = {
-        "ix": "ix_%(column_0_label)s",
-        "uq": "uq_%(table_name)s_%(column_0_N_name)s",
-        "ck": "ck_%(table_name)s_%(constraint_name)s",
-        "fk": "fk_%(table_name)s_%(column_0_name)s_%(referred_table_name)s",
-        "pk": "pk_%(table_name)s",
-    }
+    @property
+    def pool_limits(self) -> tuple[int, int]:
+        # (pool_size, max_overflow) одного воркера в пределах max_connections
+        per_worker = max(1, self.max_connections // self.worker_count)
+        pool_size = min(self.pool_size, per_worker)
+        return pool_size, min(self.max_overflow, per_worker - pool_size)
+
+
+class CacheConfig(BaseModel):
+    service_catalog_ttl: int = 300
+    access_token_ttl: int = 60
+    access_token_maxsize: int = 10000
+    # версии справочника для ETag; сбрасываются через invalidation_bus,
+    # ttl — запасной срок, если уведомление потерялось
+    catalog_versions_ttl: int = 300
+    # канал Postgres LISTEN/NOTIFY для сброса кэшей во всех воркерах
+    invalidation_channel: str = "carwash_cache_invalidation"
+
+
+class TasksConfig(BaseModel):
+    # сколько заказов помечается выполненными за одну транзакцию
+    expired_orders_batch_size: int = 500
+    notification_batch_size: int = 100
+    # у каждого процесса Celery свой движок, задачи в нем идут по одной
+    db_pool_size: int = 2
+    # на сколько месяцев вперед держать готовые секции orders (Postgres)
+    order_partitions_months_ahead: int = 3
+    # выполненные и уведомленные заказы старше стольких дней (по end_date)
+    # переносятся в orders_archive
+    archive_after_days: int = 180
+    archive_batch_size: int = 1000
+
+
+class AnalyticsConfig(BaseModel):
+    # сколько помеченных дней пересчитывается за один запуск
+    refresh_max_days: int = 366
+    refresh_interval_minutes: int = 5
+
+
+class ScheduleConfig(BaseModel):
+    # рабочие часы мойки, местное время (Asia/Krasnoyarsk)
+    work_start_hour: int = 8
+    work_end_hour: int = 20
+    # заказы длиннее не учитываются при поиске пересечений — это ограничивает
+    # сканирование индекса (employee_id, start_date)
+    max_order_hours: int = 24
+    max_days: int = 7
+
+
+class ExportConfig(BaseModel):
+    # сколько заказов читается с серверного курсора и отдается клиенту за раз
+    batch_size: int = 1000
+
+
+class QueryBudgetConfig(BaseModel):
+    # Режим поиска N+1: считает SQL-запросы каждого HTTP-запроса и задачи
+    # Celery и пишет в лог их отпечатки, если бюджет превышен. Для тестов и
+    # staging, в проде выключен — хранит тексты всех запросов.
+    enabled: bool = False
+    default: int = 30
+    # "GET /api/v1/orders/{order_id}" или имя корутины задачи -> лимит
+    routes: dict[str, int] = {}
+    # столько одинаковых запросов за один HTTP-запрос или задачу — признак N+1
+    repeat_threshold: int = 5
+    # бросать QueryBudgetExceeded (в тестах запрос упадет)
+    raise_on_exceed: bool = False
+
+
+class MetricsConfig(BaseModel):
+    # /metrics в формате Prometheus; отдается без авторизации, закрывать снаружи
+    enabled: bool = True
+    path: str = "/metrics"
+    query_budget: QueryBudgetConfig = QueryBudgetConfig()
 
 
 class AccessToken(BaseModel):
@@ -84,6 +201,12 @@ class Settings(BaseSettings):
     run: RunConfig = RunConfig()
     api: ApiPrefix = ApiPrefix()
     db: DatabaseConfig
+    cache: CacheConfig = CacheConfig()
+    tasks: TasksConfig = TasksConfig()
+    export: ExportConfig = ExportConfig()
+    analytics: AnalyticsConfig = AnalyticsConfig()
+    schedule: ScheduleConfig = ScheduleConfig()
+    metrics: MetricsConfig = MetricsConfig()
     access_token: AccessToken
     from_email: str
     to_email: str
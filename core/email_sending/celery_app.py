@@ -2,6 +2,8 @@ from celery import Celery
 from celery.schedules import crontab
 import logging
 
+from core.config import settings
+
 # Инициализация Celery с брокером памяти
 celery_app = Celery('tasks', broker='memory://')  # Брокер памяти
 # celery_app.autodiscover_tasks(['smtp.tasks'])
@@ -29,6 +31,18 @@ celery_app.conf.beat_schedule = {
         "task": "tasks.update_expired_orders_status",
         "schedule": crontab(minute="*/1"),
     },
+    "refresh-analytics": {
+        "task": "tasks.refresh_analytics",
+        "schedule": crontab(minute=f"*/{settings.analytics.refresh_interval_minutes}"),
+    },
+    "ensure-order-partitions": {
+        "task": "tasks.ensure_order_partitions",
+        "schedule": crontab(minute="0", hour="3"),
+    },
+    "archive-orders": {
+        "task": "tasks.archive_orders",
+        "schedule": crontab(minute="30", hour="3"),
+    },
 
 }
 
@@ -1,6 +1,9 @@
+import asyncio
 from datetime import datetime
+from typing import Optional
+
 from sqlalchemy.orm import Session
-from smtplib import SMTP
+from smtplib import SMTP, SMTPException, SMTPServerDisconnected
 from email.mime.text import MIMEText
 from dotenv import load_dotenv
 import os
@@ -29,3 +32,107 @@ def send_email(to_email, subject, body):
     except Exception as e:
         print(f"Ошибка отправки на почту: {e}")
 
+
+def build_message(to_email, subject, body) -> MIMEText:
+    msg = MIMEText(body, "plain")
+    msg["Subject"] = subject
+    msg["From"] = os.getenv("FROM_EMAIL")
+    # TO_EMAIL, как и в send_email, перенаправляет все письма на один адрес
+    msg["To"] = os.getenv("TO_EMAIL") or to_email
+    return msg
+
+
+def _env_flag(name: str, default: bool = True) -> bool:
+    value = os.getenv(name)
+    if value is None or not value.strip():
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off")
+
+
+class SMTPConnectionPool:
+    """
+    Пул SMTP-соединений для пакетной рассылки.
+
+    smtplib синхронный, поэтому подключение и отправка выполняются в потоках,
+    а число одновременных отправок ограничено размером пула. Открытое
+    соединение (STARTTLS + login) переиспользуется для следующих писем.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        size: int = 4,
+        starttls: bool = True,
+        timeout: float = 30,
+    ) -> None:
+        self.host = host
+        self.port = port
+        self.username = username
+        self.password = password
+        self.size = size
+        self.starttls = starttls
+        self.timeout = timeout
+        self._idle: list[SMTP] = []
+        self._semaphore = asyncio.Semaphore(size)
+
+    @classmethod
+    def from_env(cls) -> "SMTPConnectionPool":
+        # SMTP_STARTTLS=false и SMTP_AUTH=false — для локального сервера без
+        # TLS и входа (например, aiosmtpd)
+        auth = _env_flag("SMTP_AUTH")
+        return cls(
+            host=os.getenv("SMTP_SERVER", "smtp.gmail.com"),
+            port=int(os.getenv("SMTP_PORT", "587")),
+            username=os.getenv("FROM_EMAIL") if auth else None,
+            password=os.getenv("SMTP_PASSWORD") if auth else None,
+            size=int(os.getenv("SMTP_POOL_SIZE", "4")),
+            starttls=_env_flag("SMTP_STARTTLS"),
+        )
+
+    def _connect(self) -> SMTP:
+        server = SMTP(self.host, self.port, timeout=self.timeout)
+        if self.starttls:
+            server.starttls()
+        if self.username and self.password:
+            server.login(self.username, self.password)
+        return server
+
+    @staticmethod
+    def _close(server: SMTP) -> None:
+        try:
+            server.quit()
+        except (SMTPException, OSError):
+            server.close()
+
+    async def send(self, message: MIMEText) -> None:
+        async with self._semaphore:
+            # Соединение из пула могло быть закрыто сервером по таймауту —
+            # в этом случае один раз переподключаемся
+            for attempt in range(2):
+                server = self._idle.pop() if self._idle else await asyncio.to_thread(self._connect)
+                try:
+                    await asyncio.to_thread(server.send_message, message)
+                except SMTPServerDisconnected:
+                    server.close()
+                    if attempt:
+                        raise
+                    continue
+                except BaseException:
+                    await asyncio.to_thread(self._close, server)
+                    raise
+                self._idle.append(server)
+                return
+
+    async def close(self) -> None:
+        idle, self._idle = self._idle, []
+        for server in idle:
+            await asyncio.to_thread(self._close, server)
+
+    async def __aenter__(self) -> "SMTPConnectionPool":
+        return self
+
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
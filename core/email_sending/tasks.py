@@ -1,17 +1,25 @@
 
 import logging
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
+from typing import Optional
 
 import pytz
-from sqlalchemy import select
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 from celery import chain
 
 import asyncio
 from sqlalchemy.orm import aliased
 from .celery_app import celery_app
 
-from core.email_sending.send_email import send_email
+from core.config import settings
+from core.email_sending.send_email import send_email, build_message, SMTPConnectionPool
+from core.email_sending.worker import worker_runtime
 from ..models import Order, User, db_helper, Customer_Car
+from ..models.db_helper import DatabaseHelper
+from crud.carwash.analytics import refresh_analytics as refresh_analytics_days
+from crud.carwash.partitions import ensure_order_partitions as ensure_order_partitions_ahead
+from crud.carwash.archive import archive_orders as archive_old_orders
 
 # tasks.py
 # celery_app.config_from_object('celery_app')
@@ -25,67 +33,170 @@ logger.setLevel(logging.DEBUG)
 
 @celery_app.task
 def update_expired_orders_status():
-    asyncio.run(update_expired_orders_status_async())
+    worker_runtime.run(
+        update_expired_orders_status_async(worker_runtime.db, worker_runtime.smtp_pool)
+    )
+
+
+async def mark_expired_orders(session: AsyncSession, now: datetime, batch_size: int) -> list[int]:
+    """
+    Переводит в статус 0 заказы, у которых end_date уже прошел.
+
+    Работает пачками по batch_size с коммитом после каждой, поэтому не держит
+    длинную транзакцию и продолжает с того же места после сбоя. Выборку
+    обслуживает частичный индекс ix_orders_pending_end_date.
+    """
+    expired_ids = []
+    while True:
+        batch = (
+            select(Order.id)
+            # start_date <= end_date: условие отсекает секции будущих месяцев
+            .where(Order.status != 0, Order.end_date < now, Order.start_date < now)
+            .order_by(Order.end_date)
+            .limit(batch_size)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(Order)
+            .where(Order.id.in_(batch.scalar_subquery()))
+            .values(status=0)
+            .returning(Order.id)
+            .execution_options(synchronize_session=False)
+        )
+        result = await session.execute(stmt)
+        ids = result.scalars().all()
+        await session.commit()
 
+        expired_ids.extend(ids)
+        if len(ids) < batch_size:
+            return expired_ids
 
-async def update_expired_orders_status_async():
-    async for session in db_helper.session_getter():
+
+async def update_expired_orders_status_async(
+    db: DatabaseHelper = db_helper,
+    smtp_pool: Optional[SMTPConnectionPool] = None,
+):
+    async for session in db.session_getter():
         krasnoyarsk_tz = pytz.timezone("Asia/Krasnoyarsk")
         now = datetime.now(krasnoyarsk_tz)
 
-        result = await session.execute(select(Order))
-        expired_orders = result.scalars().all()
-
         logger.debug(f"Дата и время: {now}, Часовой пояс: {krasnoyarsk_tz}")
 
+        expired_ids = await mark_expired_orders(
+            session, now, settings.tasks.expired_orders_batch_size
+        )
+        logger.debug(f"Статус {len(expired_ids)} заказов обновлен на 0.")
 
-        # logger.debug(f"Found {len(expired_orders)} expired orders.")
-
-        for order in expired_orders:
-            if not order.notified:
-                order.status = 0
-                session.add(order)
-                logger.debug(f"Статус заказ {order.id} обновлен на 0.")
+        if smtp_pool is None:
+            async with SMTPConnectionPool.from_env() as smtp_pool:
+                notified = await notify_completed_orders(
+                    session, smtp_pool, settings.tasks.notification_batch_size
+                )
+        else:
+            notified = await notify_completed_orders(
+                session, smtp_pool, settings.tasks.notification_batch_size
+            )
+        logger.debug(f"Отправлено {notified} уведомлений о выполненных заказах.")
+
+
+async def notify_completed_orders(
+    session: AsyncSession,
+    smtp_pool: SMTPConnectionPool,
+    batch_size: int,
+) -> int:
+    """
+    Рассылает письма о выполненных заказах и помечает их notified.
+
+    Получатели каждой пачки выбираются одним запросом, письма уходят
+    параллельно через пул SMTP-соединений, флаги notified коммитятся пачкой.
+    Клиентам с is_send_notify = False письмо не отправляется, но заказ тоже
+    помечается, чтобы не выбирать его снова. Заказы, письмо по которым не
+    ушло, остаются для следующего запуска.
+    """
+    sent = 0
+    last_id = 0
+    while True:
+        result = await session.execute(
+            select(Order.id, User.email, User.first_name, User.is_send_notify)
+            .join(Customer_Car, Order.customer_car_id == Customer_Car.id)
+            .join(User, Customer_Car.customer_id == User.id)
+            .where(Order.status == 0, Order.notified == False, Order.id > last_id)
+            .order_by(Order.id)
+            .limit(batch_size)
+        )
+        rows = result.all()
+        if not rows:
+            return sent
+
+        recipients = [row for row in rows if row.is_send_notify]
+        outcomes = await asyncio.gather(
+            *(send_order_completed_email(smtp_pool, row) for row in recipients),
+            return_exceptions=True,
+        )
 
+        done_ids = [row.id for row in rows if not row.is_send_notify]
+        for row, outcome in zip(recipients, outcomes):
+            if isinstance(outcome, BaseException):
+                logger.error(f"Ошибка отправки на почту по заказу {row.id}: {outcome}")
+                continue
+            done_ids.append(row.id)
+            sent += 1
+
+        if done_ids:
+            await session.execute(
+                update(Order)
+                .where(Order.id.in_(done_ids))
+                .values(notified=True)
+                .execution_options(synchronize_session=False)
+            )
         await session.commit()
 
-        # krasnoyarsk_tz = pytz.timezone("Asia/Krasnoyarsk")
-        # now = datetime.now(krasnoyarsk_tz)
+        last_id = rows[-1].id
+        if len(rows) < batch_size:
+            return sent
 
 
-        result = await session.execute(
-            select(Order).filter(Order.status == 0, Order.notified == False)
-        )
-        expired_orders = result.scalars().all()
-        logger.debug(f"Найдено {len(expired_orders)} истекших заказов.")
+async def send_order_completed_email(smtp_pool: SMTPConnectionPool, row) -> None:
+    logger.debug(f"Пишем юзеру {row.email} о заказе {row.id}")
 
+    subject = "Ваш заказ бал выполнен"
+    body = f"Уважаемый {row.first_name},\n\n Ваш заказ под номером {row.id} выполнен. Как все прошло?.\n\n До встречи,\n SLAY Entartainment"
 
-        for order in expired_orders:
-            customer_car = await session.execute(
-                select(Customer_Car).filter(Customer_Car.id == order.customer_car_id)
-            )
-            customer_car = customer_car.scalar_one_or_none()
+    await smtp_pool.send(build_message(row.email, subject, body))
 
-            if customer_car:
 
-                user = await session.execute(
-                    select(User).filter(User.id == customer_car.customer_id)
-                )
-                user = user.scalar_one_or_none()
+@celery_app.task(name="tasks.refresh_analytics")
+def refresh_analytics():
+    worker_runtime.run(refresh_analytics_async(worker_runtime.db))
 
-                if user:
-                    logger.debug(f"Пишем юзеру {user.email} о заказе {order.id}")
 
-                    subject = "Ваш заказ бал выполнен"
-                    body = f"Уважаемый {user.first_name},\n\n Ваш заказ под номером {order.id} выполнен. Как все прошло?.\n\n До встречи,\n SLAY Entartainment"
+async def refresh_analytics_async(db: DatabaseHelper = db_helper) -> None:
+    async for session in db.session_getter():
+        refreshed = await refresh_analytics_days(session, max_days=settings.analytics.refresh_max_days)
+        logger.debug(f"Аналитика пересчитана за {len(refreshed)} дн.")
+
+
+@celery_app.task(name="tasks.ensure_order_partitions")
+def ensure_order_partitions():
+    worker_runtime.run(ensure_order_partitions_async(worker_runtime.db))
+
+
+async def ensure_order_partitions_async(db: DatabaseHelper = db_helper) -> None:
+    async for session in db.session_getter():
+        created = await ensure_order_partitions_ahead(
+            session, months_ahead=settings.tasks.order_partitions_months_ahead
+        )
+        if created:
+            logger.info(f"Созданы секции orders: {', '.join(created)}")
 
-                    send_email(user.email, subject, body)
 
-                    order.notified = True
-                    await session.commit()
-                else:
-                    logger.debug(f"Нет пользователя для машины {customer_car.id}")
-            else:
-                logger.debug(f"Нет машины для заказа {order.id}")
+@celery_app.task(name="tasks.archive_orders")
+def archive_orders():
+    worker_runtime.run(archive_orders_async(worker_runtime.db))
 
 
+async def archive_orders_async(db: DatabaseHelper = db_helper) -> None:
+    async for session in db.session_getter():
+        before = datetime.now(timezone.utc) - timedelta(days=settings.tasks.archive_after_days)
+        archived = await archive_old_orders(session, before, settings.tasks.archive_batch_size)
+        logger.info(f"В архив перенесено {archived} заказов, завершенных до {before}")
@@ -0,0 +1,98 @@
+import asyncio
+import logging
+from contextlib import nullcontext
+from typing import Awaitable, Optional, TypeVar
+
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
+
+from core.config import settings
+from core.email_sending.send_email import SMTPConnectionPool
+from core.metrics import query_budget, query_budget_checker
+from core.models.db_helper import DatabaseHelper
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class WorkerRuntime:
+    """
+    Ресурсы одного процесса Celery: постоянный event loop, собственный
+    движок SQLAlchemy и пул SMTP-соединений.
+
+    Все асинхронные задачи процесса выполняются в этом loop, поэтому
+    соединения пула остаются привязаны к нему и переиспользуются между
+    задачами. В prefork-пуле создается в worker_process_init (после fork),
+    в solo-пуле — лениво при первой задаче.
+    """
+
+    def __init__(self) -> None:
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._db: Optional[DatabaseHelper] = None
+        self._smtp_pool: Optional[SMTPConnectionPool] = None
+
+    def start(self) -> None:
+        if self._loop is not None:
+            return
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._db = DatabaseHelper(
+            url=str(settings.db.url),
+            echo=settings.db.echo,
+            echo_pool=settings.db.echo_pool,
+            pool_size=settings.tasks.db_pool_size,
+            max_overflow=0,
+            pgbouncer=settings.db.pgbouncer,
+        )
+        self._smtp_pool = SMTPConnectionPool.from_env()
+        logger.debug("Worker runtime started")
+
+    @property
+    def db(self) -> DatabaseHelper:
+        self.start()
+        return self._db
+
+    @property
+    def smtp_pool(self) -> SMTPConnectionPool:
+        self.start()
+        return self._smtp_pool
+
+    def run(self, coro: Awaitable[T]) -> T:
+        self.start()
+        # Задача выполняется в копии текущего контекста, поэтому счетчик
+        # запросов, выставленный здесь, виден внутри нее
+        budget = query_budget(coro.__name__) if query_budget_checker.enabled else nullcontext()
+        with budget:
+            return self._loop.run_until_complete(coro)
+
+    async def _shutdown(self) -> None:
+        await self._smtp_pool.close()
+        await self._db.dispose()
+        await self._loop.shutdown_asyncgens()
+        # Даем драйверам и пулу потоков доставить последние колбэки в loop
+        await self._loop.shutdown_default_executor()
+        await asyncio.sleep(0)
+
+    def stop(self) -> None:
+        if self._loop is None:
+            return
+        try:
+            self._loop.run_until_complete(self._shutdown())
+        finally:
+            self._loop.close()
+            self._loop = self._db = self._smtp_pool = None
+            logger.debug("Worker runtime stopped")
+
+
+worker_runtime = WorkerRuntime()
+
+
+@worker_process_init.connect
+def start_worker_runtime(**kwargs) -> None:
+    worker_runtime.start()
+
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def stop_worker_runtime(**kwargs) -> None:
+    worker_runtime.stop()
@@ -0,0 +1,16 @@
+__all__ = (
+    "MetricsMiddleware",
+    "QueryBudgetExceeded",
+    "TimedAsyncAdaptedQueuePool",
+    "fingerprint",
+    "instrument_engine",
+    "query_budget",
+    "query_budget_checker",
+    "register_pool_stats",
+    "registry",
+)
+
+from .budget import QueryBudgetExceeded, fingerprint, query_budget, query_budget_checker
+from .database import TimedAsyncAdaptedQueuePool, instrument_engine, register_pool_stats
+from .instruments import registry
+from .middleware import MetricsMiddleware
@@ -0,0 +1,105 @@
+import logging
+import re
+from collections import Counter
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+from core.config import QueryBudgetConfig, settings
+
+from .instruments import RequestStats, current_request
+
+log = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+# $1 (asyncpg) и ? (sqlite) приводятся к одному виду
+_NUMBERED_PARAM = re.compile(r"\$\d+")
+# IN (?, ?, ?) и одна строка VALUES (?, ?) -> (?)
+_PARAM_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)*\s*\)")
+# многострочный VALUES (?), (?), (?) -> (?)
+_ROW_LIST = re.compile(r"\(\?\)(?:\s*,\s*\(\?\))+")
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+def fingerprint(statement: str) -> str:
+    """
+    Отпечаток SQL: запросы, отличающиеся только числом параметров в IN или
+    строк в VALUES, совпадают.
+    """
+    statement = _WHITESPACE.sub(" ", statement).strip()
+    statement = _NUMBERED_PARAM.sub("?", statement)
+    statement = _PARAM_LIST.sub("(?)", statement)
+    return _ROW_LIST.sub("(?)", statement)
+
+
+class QueryBudget:
+    def __init__(self, config: QueryBudgetConfig) -> None:
+        self.config = config
+
+    @property
+    def enabled(self) -> bool:
+        return self.config.enabled
+
+    def limit_for(self, name: str) -> int:
+        return self.config.routes.get(name, self.config.default)
+
+    def check(
+        self,
+        name: str,
+        stats: RequestStats,
+        limit: Optional[int] = None,
+        raise_on_exceed: Optional[bool] = None,
+    ) -> None:
+        """
+        Пишет в лог самые частые отпечатки, если запросов больше лимита или
+        один и тот же запрос повторился repeat_threshold раз (N+1).
+        Превышение лимита в строгом режиме — QueryBudgetExceeded.
+        """
+        limit = self.limit_for(name) if limit is None else limit
+        counts = Counter(map(fingerprint, stats.statements or ()))
+        top = counts.most_common(10)
+        exceeded = stats.queries > limit
+        repeated = bool(top) and top[0][1] >= self.config.repeat_threshold
+        if not exceeded and not repeated:
+            return
+
+        report = "\n".join(f"{count:>5} x {statement}" for statement, count in top)
+        if exceeded:
+            log.warning("%s: %d SQL-запросов при бюджете %d\n%s", name, stats.queries, limit, report)
+        else:
+            log.warning("%s: повторяющиеся SQL-запросы (возможно, N+1)\n%s", name, report)
+
+        if raise_on_exceed is None:
+            raise_on_exceed = self.config.raise_on_exceed
+        if exceeded and raise_on_exceed:
+            raise QueryBudgetExceeded(
+                f"{name}: {stats.queries} SQL queries, budget {limit}\n{report}"
+            )
+
+
+query_budget_checker = QueryBudget(settings.metrics.query_budget)
+
+
+@contextmanager
+def query_budget(
+    name: str,
+    limit: Optional[int] = None,
+    raise_on_exceed: Optional[bool] = None,
+) -> Iterator[RequestStats]:
+    """
+    Считает SQL-запросы внутри блока (в том же контексте asyncio) и
+    проверяет бюджет на выходе. Для задач Celery и тестов:
+
+        with query_budget("create_order_services", limit=6, raise_on_exceed=True):
+            await create_order_services(session, data)
+    """
+    stats = RequestStats()
+    stats.statements = []
+    token = current_request.set(stats)
+    try:
+        yield stats
+    finally:
+        current_request.reset(token)
+    query_budget_checker.check(name, stats, limit, raise_on_exceed)
@@ -0,0 +1,87 @@
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from .instruments import (
+    current_request,
+    db_pool_checked_out,
+    db_pool_overflow,
+    db_pool_overflow_limit,
+    db_pool_size,
+    db_pool_wait,
+    db_queries,
+    db_query_duration,
+    registry,
+)
+
+_db_queries = db_queries.labels()
+_db_query_duration = db_query_duration.labels()
+_db_pool_wait = db_pool_wait.labels()
+
+
+class TimedAsyncAdaptedQueuePool(AsyncAdaptedQueuePool):
+    """
+    Пул, который замеряет ожидание свободного соединения. У пула нет события
+    «перед выдачей», поэтому время снимается вокруг _do_get.
+    """
+
+    def _do_get(self):
+        started = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = perf_counter() - started
+            _db_pool_wait.observe(elapsed)
+            stats = current_request.get()
+            if stats is not None:
+                stats.pool_wait_seconds += elapsed
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    context._metrics_started = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - context._metrics_started
+    _db_queries.inc()
+    _db_query_duration.observe(elapsed)
+    stats = current_request.get()
+    if stats is not None:
+        stats.queries += 1
+        stats.db_seconds += elapsed
+        if stats.statements is not None:
+            stats.statements.append(statement)
+
+
+def instrument_engine(engine: AsyncEngine) -> None:
+    """Подписывает движок на учет SQL-запросов (число и время)."""
+    sync_engine = engine.sync_engine
+    if event.contains(sync_engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def register_pool_stats(engine: AsyncEngine, name: str) -> None:
+    """
+    Показывает состояние пула движка в /metrics с меткой pool=name.
+    NullPool (режим PgBouncer) соединения не хранит — его пропускаем.
+    """
+    pool = engine.sync_engine.pool
+    if not isinstance(pool, AsyncAdaptedQueuePool):
+        return
+
+    size = db_pool_size.labels(pool=name)
+    checked_out = db_pool_checked_out.labels(pool=name)
+    overflow = db_pool_overflow.labels(pool=name)
+    overflow_limit = db_pool_overflow_limit.labels(pool=name)
+
+    def collect() -> None:
+        size.set(pool.size())
+        checked_out.set(pool.checkedout())
+        overflow.set(pool.overflow())
+        overflow_limit.set(pool._max_overflow)
+
+    registry.add_collector(collect)
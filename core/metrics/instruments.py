@@ -0,0 +1,52 @@
+from contextvars import ContextVar
+from typing import Optional
+
+from .prometheus import LATENCY_BUCKETS, QUERY_COUNT_BUCKETS, Registry
+
+registry = Registry()
+
+http_requests = registry.counter(
+    "http_requests_total", "Число HTTP-запросов по маршруту, методу и статусу."
+)
+http_duration = registry.histogram(
+    "http_request_duration_seconds", "Время обработки запроса.", LATENCY_BUCKETS
+)
+http_db_queries = registry.histogram(
+    "http_request_db_queries", "Число SQL-запросов на один HTTP-запрос.", QUERY_COUNT_BUCKETS
+)
+http_db_seconds = registry.counter(
+    "http_request_db_seconds_total", "Суммарное время SQL-запросов маршрута."
+)
+http_pool_wait_seconds = registry.counter(
+    "http_request_pool_wait_seconds_total", "Суммарное ожидание соединения из пула маршрутом."
+)
+
+db_queries = registry.counter("db_queries_total", "Все SQL-запросы процесса.")
+db_query_duration = registry.histogram(
+    "db_query_duration_seconds", "Время выполнения SQL-запроса.", LATENCY_BUCKETS
+)
+db_pool_wait = registry.histogram(
+    "db_pool_checkout_wait_seconds", "Ожидание соединения из пула.", LATENCY_BUCKETS
+)
+db_pool_size = registry.gauge("db_pool_size", "Постоянный размер пула соединений.")
+db_pool_checked_out = registry.gauge("db_pool_checked_out", "Соединения, выданные из пула.")
+db_pool_overflow = registry.gauge(
+    "db_pool_overflow", "Соединения сверх pool_size (отрицательно — пул еще не заполнен)."
+)
+db_pool_overflow_limit = registry.gauge("db_pool_overflow_limit", "Значение max_overflow пула.")
+
+
+class RequestStats:
+    """Счетчики текущего HTTP-запроса; единственный объект на запрос."""
+
+    __slots__ = ("queries", "db_seconds", "pool_wait_seconds", "statements")
+
+    def __init__(self) -> None:
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.pool_wait_seconds = 0.0
+        # тексты запросов собираются только в режиме бюджета запросов
+        self.statements: Optional[list[str]] = None
+
+
+current_request: ContextVar[Optional[RequestStats]] = ContextVar("metrics_request", default=None)
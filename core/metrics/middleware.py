@@ -0,0 +1,89 @@
+from time import perf_counter
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .budget import query_budget_checker
+from .instruments import (
+    RequestStats,
+    current_request,
+    http_db_queries,
+    http_db_seconds,
+    http_duration,
+    http_pool_wait_seconds,
+    http_requests,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+
+class _RouteMetrics:
+    __slots__ = ("duration", "queries", "db_seconds", "pool_wait", "responses", "method", "route")
+
+    def __init__(self, method: str, route: str) -> None:
+        self.method = method
+        self.route = route
+        self.duration = http_duration.labels(method=method, route=route)
+        self.queries = http_db_queries.labels(method=method, route=route)
+        self.db_seconds = http_db_seconds.labels(method=method, route=route)
+        self.pool_wait = http_pool_wait_seconds.labels(method=method, route=route)
+        self.responses = {}
+
+    def record(self, status: int, elapsed: float, stats: RequestStats) -> None:
+        counter = self.responses.get(status)
+        if counter is None:
+            counter = self.responses[status] = http_requests.labels(
+                method=self.method, route=self.route, status=str(status)
+            )
+        counter.inc()
+        self.duration.observe(elapsed)
+        self.queries.observe(stats.queries)
+        self.db_seconds.inc(stats.db_seconds)
+        self.pool_wait.inc(stats.pool_wait_seconds)
+
+
+class MetricsMiddleware:
+    """
+    ASGI-middleware: время ответа, число и время SQL-запросов по маршруту.
+
+    Метка route — шаблон пути (/orders/{order_id}), а не сам URL, чтобы
+    число серий не росло. Счетчики маршрута создаются при первом запросе
+    к нему и дальше переиспользуются.
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+        self._routes: dict[tuple[str, str], _RouteMetrics] = {}
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        if query_budget_checker.enabled:
+            stats.statements = []
+        token = current_request.set(stats)
+        status = 500
+        started = perf_counter()
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = perf_counter() - started
+            current_request.reset(token)
+            # маршрут роутер записывает в тот же scope после сопоставления
+            route = scope.get("route")
+            key = (scope["method"], getattr(route, "path", UNMATCHED_ROUTE))
+            metrics = self._routes.get(key)
+            if metrics is None:
+                metrics = self._routes[key] = _RouteMetrics(*key)
+            metrics.record(status, elapsed, stats)
+
+        if stats.statements is not None:
+            query_budget_checker.check(f"{key[0]} {key[1]}", stats)
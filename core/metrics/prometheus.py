@@ -0,0 +1,135 @@
+from bisect import bisect_left
+from typing import Callable, Iterable, Iterator, Sequence
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels: Labels, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in labels]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_number(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class Gauge:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+
+class Histogram:
+    """
+    Гистограмма с фиксированными границами. observe() — один bisect и три
+    сложения; накопительные значения считаются только при выводе.
+    """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds: Sequence[float]) -> None:
+        self.bounds = tuple(bounds)
+        # последняя ячейка — значения больше последней границы (+Inf)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class Family:
+    """
+    Метрика с набором меток. Дочерние счетчики создаются один раз на
+    комбинацию меток (маршрут, метод) и дальше переиспользуются.
+    """
+
+    def __init__(self, name: str, help_text: str, kind: str, factory) -> None:
+        self.name = name
+        self.help_text = help_text
+        self.kind = kind
+        self._factory = factory
+        self._children: dict[Labels, object] = {}
+
+    def labels(self, **labels: str):
+        key = tuple(labels.items())
+        child = self._children.get(key)
+        if child is None:
+            child = self._children[key] = self._factory()
+        return child
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help_text}"
+        yield f"# TYPE {self.name} {self.kind}"
+        for labels, child in self._children.items():
+            if isinstance(child, Histogram):
+                cumulative = 0
+                for bound, count in zip((*child.bounds, float("inf")), child.counts):
+                    cumulative += count
+                    le = 'le="' + _format_number(bound) + '"'
+                    yield f"{self.name}_bucket{_format_labels(labels, le)} {cumulative}"
+                yield f"{self.name}_sum{_format_labels(labels)} {_format_number(child.sum)}"
+                yield f"{self.name}_count{_format_labels(labels)} {child.count}"
+            else:
+                yield f"{self.name}{_format_labels(labels)} {_format_number(child.value)}"
+
+
+class Registry:
+    def __init__(self) -> None:
+        self._families: list[Family] = []
+        self._collectors: list[Callable[[], None]] = []
+
+    def counter(self, name: str, help_text: str) -> Family:
+        return self._add(Family(name, help_text, "counter", Counter))
+
+    def gauge(self, name: str, help_text: str) -> Family:
+        return self._add(Family(name, help_text, "gauge", Gauge))
+
+    def histogram(self, name: str, help_text: str, bounds: Iterable[float]) -> Family:
+        bounds = tuple(bounds)
+        return self._add(Family(name, help_text, "histogram", lambda: Histogram(bounds)))
+
+    def _add(self, family: Family) -> Family:
+        self._families.append(family)
+        return family
+
+    def add_collector(self, collector: Callable[[], None]) -> None:
+        # обновляет значения (обычно gauge) непосредственно перед выводом
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        """Текстовый формат Prometheus (text/plain; version=0.0.4)."""
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for family in self._families:
+            lines.extend(family.render())
+        lines.append("")
+        return "\n".join(lines)
@@ -8,11 +8,27 @@ __all__ = (
     "Customer_Car",
     "Service",
     "OrderService",
-    "Order"
+    "Order",
+    "CatalogVersion",
+    "AnalyticsDirtyDay",
+    "AnalyticsDaily",
+    "AnalyticsDailyService",
+    "AnalyticsDailyEmployee",
+    "AnalyticsHourly",
+    "OrderArchive",
+    "OrderServiceArchive",
 )
 
 from .db_helper import db_helper
 from .base import Base
 from .users import User
 from .access_token import AccessToken
-from .carwash import Brand, Car, Customer_Car, Service, OrderService, Order
+from .carwash import Brand, Car, Customer_Car, Service, OrderService, Order, CatalogVersion
+from .analytics import (
+    AnalyticsDirtyDay,
+    AnalyticsDaily,
+    AnalyticsDailyService,
+    AnalyticsDailyEmployee,
+    AnalyticsHourly,
+)
+from .archive import OrderArchive, OrderServiceArchive
@@ -0,0 +1,46 @@
+from sqlalchemy import Column, Date, ForeignKey, Integer, func
+
+from .base import Base, UTCDateTime
+
+
+# Аналитика считается по дням (местное время Красноярска) в предагрегированных
+# таблицах. Изменения заказов помечают день в analytics_dirty_days, а
+# refresh_analytics пересчитывает только помеченные дни.
+
+
+class AnalyticsDirtyDay(Base):
+    __tablename__ = "analytics_dirty_days"
+    day = Column(Date, primary_key=True)
+    marked_at = Column(UTCDateTime, nullable=False, server_default=func.now())
+
+
+class AnalyticsDaily(Base):
+    __tablename__ = "analytics_daily"
+    day = Column(Date, primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Integer, nullable=False, default=0)  # рубли
+    duration_minutes = Column(Integer, nullable=False, default=0)
+
+
+class AnalyticsDailyService(Base):
+    __tablename__ = "analytics_daily_services"
+    day = Column(Date, primary_key=True)
+    service_id = Column(Integer, ForeignKey("services.id", ondelete="CASCADE"), primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Integer, nullable=False, default=0)
+
+
+class AnalyticsDailyEmployee(Base):
+    __tablename__ = "analytics_daily_employees"
+    day = Column(Date, primary_key=True)
+    employee_id = Column(Integer, ForeignKey("user.id", ondelete="CASCADE"), primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Integer, nullable=False, default=0)
+    duration_minutes = Column(Integer, nullable=False, default=0)
+
+
+class AnalyticsHourly(Base):
+    __tablename__ = "analytics_hourly"
+    day = Column(Date, primary_key=True)
+    hour = Column(Integer, primary_key=True)
+    orders_count = Column(Integer, nullable=False, default=0)
@@ -0,0 +1,35 @@
+from sqlalchemy import Boolean, Column, ForeignKey, Index, Integer, func
+
+from .base import Base, UTCDateTime
+
+
+# Выполненные и уведомленные заказы старше tasks.archive_after_days задача
+# tasks.archive_orders переносит сюда из orders и order_service, чтобы рабочие
+# таблицы и их индексы оставались небольшими. Колонки и id те же; архив только
+# читается (include_archived в API) и учитывается в аналитике.
+
+
+class OrderArchive(Base):
+    __tablename__ = "orders_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    administrator_id = Column(Integer, ForeignKey("user.id"), index=True)
+    customer_car_id = Column(Integer, ForeignKey("customer_cars.id"), index=True)
+    employee_id = Column(Integer, ForeignKey("user.id"), index=True)
+    status = Column(Integer)
+    start_date = Column(UTCDateTime)
+    end_date = Column(UTCDateTime)
+    notified = Column(Boolean)
+    total_price = Column(Integer, nullable=False, default=0)
+    total_time_minutes = Column(Integer, nullable=False, default=0)
+    archived_at = Column(UTCDateTime, nullable=False, server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_orders_archive_start_date_id", "start_date", "id"),
+    )
+
+
+class OrderServiceArchive(Base):
+    __tablename__ = "order_service_archive"
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    service_id = Column(Integer, ForeignKey("services.id"))
+    order_id = Column(Integer, ForeignKey("orders_archive.id"), index=True)
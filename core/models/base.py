@@ -1,5 +1,8 @@
-from sqlalchemy import MetaData
+from datetime import timezone
+
+from sqlalchemy import DateTime, MetaData
 from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy.types import TypeDecorator
 
 from core.config import settings
 
@@ -11,3 +14,29 @@ class Base(DeclarativeBase):
 
         naming_convention=settings.db.naming_convention,
     )
+
+
+class UTCDateTime(TypeDecorator):
+    """
+    DateTime(timezone=True), одинаковый на Postgres и SQLite.
+
+    SQLite хранит дату текстом и отбрасывает пояс без перевода, поэтому там
+    значение при записи переводится в UTC, а при чтении получает пояс UTC.
+    В Postgres это обычный timestamptz.
+    """
+
+    impl = DateTime(timezone=True)
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None or dialect.name != "sqlite":
+            return value
+        # время без пояса считается UTC
+        if value.tzinfo is not None:
+            value = value.astimezone(timezone.utc).replace(tzinfo=None)
+        return value
+
+    def process_result_value(self, value, dialect):
+        if value is None or dialect.name != "sqlite" or value.tzinfo is not None:
+            return value
+        return value.replace(tzinfo=timezone.utc)
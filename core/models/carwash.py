@@ -4,9 +4,9 @@ from typing import Optional
 import pytz
 from pydantic import validator, root_validator
 from pytz import timezone
-from sqlalchemy import String, Column, Integer, ForeignKey, DateTime, select, event, Boolean
+from sqlalchemy import String, Column, Integer, ForeignKey, select, Boolean, Index, text, func, CheckConstraint
 from sqlalchemy.orm import relationship
-from .base import Base
+from .base import Base, UTCDateTime
 
 statuses = {0: "processing", 1: "completed"}
 
@@ -21,6 +21,16 @@ class Brand(Base):
 
     cars = relationship("Car", back_populates="brand")
 
+    __table_args__ = (
+        # поиск подстроки (ILIKE '%..%') по названию, только Postgres
+        Index(
+            "ix_brands_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
 
 class Car(Base):
     __tablename__ = "cars"
@@ -32,6 +42,16 @@ class Car(Base):
     brand = relationship("Brand", back_populates="cars")
     customer_cars = relationship("Customer_Car", back_populates="car")
 
+    __table_args__ = (
+        # то же для модели машины
+        Index(
+            "ix_cars_model_trgm",
+            "model",
+            postgresql_using="gin",
+            postgresql_ops={"model": "gin_trgm_ops"},
+        ).ddl_if(dialect="postgresql"),
+    )
+
 
 
 
@@ -76,26 +96,56 @@ class OrderService(Base):
     __tablename__ = "order_service"
     id = Column(Integer, primary_key=True)
     service_id = Column(Integer, ForeignKey("services.id"))
-    order_id = Column(Integer, ForeignKey("orders.id"))
+    order_id = Column(Integer, ForeignKey("orders.id"), index=True)
+    # Копия orders.start_date. В Postgres orders секционирована по start_date,
+    # и внешний ключ ссылается на (id, start_date) — первичный ключ секций
+    order_start_date = Column(UTCDateTime)
     service = relationship("Service",back_populates="order_services")
     order = relationship("Order", back_populates="order_services")
 
+    # id перенесенных в order_service_archive строк не должны выдаваться снова
+    __table_args__ = {"sqlite_autoincrement": True}
+
 
 class Order(Base):
     __tablename__ = "orders"
     id = Column(Integer, primary_key=True)
-    administrator_id = Column(Integer, ForeignKey("user.id"))
-    customer_car_id = Column(Integer, ForeignKey("customer_cars.id"))
+    administrator_id = Column(Integer, ForeignKey("user.id"), index=True)
+    customer_car_id = Column(Integer, ForeignKey("customer_cars.id"), index=True)
     employee_id = Column(Integer, ForeignKey("user.id"))
     status = Column(Integer)
-    start_date = Column(DateTime(timezone=True))
-    end_date = Column(DateTime(timezone=True))
+    start_date = Column(UTCDateTime)
+    end_date = Column(UTCDateTime)
     notified = Column(Boolean, default=False)
+    # Итоги по услугам заказа в единицах API (рубли и минуты), пересчитываются
+    # в crud при изменении order_service и цены/времени услуги
+    total_price = Column(Integer, nullable=False, default=0, server_default="0")
+    total_time_minutes = Column(Integer, nullable=False, default=0, server_default="0")
     order_services = relationship("OrderService", back_populates="order")
     administrator = relationship("User", foreign_keys=[administrator_id], back_populates="orders_administrator")
     employee = relationship("User", foreign_keys=[employee_id], back_populates="orders_employee")
     customer_car = relationship("Customer_Car", foreign_keys=[customer_car_id], back_populates="orders")
 
+    __table_args__ = (
+        # keyset-пагинация списка заказов: ORDER BY start_date, id
+        Index("ix_orders_start_date_id", "start_date", "id"),
+        # занятость работника за период; заменяет индекс по одному employee_id
+        Index("ix_orders_employee_id_start_date", "employee_id", "start_date"),
+        # только незавершенные заказы — то, что перебирает Celery-задача
+        Index(
+            "ix_orders_pending_end_date",
+            "end_date",
+            postgresql_where=text("status <> 0"),
+            sqlite_where=text("status <> 0"),
+        ),
+        # заказ не заканчивается раньше начала; схемы отклоняют такое с 422,
+        # ограничение — на случай записи в обход них
+        CheckConstraint("end_date >= start_date", name="end_after_start"),
+        # без AUTOINCREMENT SQLite выдает max(id) + 1 и повторил бы id
+        # заказов, перенесенных в orders_archive
+        {"sqlite_autoincrement": True},
+    )
+
     @validator("status")
     def validate_status(cls, value):
         if value not in statuses.values():
@@ -114,7 +164,7 @@ class Customer_Car(Base):
     __tablename__ = "customer_cars"
     id = Column(Integer, primary_key=True)
     car_id = Column(Integer, ForeignKey("cars.id"))
-    customer_id = Column(Integer, ForeignKey("user.id"))
+    customer_id = Column(Integer, ForeignKey("user.id"), index=True)
     year = Column(Integer)
     number = Column(String(100))
 
@@ -123,8 +173,25 @@ class Customer_Car(Base):
     orders = relationship("Order", back_populates="customer_car")
 
 
-
-
-
-
-
+class CatalogVersion(Base):
+    # Счетчик изменений справочника (services, brands, cars) — из него строится ETag
+    __tablename__ = "catalog_versions"
+    name = Column(String(50), primary_key=True)
+    version = Column(Integer, nullable=False, default=1)
+    updated_at = Column(UTCDateTime, nullable=False, server_default=func.now())
+
+
+# Схема базы создается только миграциями alembic (в бенчмарках — через
+# benchmarks.seed.create_schema), Base.metadata.create_all не годится: модели
+# не описывают то, что миграции делают по-разному для Postgres и SQLite.
+# В Postgres orders секционирована по start_date с первичным ключом
+# (id, start_date), order_service ссылается на нее по (order_id,
+# order_start_date), пересечения заказов проверяет триггер под advisory
+# lock; в SQLite то же делают триггеры.
+
+# Заказы одного работника не пересекаются по времени ([start_date, end_date),
+# пустой интервал ни с чем не пересекается). Нарушение приходит из базы с
+# этим именем и в Postgres, и в SQLite
+ORDER_OVERLAP_CONSTRAINT = "ex_orders_employee_overlap"
+# имя CheckConstraint end_after_start из Order.__table_args__ по naming_convention
+ORDER_DATES_CONSTRAINT = "ck_orders_end_after_start"
@@ -1,13 +1,93 @@
-from typing import AsyncGenerator
+import logging
+from contextlib import AsyncExitStack, asynccontextmanager
+from typing import AsyncGenerator, AsyncIterator, Optional, Sequence
+from uuid import uuid4
 
+from fastapi import Request
 from sqlalchemy.ext.asyncio import (
     create_async_engine,
     AsyncEngine,
     async_sessionmaker,
     AsyncSession,
 )
+from sqlalchemy.pool import NullPool
 
 from core.config import settings
+from core.metrics import TimedAsyncAdaptedQueuePool, instrument_engine, register_pool_stats
+from . import db_helper_sqlite
+from .replicas import ReplicaSet, pinned_to_primary
+
+log = logging.getLogger(__name__)
+
+
+def _prepared_statement_name() -> str:
+    # PgBouncer может отдать следующую транзакцию другому серверному
+    # соединению — имена вида __asyncpg_stmt_1__ там уже заняты
+    return f"__asyncpg_{uuid4()}__"
+
+
+def _create_engine(
+    url: str,
+    name: str,
+    pgbouncer: bool = False,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    **kwargs,
+) -> AsyncEngine:
+    if pgbouncer:
+        # соединения держит PgBouncer, свой пул только мешал бы ему
+        engine = create_async_engine(
+            url=url,
+            poolclass=NullPool,
+            connect_args={
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": _prepared_statement_name,
+            },
+            **kwargs,
+        )
+    else:
+        engine = create_async_engine(
+            url=url,
+            poolclass=TimedAsyncAdaptedQueuePool if settings.metrics.enabled else None,
+            pool_size=pool_size,
+            max_overflow=max_overflow,
+            **kwargs,
+        )
+    if settings.metrics.enabled:
+        instrument_engine(engine)
+        register_pool_stats(engine, name)
+    return engine
+
+
+def _create_replica_engine(
+    url: str,
+    name: str,
+    pgbouncer: bool = False,
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    **kwargs,
+) -> AsyncEngine:
+    if db_helper_sqlite.is_sqlite(url):
+        # копия файла базы (например, от Litestream) — как пул чтения SQLite
+        sqlite_config = settings.db.sqlite
+        engine = _create_engine(
+            url,
+            name,
+            pool_size=sqlite_config.read_pool_size,
+            max_overflow=0,
+            **kwargs,
+        )
+        db_helper_sqlite.configure_engine(engine, sqlite_config, read_only=True)
+        return engine
+    return _create_engine(
+        url,
+        name,
+        pgbouncer=pgbouncer,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        **kwargs,
+    )
 
 
 class DatabaseHelper:
@@ -18,33 +98,139 @@ class DatabaseHelper:
         echo_pool: bool = False,
         pool_size: int = 5,
         max_overflow: int = 10,
+        replica_urls: Sequence[str] = (),
+        pgbouncer: bool = False,
+        direct_url: Optional[str] = None,
     ) -> None:
-        self.engine: AsyncEngine = create_async_engine(
-            url=url,
-            echo=echo,
-            echo_pool=echo_pool,
-            pool_size=pool_size,
-            max_overflow=max_overflow,
-        )
+        self.sqlite = db_helper_sqlite.is_sqlite(url)
+        if self.sqlite:
+            # один файл: соединения записи в очереди WriteLock, чтение — через
+            # отдельный пул только для чтения, подключенный как реплика
+            sqlite_config = settings.db.sqlite
+            self.engine: AsyncEngine = _create_engine(
+                url,
+                "primary",
+                echo=echo,
+                echo_pool=echo_pool,
+                pool_size=sqlite_config.pool_size,
+                max_overflow=0,
+            )
+            db_helper_sqlite.configure_engine(self.engine, sqlite_config)
+            db_helper_sqlite.WriteLock().attach(self.engine)
+            replica_engines = [
+                _create_replica_engine(url, "replica0", echo=echo, echo_pool=echo_pool)
+            ]
+        else:
+            self.engine: AsyncEngine = _create_engine(
+                url,
+                "primary",
+                pgbouncer=pgbouncer,
+                echo=echo,
+                echo_pool=echo_pool,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+            )
+            replica_engines = []
+        replica_engines += [
+            _create_replica_engine(
+                str(replica_url),
+                f"replica{number}",
+                pgbouncer=pgbouncer,
+                echo=echo,
+                echo_pool=echo_pool,
+                pool_size=pool_size,
+                max_overflow=max_overflow,
+            )
+            for number, replica_url in enumerate(replica_urls, start=len(replica_engines))
+        ]
+        # LISTEN держит соединение сессии, через PgBouncer в режиме
+        # transaction уведомления теряются
+        self.listen_engine: AsyncEngine = self.engine
+        if pgbouncer and direct_url:
+            self.listen_engine = create_async_engine(url=direct_url, poolclass=NullPool)
+        elif pgbouncer:
+            log.warning("PgBouncer mode without direct_url: cache invalidation between workers is disabled")
         self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
             bind=self.engine,
             autoflush=False,
             autocommit=False,
             expire_on_commit=False,
         )
+        self.replicas = ReplicaSet(
+            replica_engines,
+            max_lag=settings.db.replica_max_lag_seconds,
+            check_interval=settings.db.replica_check_interval_seconds,
+            primary=self.engine,
+        )
+
+    async def warm_up(self, connections: int) -> None:
+        """
+        Открывает до connections соединений в каждом пуле (не больше
+        pool_size), чтобы первые запросы после старта не ждали подключения.
+        """
+        for engine in (self.engine, *(replica.engine for replica in self.replicas.replicas)):
+            pool = engine.sync_engine.pool
+            if isinstance(pool, NullPool):
+                continue
+            log.info(
+                "Pool %s: pool_size=%d, max_overflow=%d",
+                engine.url.render_as_string(), pool.size(), pool._max_overflow,
+            )
+            # соединения берутся одновременно, иначе пул выдавал бы одно и то же
+            try:
+                async with AsyncExitStack() as stack:
+                    for _ in range(min(connections, pool.size())):
+                        await stack.enter_async_context(engine.connect())
+            except Exception as exc:
+                # прогрев — только оптимизация, запуск из-за него не падает
+                log.warning("Pool warm-up for %s failed: %s", engine.url.render_as_string(), exc)
 
     async def dispose(self) -> None:
         await self.engine.dispose()
+        if self.listen_engine is not self.engine:
+            await self.listen_engine.dispose()
+        await self.replicas.dispose()
 
     async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
         async with self.session_factory() as session:
             yield session
 
+    def read_session_factory(self, request: Request) -> async_sessionmaker[AsyncSession]:
+        """
+        Фабрика сессий для чтения: здоровая реплика, если клиент недавно
+        ничего не записывал, иначе primary.
+        """
+        if not self.replicas or pinned_to_primary(request, settings.db.read_your_writes_cookie):
+            return self.session_factory
+        return self.replicas.pick() or self.session_factory
+
+    async def read_session_getter(self, request: Request) -> AsyncGenerator[AsyncSession, None]:
+        # Только для эндпоинтов, которые ничего не пишут
+        async with self.read_session_factory(request)() as session:
+            yield session
+
+    @asynccontextmanager
+    async def primary_session(self, session: AsyncSession) -> AsyncIterator[AsyncSession]:
+        """
+        Сессия primary для чтения, которое кэшируется: снимок, загруженный с
+        отстающей реплики сразу после сброса кэша, остался бы устаревшим.
+        """
+        if "replica" not in session.info:
+            yield session
+            return
+        async with self.session_factory() as primary:
+            yield primary
+
+
+pool_size, max_overflow = settings.db.pool_limits
 
 db_helper = DatabaseHelper(
     url=str(settings.db.url),
     echo=settings.db.echo,
     echo_pool=settings.db.echo_pool,
-    pool_size=settings.db.pool_size,
-    max_overflow=settings.db.max_overflow,
+    pool_size=pool_size,
+    max_overflow=max_overflow,
+    replica_urls=settings.db.replica_urls,
+    pgbouncer=settings.db.pgbouncer,
+    direct_url=str(settings.db.direct_url) if settings.db.direct_url else None,
 )
@@ -1,44 +1,83 @@
-from typing import AsyncGenerator
-
-from sqlalchemy.ext.asyncio import (
-    create_async_engine,
-    AsyncEngine,
-    async_sessionmaker,
-    AsyncSession,
-)
-
-from core.config import settings
-
-
-class DatabaseHelper:
-    def __init__(
-        self,
-        url: str,
-        echo: bool = False,
-        # future: bool = True,
-    ) -> None:
-        self.engine: AsyncEngine = create_async_engine(
-            url=url,
-            echo=echo,
-            # future=future,
-        )
-        self.session_factory: async_sessionmaker[AsyncSession] = async_sessionmaker(
-            bind=self.engine,
-            autoflush=False,
-            autocommit=False,
-            expire_on_commit=False,
-        )
-
-    async def dispose(self) -> None:
-        await self.engine.dispose()
-
-    async def session_getter(self) -> AsyncGenerator[AsyncSession, None]:
-        async with self.session_factory() as session:
-            yield session
-
-
-db_helper = DatabaseHelper(
-    url=str(settings.db.url),
-    echo=settings.db.echo,
-    # future=settings.db.future,
-)
+import asyncio
+
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.util import await_only
+
+from core.config import SqliteConfig
+
+# sqlite3 сам открывает транзакцию только перед такими командами, SELECT
+# выполняется вне транзакции — поэтому блокировка берется на первой из них
+WRITE_COMMANDS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def is_sqlite(url: str) -> bool:
+    return url.startswith("sqlite")
+
+
+def _pragmas(config: SqliteConfig, read_only: bool) -> list[str]:
+    pragmas = [
+        f"journal_mode = {config.journal_mode}",
+        f"synchronous = {config.synchronous}",
+        f"mmap_size = {config.mmap_size}",
+        f"cache_size = -{config.cache_size_kib}",
+        f"busy_timeout = {config.busy_timeout_ms}",
+        "foreign_keys = ON",
+        "temp_store = MEMORY",
+    ]
+    if read_only:
+        pragmas.append("query_only = ON")
+    return pragmas
+
+
+def configure_engine(engine: AsyncEngine, config: SqliteConfig, read_only: bool = False) -> None:
+    """Выставляет PRAGMA каждому новому соединению движка."""
+    pragmas = _pragmas(config, read_only)
+
+    @event.listens_for(engine.sync_engine, "connect")
+    def set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma in pragmas:
+            cursor.execute(f"PRAGMA {pragma}")
+        cursor.close()
+
+
+class WriteLock:
+    """
+    Очередь писателей внутри процесса. SQLite допускает одного писателя, и
+    без очереди конкурирующие транзакции ждут друг друга в busy handler
+    (опрос со сном в потоке aiosqlite) или получают database is locked.
+    Здесь транзакция ждет в asyncio.Lock перед первой изменяющей командой и
+    отпускает его на commit/rollback; чтение блокировку не берет. Событие
+    commit приходит до самого COMMIT, короткий хвост покрывает busy_timeout.
+
+    Между процессами порядок по-прежнему обеспечивает busy_timeout.
+    """
+
+    def __init__(self) -> None:
+        self._lock = asyncio.Lock()
+
+    def attach(self, engine: AsyncEngine) -> None:
+        sync_engine = engine.sync_engine
+        event.listen(sync_engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(sync_engine, "commit", self._release)
+        event.listen(sync_engine, "rollback", self._release)
+        # соединение, вернувшееся в пул без commit/rollback (например, после ошибки)
+        event.listen(sync_engine.pool, "checkin", self._release_record)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if "sqlite_write_lock" in conn.info:
+            return
+        if not statement.lstrip()[:7].upper().startswith(WRITE_COMMANDS):
+            return
+        # обработчик выполняется в greenlet SQLAlchemy, ждать можно через await_only
+        await_only(self._lock.acquire())
+        conn.info["sqlite_write_lock"] = True
+
+    def _release(self, conn) -> None:
+        if conn.info.pop("sqlite_write_lock", False):
+            self._lock.release()
+
+    def _release_record(self, dbapi_connection, connection_record) -> None:
+        if connection_record is not None and connection_record.info.pop("sqlite_write_lock", False):
+            self._lock.release()
@@ -0,0 +1,215 @@
+import asyncio
+import logging
+from datetime import datetime
+from itertools import count
+from math import inf
+from time import time
+from typing import Optional, Sequence
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession, async_sessionmaker
+from starlette.datastructures import MutableHeaders
+from starlette.requests import HTTPConnection
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+log = logging.getLogger(__name__)
+
+# Отставание реплики Postgres в секундах; если все полученное уже применено —
+# 0, даже когда записей давно не было
+PG_REPLICA_LAG = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+# Время последней записи в базе SQLite: изменения справочника и заказов
+# (analytics_dirty_days помечается в той же транзакции, что и заказ). Копия
+# файла отстает на столько, на сколько ее последняя запись старше, чем в primary
+SQLITE_LAST_WRITE = text(
+    """
+    SELECT max(value) FROM (
+        SELECT max(updated_at) AS value FROM catalog_versions
+        UNION ALL
+        SELECT max(marked_at) FROM analytics_dirty_days
+    )
+    """
+)
+
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class Replica:
+    __slots__ = ("name", "engine", "session_factory", "healthy", "lag", "same_file")
+
+    def __init__(self, name: str, engine: AsyncEngine, same_file: bool = False) -> None:
+        self.name = name
+        self.engine = engine
+        # читает тот же файл SQLite, что и primary, — видит каждый коммит
+        self.same_file = same_file
+        self.session_factory = async_sessionmaker(
+            bind=engine,
+            autoflush=False,
+            autocommit=False,
+            expire_on_commit=False,
+            info={"replica": name},
+        )
+        # до первой проверки реплика не используется
+        self.healthy = False
+        self.lag = 0.0
+
+
+class ReplicaSet:
+    """
+    Реплики только для чтения с фоновой проверкой здоровья и отставания.
+
+    pick() выбирает по кругу среди реплик, которые ответили на последней
+    проверке и отстают не больше max_lag секунд; если таких нет — None, и
+    чтение идет в primary. Отставание копии файла SQLite считается по
+    последней записи в ней и в primary; без primary такая копия не
+    используется.
+    """
+
+    def __init__(
+        self,
+        engines: Sequence[AsyncEngine],
+        max_lag: float,
+        check_interval: float,
+        primary: Optional[AsyncEngine] = None,
+    ) -> None:
+        self.replicas = [
+            Replica(
+                f"replica{number}",
+                engine,
+                same_file=primary is not None and engine.url == primary.url,
+            )
+            for number, engine in enumerate(engines)
+        ]
+        self.primary = primary
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self._next = count()
+        self._task: Optional[asyncio.Task] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def pick(self) -> Optional[async_sessionmaker[AsyncSession]]:
+        available = [
+            replica for replica in self.replicas if replica.healthy and replica.lag <= self.max_lag
+        ]
+        if not available:
+            return None
+        return available[next(self._next) % len(available)].session_factory
+
+    async def check(self) -> None:
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as connection:
+                    if connection.dialect.name == "postgresql":
+                        lag = float(await connection.scalar(PG_REPLICA_LAG))
+                    elif replica.same_file:
+                        await connection.execute(text("SELECT 1"))
+                        lag = 0.0
+                    else:
+                        lag = await self._sqlite_lag(connection)
+            except Exception as exc:
+                if replica.healthy:
+                    log.warning("Replica %s is unavailable: %s", replica.name, exc)
+                replica.healthy = False
+                continue
+
+            if lag > self.max_lag:
+                log.warning("Replica %s lags %.1fs behind primary", replica.name, lag)
+            replica.healthy = True
+            replica.lag = lag
+
+    async def _sqlite_lag(self, connection: AsyncConnection) -> float:
+        if self.primary is None:
+            return inf
+        async with self.primary.connect() as primary:
+            primary_last = _parse_timestamp(await primary.scalar(SQLITE_LAST_WRITE))
+        replica_last = _parse_timestamp(await connection.scalar(SQLITE_LAST_WRITE))
+        if primary_last is None:
+            return 0.0
+        if replica_last is None:
+            return inf
+        return max((primary_last - replica_last).total_seconds(), 0.0)
+
+    async def start(self) -> None:
+        if not self.replicas or self._task:
+            return
+        await self.check()
+        self._task = asyncio.create_task(self._monitor())
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def dispose(self) -> None:
+        await self.stop()
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    async def _monitor(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            await self.check()
+
+
+def _parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    # SQLite хранит время текстом в UTC (UTCDateTime)
+    if value is None:
+        return None
+    return datetime.fromisoformat(value).replace(tzinfo=None)
+
+
+def pinned_to_primary(connection: HTTPConnection, cookie: str) -> bool:
+    # в cookie — момент (unix time), до которого клиент читает из primary
+    value = connection.cookies.get(cookie)
+    if not value:
+        return False
+    try:
+        return float(value) > time()
+    except ValueError:
+        return False
+
+
+class ReadYourWritesMiddleware:
+    """
+    После успешного изменяющего запроса ставит cookie, по которой следующие
+    чтения клиента в течение window секунд идут в primary: реплика может
+    еще не получить только что записанное.
+    """
+
+    def __init__(self, app: ASGIApp, cookie: str, window: int) -> None:
+        self.app = app
+        self.cookie = cookie
+        self.window = window
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                headers = MutableHeaders(scope=message)
+                headers.append(
+                    "set-cookie",
+                    f"{self.cookie}={time() + self.window:.0f}; Max-Age={self.window}; "
+                    "Path=/; HttpOnly; SameSite=Lax",
+                )
+            await send(message)
+
+        await self.app(scope, receive, send_wrapper)
+
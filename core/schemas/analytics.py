@@ -0,0 +1,35 @@
+from datetime import date
+from typing import Optional
+
+from pydantic import BaseModel
+
+
+class DailyRevenueRead(BaseModel):
+    day: date
+    orders_count: int
+    revenue: int  # рубли
+    avg_duration_minutes: float
+
+
+class ServiceRevenueRead(BaseModel):
+    service_id: int
+    name: Optional[str]
+    orders_count: int
+    revenue: int
+
+
+class EmployeeRevenueRead(BaseModel):
+    employee_id: int
+    employee_name: Optional[str]
+    orders_count: int
+    revenue: int
+    avg_duration_minutes: float
+
+
+class HourlyOrdersRead(BaseModel):
+    hour: int
+    orders_count: int
+
+
+class AnalyticsRefreshRead(BaseModel):
+    refreshed_days: list[date]
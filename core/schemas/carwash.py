@@ -1,10 +1,10 @@
 # Pydantic Schemas
 from datetime import datetime
 from http.client import HTTPException
-from typing import Optional, Any, Literal, List
+from typing import Optional, Any, Literal, List, Mapping
 
 import pytz
-from pydantic import BaseModel, root_validator, Field, field_validator
+from pydantic import BaseModel, root_validator, Field, field_validator, model_validator
 from sqlalchemy.future import select
 
 from core.models import Order
@@ -146,6 +146,17 @@ class OrderCreate(BaseModel):
     end_date: datetime = utc_now.astimezone(krasnoyarsk_tz)
     status: Literal[1] = 1
 
+    @model_validator(mode="after")
+    def check_dates(self) -> "OrderCreate":
+        # время без пояса, как и в OrderRead, считается UTC
+        start_date, end_date = (
+            value if value.tzinfo else pytz.utc.localize(value)
+            for value in (self.start_date, self.end_date)
+        )
+        if end_date < start_date:
+            raise ValueError("Дата окончания заказа раньше даты начала")
+        return self
+
 class OrderRead(BaseModel):
     id: int
     status: int
@@ -161,11 +172,22 @@ class OrderRead(BaseModel):
     total_price: int  # Итоговая сумма в рублях
     total_time_minutes: int
     @classmethod
-    async def from_orm(cls, obj: Order) -> "OrderRead":
-        services = [
-            ServiceRead.from_orm(service.service)
-            for service in obj.order_services
-        ]
+    async def from_orm(
+        cls, obj: Order, services: Optional[Mapping[int, ServiceRead]] = None
+    ) -> "OrderRead":
+        # services — справочник услуг по id (service_catalog); если передан,
+        # связь order_services -> service можно не загружать
+        if services is not None:
+            order_services = [
+                services[service.service_id]
+                for service in obj.order_services
+                if service.service_id in services
+            ]
+        else:
+            order_services = [
+                ServiceRead.from_orm(service.service)
+                for service in obj.order_services
+            ]
         car_model = obj.customer_car.car.model if obj.customer_car and obj.customer_car.car else None
         employee_name = (
             f"{obj.employee.first_name} {obj.employee.last_name}"
@@ -179,9 +201,6 @@ class OrderRead(BaseModel):
         start_date = obj.start_date
         end_date = obj.end_date
 
-        total_price = sum(service.service.convert_price(service.service.price) for service in obj.order_services)
-        total_time_minutes = sum(service.service.convert_time(service.service.time) for service in obj.order_services)
-
         if start_date.tzinfo is None:
             start_date = pytz.utc.localize(start_date)
         if end_date.tzinfo is None:
@@ -198,13 +217,26 @@ class OrderRead(BaseModel):
             administrator_id=obj.administrator_id,
             customer_car_id=obj.customer_car_id,
             employee_id=obj.employee_id,
-            services=services,
+            services=order_services,
             car=car_model,
             employee_name=employee_name,
             administrator_name=administrator_name,
-            total_price=total_price,
-            total_time_minutes=total_time_minutes,
+            total_price=obj.total_price,
+            total_time_minutes=obj.total_time_minutes,
         )
+
+
+class AvailabilitySlot(BaseModel):
+    start: datetime
+    end: datetime
+
+
+class EmployeeAvailability(BaseModel):
+    employee_id: int
+    employee_name: str
+    slots: list[AvailabilitySlot]
+
+
 class OrderUpdate(BaseModel):
     administrator_id: Optional[int] = None
     customer_car_id: Optional[int] = None
@@ -12,16 +12,25 @@ from fastapi.openapi.docs import (
 )
 from pydantic_core import ValidationError
 from starlette.requests import Request
-from starlette.responses import JSONResponse
+from starlette.responses import JSONResponse, PlainTextResponse
 
+from core.cache import invalidation_bus
+from core.config import settings
+from core.metrics import MetricsMiddleware, registry
 from core.models import db_helper
+from core.models.replicas import ReadYourWritesMiddleware
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     # startup
+    await db_helper.warm_up(settings.db.pool_warmup)
+    await invalidation_bus.start(db_helper.listen_engine)
+    await db_helper.replicas.start()
     yield
     # shutdown
+    await db_helper.replicas.stop()
+    await invalidation_bus.stop()
     await db_helper.dispose()
 
 
@@ -55,6 +64,17 @@ def register_static_docs_routes(app: FastAPI):
 
 
 
+def register_metrics(app: FastAPI):
+    app.add_middleware(MetricsMiddleware)
+
+    @app.get(settings.metrics.path, include_in_schema=False)
+    async def metrics():
+        return PlainTextResponse(
+            registry.render(),
+            media_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
+
 krasnoyarsk_tz = pytz.timezone("Asia/Krasnoyarsk")
 
 # Кастомный сериализатор времени
@@ -66,18 +86,30 @@ def custom_orjson_dumps(obj, *, default):
         return obj.isoformat()
     raise TypeError("Type not serializable")
 
+class CustomORJSONResponse(ORJSONResponse):
+    @staticmethod
+    def render(content: any) -> bytes:
+        return orjson.dumps(content, default=custom_orjson_dumps)
+
+
 # Функция создания приложения
 def create_app(create_custom_static_urls: bool = False) -> FastAPI:
-    class CustomORJSONResponse(ORJSONResponse):
-        @staticmethod
-        def render(content: any) -> bytes:
-            return orjson.dumps(content, default=custom_orjson_dumps)
-
     app = FastAPI(
+        lifespan=lifespan,
         default_response_class=CustomORJSONResponse,
         docs_url=None if create_custom_static_urls else "/docs",
         redoc_url=None if create_custom_static_urls else "/redoc",
     )
     if create_custom_static_urls:
         register_static_docs_routes(app)
+    # реплика из того же файла SQLite видит все зафиксированное сразу, закреплять
+    # чтения нужно только при внешних репликах
+    if settings.db.replica_urls:
+        app.add_middleware(
+            ReadYourWritesMiddleware,
+            cookie=settings.db.read_your_writes_cookie,
+            window=settings.db.read_your_writes_seconds,
+        )
+    if settings.metrics.enabled:
+        register_metrics(app)
     return app
@@ -0,0 +1,286 @@
+from collections import defaultdict
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Optional
+
+from sqlalchemy import delete, func, insert, select, union_all
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models import (
+    AnalyticsDaily,
+    AnalyticsDailyEmployee,
+    AnalyticsDailyService,
+    AnalyticsDirtyDay,
+    AnalyticsHourly,
+    Order,
+    OrderArchive,
+    OrderService,
+    OrderServiceArchive,
+    Service,
+    User,
+)
+from core.models.carwash import LOCAL_TIMEZONE
+from crud.carwash.service_catalog import service_catalog
+
+DAY_TABLES = (AnalyticsDaily, AnalyticsDailyService, AnalyticsDailyEmployee, AnalyticsHourly)
+# заказы считаются вместе с архивными: день может пересчитываться и после переноса
+ORDER_TABLES = ((Order, OrderService), (OrderArchive, OrderServiceArchive))
+
+
+def _local(value: datetime) -> datetime:
+    # время без пояса считается UTC, как и в UTCDateTime
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.astimezone(LOCAL_TIMEZONE)
+
+
+def local_day(value: datetime) -> date:
+    return _local(value).date()
+
+
+def day_bounds(day: date) -> tuple[datetime, datetime]:
+    # Границы местного дня в UTC; localize учитывает смену смещения в истории пояса
+    start = LOCAL_TIMEZONE.localize(datetime.combine(day, time.min))
+    end = LOCAL_TIMEZONE.localize(datetime.combine(day + timedelta(days=1), time.min))
+    return start.astimezone(timezone.utc), end.astimezone(timezone.utc)
+
+
+async def mark_days_dirty(session: AsyncSession, dates: Iterable[Optional[datetime]]) -> None:
+    """
+    Помечает дни заказов для пересчета аналитики. Вызывается в той же
+    транзакции, что и изменение заказа.
+    """
+    days = {local_day(value) for value in dates if value is not None}
+    if not days:
+        return
+
+    dialect = postgresql if session.bind.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(AnalyticsDirtyDay).values(
+        [{"day": day, "marked_at": datetime.now(timezone.utc)} for day in sorted(days)]
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[AnalyticsDirtyDay.day],
+        set_={"marked_at": stmt.excluded.marked_at},
+    )
+    await session.execute(stmt)
+
+
+async def mark_service_orders_dirty(session: AsyncSession, service_id: int) -> None:
+    result = await session.execute(
+        union_all(*(
+            select(orders.start_date)
+            .join(lines, lines.order_id == orders.id)
+            .filter(lines.service_id == service_id)
+            .distinct()
+            for orders, lines in ORDER_TABLES
+        ))
+    )
+    await mark_days_dirty(session, result.scalars().all())
+
+
+async def refresh_day(session: AsyncSession, day: date) -> None:
+    """
+    Пересчитывает агрегаты одного дня по заказам этого дня (start_date).
+    Выручка — сумма цен услуг в рублях, как total_price заказа.
+    """
+    start, end = day_bounds(day)
+
+    orders = (
+        await session.execute(
+            union_all(*(
+                select(
+                    order_table.start_date,
+                    order_table.employee_id,
+                    order_table.total_price,
+                    order_table.total_time_minutes,
+                ).filter(order_table.start_date >= start, order_table.start_date < end)
+                for order_table, _ in ORDER_TABLES
+            ))
+        )
+    ).all()
+    lines = (
+        await session.execute(
+            union_all(*(
+                select(line_table.order_id, Service.id, Service.price)
+                .join(order_table, line_table.order_id == order_table.id)
+                .join(Service, line_table.service_id == Service.id)
+                .filter(order_table.start_date >= start, order_table.start_date < end)
+                for order_table, line_table in ORDER_TABLES
+            ))
+        )
+    ).all()
+
+    employees = defaultdict(lambda: [0, 0, 0])
+    hours = defaultdict(int)
+    for start_date, employee_id, total_price, total_time_minutes in orders:
+        hours[_local(start_date).hour] += 1
+        if employee_id is not None:
+            totals = employees[employee_id]
+            totals[0] += 1
+            totals[1] += total_price
+            totals[2] += total_time_minutes
+
+    services = defaultdict(lambda: [set(), 0])
+    for order_id, service_id, price in lines:
+        totals = services[service_id]
+        totals[0].add(order_id)
+        totals[1] += price // 100
+
+    for table in DAY_TABLES:
+        await session.execute(delete(table).filter(table.day == day))
+
+    if not orders:
+        return
+
+    await session.execute(
+        insert(AnalyticsDaily),
+        [{
+            "day": day,
+            "orders_count": len(orders),
+            "revenue": sum(row.total_price for row in orders),
+            "duration_minutes": sum(row.total_time_minutes for row in orders),
+        }],
+    )
+    await session.execute(
+        insert(AnalyticsHourly),
+        [{"day": day, "hour": hour, "orders_count": count} for hour, count in hours.items()],
+    )
+    if employees:
+        await session.execute(
+            insert(AnalyticsDailyEmployee),
+            [
+                {
+                    "day": day,
+                    "employee_id": employee_id,
+                    "orders_count": count,
+                    "revenue": revenue,
+                    "duration_minutes": duration,
+                }
+                for employee_id, (count, revenue, duration) in employees.items()
+            ],
+        )
+    if services:
+        await session.execute(
+            insert(AnalyticsDailyService),
+            [
+                {
+                    "day": day,
+                    "service_id": service_id,
+                    "orders_count": len(order_ids),
+                    "revenue": revenue,
+                }
+                for service_id, (order_ids, revenue) in services.items()
+            ],
+        )
+
+
+async def refresh_analytics(session: AsyncSession, max_days: int = 366) -> list[date]:
+    """
+    Пересчитывает помеченные дни, по одному дню в транзакции.
+
+    Метка дня блокируется на время пересчета (FOR UPDATE SKIP LOCKED), так что
+    параллельные запуски не считают один день дважды, а изменение заказа во
+    время пересчета заново пометит день после коммита.
+    """
+    refreshed = []
+    while len(refreshed) < max_days:
+        result = await session.execute(
+            select(AnalyticsDirtyDay.day)
+            .order_by(AnalyticsDirtyDay.day)
+            .limit(1)
+            .with_for_update(skip_locked=True)
+        )
+        day = result.scalar_one_or_none()
+        if day is None:
+            break
+
+        await refresh_day(session, day)
+        await session.execute(delete(AnalyticsDirtyDay).filter(AnalyticsDirtyDay.day == day))
+        await session.commit()
+        refreshed.append(day)
+    return refreshed
+
+
+def _avg(total: int, count: int) -> float:
+    return round(total / count, 1) if count else 0.0
+
+
+async def get_daily_revenue(session: AsyncSession, date_from: date, date_to: date) -> list[dict]:
+    result = await session.execute(
+        select(AnalyticsDaily)
+        .filter(AnalyticsDaily.day >= date_from, AnalyticsDaily.day <= date_to)
+        .order_by(AnalyticsDaily.day)
+    )
+    return [
+        {
+            "day": row.day,
+            "orders_count": row.orders_count,
+            "revenue": row.revenue,
+            "avg_duration_minutes": _avg(row.duration_minutes, row.orders_count),
+        }
+        for row in result.scalars().all()
+    ]
+
+
+async def get_service_revenue(session: AsyncSession, date_from: date, date_to: date) -> list[dict]:
+    revenue = func.sum(AnalyticsDailyService.revenue).label("revenue")
+    result = await session.execute(
+        select(
+            AnalyticsDailyService.service_id,
+            func.sum(AnalyticsDailyService.orders_count),
+            revenue,
+        )
+        .filter(AnalyticsDailyService.day >= date_from, AnalyticsDailyService.day <= date_to)
+        .group_by(AnalyticsDailyService.service_id)
+        .order_by(revenue.desc())
+    )
+    services = await service_catalog.get_index(session)
+    return [
+        {
+            "service_id": service_id,
+            "name": services[service_id].name if service_id in services else None,
+            "orders_count": orders_count,
+            "revenue": revenue,
+        }
+        for service_id, orders_count, revenue in result.all()
+    ]
+
+
+async def get_employee_revenue(session: AsyncSession, date_from: date, date_to: date) -> list[dict]:
+    revenue = func.sum(AnalyticsDailyEmployee.revenue).label("revenue")
+    totals = (
+        select(
+            AnalyticsDailyEmployee.employee_id,
+            func.sum(AnalyticsDailyEmployee.orders_count).label("orders_count"),
+            revenue,
+            func.sum(AnalyticsDailyEmployee.duration_minutes).label("duration_minutes"),
+        )
+        .filter(AnalyticsDailyEmployee.day >= date_from, AnalyticsDailyEmployee.day <= date_to)
+        .group_by(AnalyticsDailyEmployee.employee_id)
+        .subquery()
+    )
+    result = await session.execute(
+        select(totals, User.first_name, User.last_name)
+        .outerjoin(User, User.id == totals.c.employee_id)
+        .order_by(totals.c.revenue.desc())
+    )
+    return [
+        {
+            "employee_id": row.employee_id,
+            "employee_name": f"{row.first_name} {row.last_name}" if row.first_name else None,
+            "orders_count": row.orders_count,
+            "revenue": row.revenue,
+            "avg_duration_minutes": _avg(row.duration_minutes, row.orders_count),
+        }
+        for row in result.all()
+    ]
+
+
+async def get_hourly_orders(session: AsyncSession, date_from: date, date_to: date) -> list[dict]:
+    result = await session.execute(
+        select(AnalyticsHourly.hour, func.sum(AnalyticsHourly.orders_count))
+        .filter(AnalyticsHourly.day >= date_from, AnalyticsHourly.day <= date_to)
+        .group_by(AnalyticsHourly.hour)
+        .order_by(AnalyticsHourly.hour)
+    )
+    return [{"hour": hour, "orders_count": count} for hour, count in result.all()]
@@ -0,0 +1,71 @@
+from datetime import datetime, timezone
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models import Order, OrderArchive, OrderService, OrderServiceArchive
+
+# order_start_date нужна только внешнему ключу на секционированную orders
+ORDER_SERVICE_COLUMNS = (OrderService.id, OrderService.service_id, OrderService.order_id)
+
+
+async def archive_orders(session: AsyncSession, before: datetime, batch_size: int) -> int:
+    """
+    Переносит выполненные (status 0) и уведомленные заказы с end_date раньше
+    before вместе с их order_service в orders_archive и order_service_archive.
+    Возвращает число перенесенных заказов.
+
+    Пачками по batch_size, каждая — своя транзакция: DELETE ... RETURNING из
+    рабочих таблиц и многострочный INSERT тех же строк в архив. Прерванный
+    запуск просто продолжается следующим: перенесенные заказы уже не
+    выбираются, а пачка переносится целиком или никак.
+    """
+    archived = 0
+    while True:
+        # start_date <= end_date: условие отсекает секции orders новее before
+        order_ids = (
+            await session.scalars(
+                select(Order.id)
+                .where(
+                    Order.status == 0,
+                    Order.notified == True,
+                    Order.end_date < before,
+                    Order.start_date < before,
+                )
+                .order_by(Order.start_date, Order.id)
+                .limit(batch_size)
+                .with_for_update(skip_locked=True)
+            )
+        ).all()
+        if not order_ids:
+            return archived
+
+        lines = (
+            await session.execute(
+                delete(OrderService)
+                .where(OrderService.order_id.in_(order_ids))
+                .returning(*ORDER_SERVICE_COLUMNS)
+                .execution_options(synchronize_session=False)
+            )
+        ).mappings().all()
+        orders = (
+            await session.execute(
+                delete(Order)
+                .where(Order.id.in_(order_ids), Order.start_date < before)
+                .returning(*Order.__table__.c)
+                .execution_options(synchronize_session=False)
+            )
+        ).mappings().all()
+
+        archived_at = datetime.now(timezone.utc)
+        if orders:
+            await session.execute(
+                insert(OrderArchive), [{**order, "archived_at": archived_at} for order in orders]
+            )
+        if lines:
+            await session.execute(insert(OrderServiceArchive), [dict(line) for line in lines])
+        await session.commit()
+
+        archived += len(orders)
+        if len(order_ids) < batch_size:
+            return archived
@@ -0,0 +1,137 @@
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Iterable, Optional
+
+from fastapi import HTTPException
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.config import settings
+from core.models import Order, User
+from core.models.carwash import LOCAL_TIMEZONE
+from crud.carwash.service_catalog import service_catalog
+
+EMPLOYEE_ROLE_ID = 2
+
+Interval = tuple[datetime, datetime]
+
+
+def _utc(value: datetime) -> datetime:
+    # время без пояса считается UTC, как и в UTCDateTime
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def working_windows(day_from: date, days: int) -> list[Interval]:
+    """Рабочие часы каждого дня периода в UTC, по возрастанию."""
+    schedule = settings.schedule
+    windows = []
+    for offset in range(days):
+        day = day_from + timedelta(days=offset)
+        start = LOCAL_TIMEZONE.localize(datetime.combine(day, time(schedule.work_start_hour)))
+        end = LOCAL_TIMEZONE.localize(datetime.combine(day, time(schedule.work_end_hour)))
+        windows.append((start.astimezone(timezone.utc), end.astimezone(timezone.utc)))
+    return windows
+
+
+def free_intervals(busy: list[Interval], windows: list[Interval], duration: timedelta) -> list[Interval]:
+    """
+    Свободные промежутки не короче duration внутри windows.
+
+    busy — занятые интервалы работника, отсортированные по началу (могут
+    пересекаться). Один проход по busy и windows: O(n + m), без попарных
+    сравнений заказов.
+    """
+    result = []
+    first = 0
+    for window_start, window_end in windows:
+        # интервалы, закончившиеся до начала окна, дальше не понадобятся
+        while first < len(busy) and busy[first][1] <= window_start:
+            first += 1
+
+        free_from = window_start
+        index = first
+        while index < len(busy) and busy[index][0] < window_end:
+            busy_start, busy_end = busy[index]
+            if busy_start - free_from >= duration:
+                result.append((free_from, busy_start))
+            free_from = max(free_from, busy_end)
+            index += 1
+
+        if window_end - free_from >= duration:
+            result.append((free_from, window_end))
+    return result
+
+
+async def services_duration(session: AsyncSession, service_ids: Iterable[int]) -> timedelta:
+    services = await service_catalog.get_index(session)
+    missing = [service_id for service_id in service_ids if service_id not in services]
+    if missing:
+        raise HTTPException(status_code=404, detail=f"Services not found: {missing}")
+    return timedelta(seconds=sum(services[service_id].time.second for service_id in service_ids))
+
+
+async def get_availability(
+    session: AsyncSession,
+    day_from: date,
+    days: int,
+    duration: timedelta,
+    employee_ids: Optional[list[int]] = None,
+    now: Optional[datetime] = None,
+) -> list[dict]:
+    """
+    Свободные окна работников, в которые помещается работа длительностью
+    duration, с day_from на days дней в рабочие часы.
+
+    Два запроса: работники и их заказы, пересекающие период (по индексу
+    employee_id, start_date, уже отсортированные); окна считаются проходом
+    по отсортированным интервалам каждого работника.
+    """
+    if duration <= timedelta(0):
+        raise HTTPException(status_code=400, detail="Duration must be positive")
+
+    windows = working_windows(day_from, days)
+    # прошедшее время не предлагаем
+    now = _utc(now or datetime.now(timezone.utc))
+    windows = [(max(start, now), end) for start, end in windows if end > now]
+
+    employees_query = (
+        select(User.id, User.first_name, User.last_name)
+        .filter(User.role_id == EMPLOYEE_ROLE_ID, User.is_active.is_(True))
+        .order_by(User.id)
+    )
+    if employee_ids:
+        employees_query = employees_query.filter(User.id.in_(employee_ids))
+    employees = (await session.execute(employees_query)).all()
+
+    busy: dict[int, list[Interval]] = {employee.id: [] for employee in employees}
+    if busy and windows:
+        period_start, period_end = windows[0][0], windows[-1][1]
+        max_order = timedelta(hours=settings.schedule.max_order_hours)
+        result = await session.execute(
+            select(Order.employee_id, Order.start_date, Order.end_date)
+            .filter(
+                Order.employee_id.in_(busy.keys()),
+                Order.start_date < period_end,
+                Order.start_date > period_start - max_order,
+                Order.end_date > period_start,
+            )
+            .order_by(Order.employee_id, Order.start_date)
+        )
+        for employee_id, start_date, end_date in result:
+            busy[employee_id].append((start_date, end_date))
+
+    return [
+        {
+            "employee_id": employee.id,
+            "employee_name": f"{employee.first_name} {employee.last_name}",
+            "slots": [
+                {
+                    "start": start.astimezone(LOCAL_TIMEZONE),
+                    "end": end.astimezone(LOCAL_TIMEZONE),
+                }
+                for start, end in free_intervals(busy[employee.id], windows, duration)
+            ],
+        }
+        for employee in employees
+    ]
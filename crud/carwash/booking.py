@@ -0,0 +1,43 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.models.carwash import ORDER_DATES_CONSTRAINT, ORDER_OVERLAP_CONSTRAINT
+
+
+def is_overlap_violation(exc: IntegrityError) -> bool:
+    # Имя ограничения есть в тексте ошибки и у asyncpg, и у RAISE в триггере SQLite
+    return ORDER_OVERLAP_CONSTRAINT in str(exc.orig)
+
+
+def is_dates_violation(exc: IntegrityError) -> bool:
+    return ORDER_DATES_CONSTRAINT in str(exc.orig)
+
+
+@asynccontextmanager
+async def booking_conflicts(session: AsyncSession) -> AsyncIterator[None]:
+    """
+    Оборачивает изменения, которые двигают заказы во времени или меняют
+    работника. Пересечение с другим заказом работника отклоняет сама база —
+    без предварительного чтения расписания, — а здесь это превращается в 409,
+    а end_date раньше start_date — в 422.
+    Ошибка может прийти как при коммите, так и при autoflush внутри блока.
+    """
+    try:
+        yield
+    except IntegrityError as exc:
+        await session.rollback()
+        if is_overlap_violation(exc):
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="Работник уже занят в это время",
+            )
+        if is_dates_violation(exc):
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Дата окончания заказа раньше даты начала",
+            )
+        raise
@@ -4,15 +4,20 @@ from fastapi import HTTPException, Query
 from sqlalchemy import select, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.cache import invalidation_bus
 from core.models import Brand
 from core.schemas.carwash import BrandCreate, BrandUpdate
+from crud.carwash.catalog_version import CATALOG_VERSIONS_TOPIC, BRANDS, bump_catalog_version
+from crud.carwash.search import contains, relevance_order_by
 
 
 async def create_brand(session: AsyncSession, brand_create: BrandCreate) -> Brand:
     brand = Brand(**brand_create.dict())
     session.add(brand)
+    await bump_catalog_version(session, BRANDS)
     await session.commit()
     await session.refresh(brand)
+    await invalidation_bus.publish(session, CATALOG_VERSIONS_TOPIC)
     return brand
 
 async def get_brand(session: AsyncSession, brand_id: int) -> Brand:
@@ -22,26 +27,43 @@ async def get_brand(session: AsyncSession, brand_id: int) -> Brand:
     if not brand:
         raise ValueError("Brand not found")
     return brand
+BRAND_SORT_COLUMNS = {
+    "id": Brand.id,
+    "name": Brand.name,
+}
+
+
 async def get_filtered_brands(
     session: AsyncSession,
     name: Optional[str] = None,
-    sort_by: Optional[str] = Query("id", regex="^(id|name)$"),
+    sort_by: Optional[str] = Query("id", regex="^(id|name|relevance)$"),
     order: Optional[str] = Query("asc", regex="^(asc|desc)$"),
+    limit: Optional[int] = None,
+    page: int = 1,
 ) -> list[Brand]:
     stmt = select(Brand)
-    result = await session.execute(stmt)
-    brands = result.scalars().all()
 
     if name:
-        brands = [brand for brand in brands if name.lower() in brand.name.lower()]
+        stmt = stmt.filter(contains(Brand.name, name))
 
-    if sort_by:
-        if not hasattr(Brand, sort_by):
+    if sort_by == "relevance":
+        if name:
+            stmt = stmt.order_by(*relevance_order_by(session, Brand.name, name))
+        stmt = stmt.order_by(Brand.id)
+    elif sort_by:
+        sort_column = BRAND_SORT_COLUMNS.get(sort_by)
+        if sort_column is None:
             raise HTTPException(status_code=400, detail=f"Invalid sort_by value: {sort_by}")
-        reverse = order == "desc"
-        brands = sorted(brands, key=lambda brand: getattr(brand, sort_by), reverse=reverse)
+        if order == "desc":
+            stmt = stmt.order_by(sort_column.desc(), Brand.id.desc())
+        else:
+            stmt = stmt.order_by(sort_column.asc(), Brand.id.asc())
 
-    return brands
+    if limit is not None:
+        stmt = stmt.offset((page - 1) * limit).limit(limit)
+
+    result = await session.execute(stmt)
+    return list(result.scalars().all())
 
 async def update_brand(session: AsyncSession, brand_id: int, brand_update: BrandUpdate) -> Brand:
     stmt = select(Brand).filter(Brand.id == brand_id)
@@ -53,8 +75,10 @@ async def update_brand(session: AsyncSession, brand_id: int, brand_update: Brand
     for key, value in brand_update.dict(exclude_unset=True).items():
         setattr(brand, key, value)
 
+    await bump_catalog_version(session, BRANDS)
     await session.commit()
     await session.refresh(brand)
+    await invalidation_bus.publish(session, CATALOG_VERSIONS_TOPIC)
     return brand
 
 async def delete_brand(session: AsyncSession, brand_id: int) -> Brand:
@@ -65,5 +89,7 @@ async def delete_brand(session: AsyncSession, brand_id: int) -> Brand:
         raise ValueError("Brand not found")
 
     await session.delete(brand)
+    await bump_catalog_version(session, BRANDS)
     await session.commit()
+    await invalidation_bus.publish(session, CATALOG_VERSIONS_TOPIC)
     return brand
\ No newline at end of file
@@ -1,10 +1,15 @@
+from typing import Optional
+
 from fastapi import Depends, HTTPException
 from sqlalchemy import select, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload, selectinload
 
-from core.models import Car, db_helper
+from core.cache import invalidation_bus
+from core.models import Car, Brand, db_helper
 from core.schemas.carwash import CarUpdate, CarCreate, CarRead
+from crud.carwash.catalog_version import CATALOG_VERSIONS_TOPIC, CARS, bump_catalog_version
+from crud.carwash.search import contains, relevance_order_by
 
 
 # CRUD Operations for Car
@@ -12,6 +17,7 @@ from core.schemas.carwash import CarUpdate, CarCreate, CarRead
 async def create_car(session: AsyncSession, car_create: CarCreate) -> Car:
     car = Car(**car_create.dict())
     session.add(car)
+    await bump_catalog_version(session, CARS)
     await session.commit()
     await session.refresh(car)
 
@@ -21,6 +27,7 @@ async def create_car(session: AsyncSession, car_create: CarCreate) -> Car:
         .filter(Car.id == car.id)       
     )
     car_with_brand = result.scalars().first()
+    await invalidation_bus.publish(session, CATALOG_VERSIONS_TOPIC)
 
     return car_with_brand
 
@@ -36,12 +43,48 @@ async def create_car(session: AsyncSession, car_create: CarCreate) -> Car:
 #     stmt = select(Car).limit(limit)
 #     result = await session.execute(stmt)
 #     return result.scalars().all()
-async def get_cars(session: AsyncSession):
-    result = await session.execute(
-        select(Car).options(joinedload(Car.brand))
-    )
-    cars = result.scalars().all()
-    return cars
+CAR_SORT_COLUMNS = {
+    "id": Car.id,
+    "model": Car.model,
+}
+
+
+async def get_cars(
+    session: AsyncSession,
+    brand: Optional[str] = None,
+    model: Optional[str] = None,
+    sort_by: Optional[str] = "id",
+    order: Optional[str] = "asc",
+    limit: Optional[int] = None,
+    page: int = 1,
+) -> Sequence[Car]:
+    stmt = select(Car).options(joinedload(Car.brand))
+
+    if brand:
+        stmt = stmt.join(Brand, Car.brand_id == Brand.id).filter(contains(Brand.name, brand))
+    if model:
+        stmt = stmt.filter(contains(Car.model, model))
+
+    if sort_by == "relevance":
+        if model:
+            stmt = stmt.order_by(*relevance_order_by(session, Car.model, model))
+        elif brand:
+            stmt = stmt.order_by(*relevance_order_by(session, Brand.name, brand))
+        stmt = stmt.order_by(Car.id)
+    elif sort_by:
+        sort_column = CAR_SORT_COLUMNS.get(sort_by)
+        if sort_column is None:
+            raise HTTPException(status_code=400, detail=f"Invalid sort_by value: {sort_by}")
+        if order == "desc":
+            stmt = stmt.order_by(sort_column.desc(), Car.id.desc())
+        else:
+            stmt = stmt.order_by(sort_column.asc(), Car.id.asc())
+
+    if limit is not None:
+        stmt = stmt.offset((page - 1) * limit).limit(limit)
+
+    result = await session.execute(stmt)
+    return result.scalars().all()
 
 
 async def get_car(session: AsyncSession, car_id: int):
@@ -69,8 +112,10 @@ async def update_car(session: AsyncSession, car_id: int, car_update: CarUpdate)
     for key, value in car_update.dict(exclude_unset=True).items():
         setattr(car, key, value)
 
+    await bump_catalog_version(session, CARS)
     await session.commit()
     await session.refresh(car)
+    await invalidation_bus.publish(session, CATALOG_VERSIONS_TOPIC)
     return car
 
 async def delete_car(session: AsyncSession, car_id: int) -> Car:
@@ -81,7 +126,9 @@ async def delete_car(session: AsyncSession, car_id: int) -> Car:
         raise ValueError("Car not found")
 
     await session.delete(car)
+    await bump_catalog_version(session, CARS)
     await session.commit()
+    await invalidation_bus.publish(session, CATALOG_VERSIONS_TOPIC)
     return car
 
 
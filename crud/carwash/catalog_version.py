@@ -0,0 +1,161 @@
+import asyncio
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from time import monotonic
+from typing import Mapping, Optional
+
+from fastapi import Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache import invalidation_bus
+from core.config import settings
+from core.models import CatalogVersion, db_helper
+from crud.carwash.service_catalog import SERVICE_CATALOG_TOPIC
+
+CATALOG_VERSIONS_TOPIC = "catalog_versions"
+
+SERVICES = "services"
+BRANDS = "brands"
+CARS = "cars"
+
+Version = tuple[int, Optional[datetime]]
+
+
+def _utc(value: datetime) -> datetime:
+    # время без пояса считается UTC, как и в UTCDateTime
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+async def bump_catalog_version(session: AsyncSession, name: str) -> None:
+    """
+    Увеличивает версию справочника. Вызывается в той же транзакции, что и
+    изменение; после commit нужно опубликовать сброс в invalidation_bus.
+    """
+    dialect = postgresql if session.bind.dialect.name == "postgresql" else sqlite
+    stmt = dialect.insert(CatalogVersion).values(
+        name=name, version=1, updated_at=datetime.now(timezone.utc)
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[CatalogVersion.name],
+        set_={
+            "version": CatalogVersion.__table__.c.version + 1,
+            "updated_at": stmt.excluded.updated_at,
+        },
+    )
+    await session.execute(stmt)
+
+
+class CatalogVersions:
+    """
+    Версии справочников в памяти воркера: проверка If-None-Match обходится
+    без запроса к базе. Сбрасываются вместе с кэшем услуг и по теме
+    catalog_versions (бренды и машины).
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._versions: Optional[dict[str, Version]] = None
+        self._expires_at = 0.0
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        self._generation += 1
+        self._versions = None
+
+    async def get(self, session: AsyncSession) -> Mapping[str, Version]:
+        versions = self._versions
+        if versions is not None and self._expires_at > monotonic():
+            return versions
+
+        async with self._lock:
+            versions = self._versions
+            if versions is not None and self._expires_at > monotonic():
+                return versions
+
+            generation = self._generation
+            result = await session.execute(
+                select(CatalogVersion.name, CatalogVersion.version, CatalogVersion.updated_at)
+            )
+            versions = {
+                name: (version, _utc(updated_at) if updated_at else None)
+                for name, version, updated_at in result
+            }
+            # Если во время загрузки пришел сброс, версии могли устареть — не сохраняем
+            if generation == self._generation:
+                self._versions = versions
+                self._expires_at = monotonic() + self.ttl
+            return versions
+
+
+catalog_versions = CatalogVersions(ttl=settings.cache.catalog_versions_ttl)
+invalidation_bus.subscribe(CATALOG_VERSIONS_TOPIC, catalog_versions.invalidate)
+invalidation_bus.subscribe(SERVICE_CATALOG_TOPIC, catalog_versions.invalidate)
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match сравнивается слабо: W/"x" совпадает с "x"
+    if if_none_match.strip() == "*":
+        return True
+    return any(
+        candidate.strip().removeprefix("W/") == etag
+        for candidate in if_none_match.split(",")
+    )
+
+
+def _not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        # При наличии If-None-Match заголовок If-Modified-Since игнорируется
+        return _etag_matches(if_none_match, etag)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since is None or last_modified is None:
+        return False
+    try:
+        since = parsedate_to_datetime(if_modified_since)
+    except (TypeError, ValueError):
+        return False
+    if since.tzinfo is None:
+        return False
+    return last_modified.replace(microsecond=0) <= since
+
+
+def catalog_etag(*names: str):
+    """
+    Зависимость для GET справочника. Строит сильный ETag из версий names
+    (для машин — вместе с версией брендов, они входят в ответ) и отвечает
+    304, если клиент прислал тот же ETag — до запроса данных и сериализации.
+    В остальных случаях добавляет ETag и Last-Modified к ответу.
+
+    В эндпоинте объявляется после проверки доступа, чтобы 304 не отдавался
+    без авторизации.
+    """
+
+    async def dependency(
+        request: Request,
+        response: Response,
+        session: AsyncSession = Depends(db_helper.session_getter),
+    ) -> None:
+        versions = await catalog_versions.get(session)
+        current = [versions.get(name, (0, None)) for name in names]
+
+        etag = '"' + "-".join(
+            f"{name}.{version}" for name, (version, _) in zip(names, current)
+        ) + '"'
+        modified = [updated_at for _, updated_at in current if updated_at is not None]
+        last_modified = max(modified) if modified else None
+
+        headers = {"ETag": etag, "Cache-Control": "no-cache"}
+        if last_modified is not None:
+            headers["Last-Modified"] = format_datetime(last_modified, usegmt=True)
+
+        if _not_modified(request, etag, last_modified):
+            raise HTTPException(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+        response.headers.update(headers)
+
+    return dependency
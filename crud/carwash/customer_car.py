@@ -5,8 +5,9 @@ from sqlalchemy import select, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
-from core.models import Customer_Car, Car
+from core.models import Customer_Car, Car, User
 from core.schemas.carwash import CustomerCarCreate, CustomerCarUpdate
+from crud.carwash.search import contains
 
 
 # CRUD Operations for Customer_Car
@@ -29,12 +30,21 @@ async def create_customer_car(session: AsyncSession, customer_car_create: Custom
     return customer_car_with_details
 
 
+CUSTOMER_CAR_SORT_COLUMNS = {
+    "id": (Customer_Car.id,),
+    "car_model": (Car.model,),
+    "customer_name": (User.last_name, User.first_name),
+}
+
+
 async def get_customer_cars(
     session: AsyncSession,
     user_id: int,
     car_model: Optional[str] = None,
     sort_by: Optional[str] = "id",
-    order: Optional[str] = "asc"
+    order: Optional[str] = "asc",
+    limit: Optional[int] = None,
+    page: int = 1,
 ) -> Sequence[Customer_Car]:
     query = select(Customer_Car).options(
         joinedload(Customer_Car.car).joinedload(Car.brand),
@@ -45,20 +55,28 @@ async def get_customer_cars(
     query = query.filter(Customer_Car.customer_id == user_id)
 
 
+    if car_model or sort_by == "car_model":
+        query = query.join(Car, Customer_Car.car_id == Car.id)
     if car_model:
-        query = query.join(Car).filter(Car.model.ilike(f"%{car_model}%"))
-
-    result = await session.execute(query)
-    customer_cars = result.scalars().all()
+        query = query.filter(contains(Car.model, car_model))
 
     if sort_by:
-        if not hasattr(Customer_Car, sort_by):
+        sort_columns = CUSTOMER_CAR_SORT_COLUMNS.get(sort_by)
+        if sort_columns is None:
             raise HTTPException(status_code=400, detail=f"Invalid sort_by value: {sort_by}")
+        if sort_by == "customer_name":
+            query = query.join(User, Customer_Car.customer_id == User.id)
+
+        if order == "desc":
+            query = query.order_by(*(column.desc() for column in sort_columns), Customer_Car.id.desc())
+        else:
+            query = query.order_by(*(column.asc() for column in sort_columns), Customer_Car.id.asc())
 
-        reverse = order == "desc"
-        customer_cars = sorted(customer_cars, key=lambda car: getattr(car, sort_by), reverse=reverse)
+    if limit is not None:
+        query = query.offset((page - 1) * limit).limit(limit)
 
-    return customer_cars
+    result = await session.execute(query)
+    return result.scalars().all()
 
 
 
@@ -1,66 +1,166 @@
 from datetime import datetime
 from http.client import HTTPException
-from typing import Optional, List, Awaitable, Callable
+from typing import Optional, List, Awaitable, Callable, AsyncIterator
 
 import pytz
 from fastapi import Depends
-from sqlalchemy import select, Sequence, or_
+from sqlalchemy import select, Sequence, or_, union_all
 from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm import selectinload, joinedload
+from sqlalchemy.orm import selectinload, joinedload, aliased
 from fastapi import HTTPException
 
-from api.api_v1.fastapi_users import fastapi_users
-from core.models import Order, OrderService, Customer_Car
+from core.models import Order, OrderService, Customer_Car, Car, OrderArchive, OrderServiceArchive
 from core.models.users import  User
 from core.schemas.carwash import OrderCreate, OrderUpdate, ServiceRead, OrderRead
+from crud.carwash.analytics import mark_days_dirty
+from crud.carwash.booking import booking_conflicts
+from crud.carwash.pagination import decode_cursor, encode_cursor, keyset_filter, keyset_order_by
+from crud.carwash.service_catalog import service_catalog
+from crud.carwash.visibility import order_visible_to
 
 
 async def create_order(session: AsyncSession, order_create: OrderCreate):
     order = Order(**order_create.dict())
-    session.add(order)
-    await session.commit()
+    async with booking_conflicts(session):
+        session.add(order)
+        await mark_days_dirty(session, [order.start_date])
+        await session.commit()
     await session.refresh(order)
     return order
 
 async def get_order(session: AsyncSession, order_id: int, user: User) -> Order:
+    # Одним запросом получаем и заказ, и признак видимости: отсутствие строки
+    # означает 404, строка с visible = false — 403
+    query = (
+        select(Order, order_visible_to(user).label("visible"))
+        .filter(Order.id == order_id)
+        .options(
+            selectinload(Order.order_services),
+            joinedload(Order.customer_car).joinedload(Customer_Car.car),
+            joinedload(Order.employee),
+            joinedload(Order.administrator),
+        )
+    )
 
-    base_query = select(Order).filter(Order.id == order_id)
-    result = await session.execute(base_query)
-    order = result.scalars().first()
+    result = await session.execute(query)
+    row = result.unique().first()
 
-    if not order:
+    if row is None:
         raise HTTPException(status_code=404, detail="Заказ не найден")
 
+    order, visible = row
+    if not visible:
+        raise HTTPException(status_code=403, detail="У вас недостаточно прав для просмотра")
+
+    return order
 
-    if user.role_id == 1:
-        query = base_query
+
+
+ORDER_SORT_COLUMNS = {
+    "id": Order.id,
+    "start_date": Order.start_date,
+}
+
+krasnoyarsk_tz = pytz.timezone("Asia/Krasnoyarsk")
+
+
+def _filter_orders(
+        query,
+        orders,
+        user: Optional[User],
+        status: Optional[int] = None,
+        start_from: Optional[datetime] = None,
+        start_to: Optional[datetime] = None,
+):
+    # orders — Order или OrderArchive; без user видимость не проверяется.
+    # Условия на start_date позволяют Postgres читать только нужные секции orders
+    if user is not None:
+        query = query.filter(order_visible_to(user, orders))
+    if status is not None:
+        query = query.filter(orders.status == status)
+    if start_from is not None:
+        query = query.filter(orders.start_date >= start_from)
+    if start_to is not None:
+        query = query.filter(orders.start_date < start_to)
+    return query
+
+
+def _paginate(query, sort_column, id_column, limit: int, page: int, sort_by: str, order: str, cursor: Optional[str]):
+    if cursor is not None:
+        value, last_id = decode_cursor(cursor, sort_by, order)
+        query = query.filter(keyset_filter(sort_column, id_column, value, last_id, order))
     else:
-        query = base_query.filter(
-            or_(
-                Order.employee_id == user.id,
-                Order.administrator_id == user.id,
-                Order.customer_car_id.in_(
-                    select(Customer_Car.id).filter(Customer_Car.customer_id == user.id)
-                ),
-            )
-        )
+        query = query.offset((page - 1) * limit)
 
-    query = query.options(
-        joinedload(Order.order_services).joinedload(OrderService.service),
-        joinedload(Order.customer_car).joinedload(Customer_Car.car),
-        joinedload(Order.employee),
-        joinedload(Order.administrator),
-    )
+    # Берем на одну запись больше, чтобы понять, есть ли следующая страница
+    return query.order_by(*keyset_order_by(sort_column, id_column, order)).limit(limit + 1)
 
-    result = await session.execute(query)
-    order = result.scalars().first()
 
-    if not order:
-        raise HTTPException(status_code=403, detail="У вас недостаточно прав для просмотра")
+def _check_sort_by(sort_by: str) -> None:
+    if sort_by not in ORDER_SORT_COLUMNS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort_by value: {sort_by}")
 
-    return order
 
+def _paginate_orders(
+        query,
+        user: User,
+        limit: int,
+        page: int,
+        sort_by: str,
+        order: str,
+        status: Optional[int],
+        cursor: Optional[str],
+        start_from: Optional[datetime] = None,
+        start_to: Optional[datetime] = None,
+):
+    # Видимость, фильтры по статусу и start_date, сортировка и пагинация —
+    # общие для полного и облегченного списка заказов
+    _check_sort_by(sort_by)
+    query = _filter_orders(query, Order, user, status, start_from, start_to)
+    return _paginate(query, ORDER_SORT_COLUMNS[sort_by], Order.id, limit, page, sort_by, order, cursor)
+
+
+def _paginate_order_history(
+        user: User,
+        limit: int,
+        page: int,
+        sort_by: str,
+        order: str,
+        status: Optional[int],
+        cursor: Optional[str],
+        start_from: Optional[datetime] = None,
+        start_to: Optional[datetime] = None,
+):
+    # То же по рабочим и архивным заказам: фильтры — в каждой части UNION ALL,
+    # сортировка и пагинация — поверх него
+    _check_sort_by(sort_by)
+    rows = union_all(*(
+        _filter_orders(_order_rows_query(orders), orders, user, status, start_from, start_to)
+        for orders in (Order, OrderArchive)
+    )).subquery()
+    return _paginate(select(rows), rows.c[sort_by], rows.c.id, limit, page, sort_by, order, cursor)
+
+
+def _split_page(rows: list, limit: int, sort_by: str, order: str, key: Callable) -> tuple[list, Optional[str]]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    value, last_id = key(rows[-1])
+    return rows, encode_cursor(sort_by, order, value, last_id)
+
+
+async def _check_not_empty(session: AsyncSession, rows: list, user: User, include_archived: bool = False) -> None:
+    # 403, если пользователю не виден ни один заказ — при любых фильтрах и
+    # странице; пустая страница при видимых заказах — просто []
+    if rows:
+        return
+    tables = (Order, OrderArchive) if include_archived else (Order,)
+    for orders in tables:
+        visible = select(orders.id).where(order_visible_to(user, orders)).limit(1)
+        if await session.scalar(visible) is not None:
+            return
+    raise HTTPException(status_code=403, detail="Нет доступных закзаов для данного пользователя")
 
 
 async def get_orders(
@@ -71,59 +171,223 @@ async def get_orders(
         sort_by: Optional[str] = "id",
         order: Optional[str] = "asc",
         status: Optional[int] = None,
-
-) -> List[Order]:
-
-
-    if user.role_id == 1:
-        query = select(Order)
-    else:
-
-        query = select(Order).filter(
-            or_(
-                Order.employee_id == user.id,
-                Order.administrator_id == user.id,
-                Order.customer_car_id.in_(
-                    select(Customer_Car.id).filter(Customer_Car.customer_id == user.id)
-                ),
-            )
-        )
-    result = await session.execute(query)
-    orders = result.scalars().all()
-
-    if not orders:
-        raise HTTPException(status_code=403, detail="Нет доступных закзаов для данного пользователя")
+        cursor: Optional[str] = None,
+        start_from: Optional[datetime] = None,
+        start_to: Optional[datetime] = None,
+) -> tuple[List[Order], Optional[str]]:
+    """
+    Возвращает страницу заказов и курсор следующей страницы (или None).
+
+    Видимость, фильтр по статусу, сортировка и пагинация выполняются одним
+    запросом. Если передан cursor, используется keyset-пагинация и page
+    игнорируется. start_from/start_to ограничивают start_date (start_to не
+    включается).
+    """
+    sort_by = sort_by or "id"
+    order = order or "asc"
 
     query = select(Order).options(
         joinedload(Order.employee),
         joinedload(Order.administrator),
         joinedload(Order.customer_car).joinedload(Customer_Car.car),
-        joinedload(Order.order_services).joinedload(OrderService.service),
+        selectinload(Order.order_services),
     )
+    query = _paginate_orders(query, user, limit, page, sort_by, order, status, cursor, start_from, start_to)
 
-    if status is not None:
-        query = query.filter(Order.status == status)
+    result = await session.execute(query)
+    orders = list(result.scalars().all())
+    await _check_not_empty(session, orders, user)
 
-    query = query.filter(Order.id.in_([order.id for order in orders]))
+    return _split_page(
+        orders, limit, sort_by, order, key=lambda last: (getattr(last, sort_by), last.id)
+    )
 
-    query = query.offset((page - 1) * limit).limit(limit)
 
-    try:
+def _local_time(value: Optional[datetime]) -> Optional[datetime]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = pytz.utc.localize(value)
+    return value.astimezone(krasnoyarsk_tz)
+
+
+def _full_name(first_name: Optional[str], last_name: Optional[str]) -> Optional[str]:
+    if first_name is None and last_name is None:
+        return None
+    return f"{first_name} {last_name}"
+
+
+def _order_rows_query(orders=Order):
+    # Колонки заказа в порядке, который ожидает _order_row; orders — Order
+    # или OrderArchive
+    employee = aliased(User)
+    administrator = aliased(User)
+    return (
+        select(
+            orders.id,
+            orders.status,
+            orders.start_date,
+            orders.end_date,
+            orders.administrator_id,
+            orders.customer_car_id,
+            orders.employee_id,
+            orders.total_price,
+            orders.total_time_minutes,
+            Car.model,
+            employee.first_name,
+            employee.last_name,
+            administrator.first_name,
+            administrator.last_name,
+        )
+        .outerjoin(employee, orders.employee_id == employee.id)
+        .outerjoin(administrator, orders.administrator_id == administrator.id)
+        .outerjoin(Customer_Car, orders.customer_car_id == Customer_Car.id)
+        .outerjoin(Car, Customer_Car.car_id == Car.id)
+    )
+
+
+async def _order_services_payload(
+        session: AsyncSession,
+        order_ids: List[int],
+        include_archived: bool = False,
+) -> dict[int, list]:
+    # Услуги заказов одним запросом, сами услуги — из service_catalog
+    order_services: dict[int, list] = {order_id: [] for order_id in order_ids}
+    if order_services:
+        query = (
+            select(OrderService.order_id, OrderService.service_id)
+            .filter(OrderService.order_id.in_(order_services.keys()))
+            .order_by(OrderService.id)
+        )
+        if include_archived:
+            lines = union_all(*(
+                select(table.id, table.order_id, table.service_id)
+                .filter(table.order_id.in_(order_services.keys()))
+                for table in (OrderService, OrderServiceArchive)
+            )).subquery()
+            query = select(lines.c.order_id, lines.c.service_id).order_by(lines.c.id)
         result = await session.execute(query)
-    except Exception as e:
-        raise HTTPException(status_code=400, detail=str(e))
+        services = await service_catalog.get_payload_index(session)
+        for order_id, service_id in result:
+            service = services.get(service_id)
+            if service is not None:
+                order_services[order_id].append(service)
+    return order_services
+
+
+def _order_row(row, services: list) -> dict:
+    return {
+        "id": row[0],
+        "status": row[1],
+        "start_date": _local_time(row[2]),
+        "end_date": _local_time(row[3]),
+        "administrator_id": row[4],
+        "customer_car_id": row[5],
+        "employee_id": row[6],
+        "services": services,
+        "car": row[9],
+        "employee_name": _full_name(row[10], row[11]),
+        "administrator_name": _full_name(row[12], row[13]),
+        "total_price": row[7],
+        "total_time_minutes": row[8],
+    }
+
+
+async def get_orders_lean(
+        user: User,
+        session: AsyncSession,
+        limit: int = 10,
+        page: int = 1,
+        sort_by: Optional[str] = "id",
+        order: Optional[str] = "asc",
+        status: Optional[int] = None,
+        cursor: Optional[str] = None,
+        start_from: Optional[datetime] = None,
+        start_to: Optional[datetime] = None,
+        include_archived: bool = False,
+) -> tuple[List[dict], Optional[str]]:
+    """
+    То же, что get_orders, но без ORM-объектов: выбираются только нужные
+    колонки, результат — готовые к orjson словари в формате OrderRead.
+
+    Два запроса: страница заказов с именами и моделью машины и id услуг
+    этих заказов; сами услуги берутся из service_catalog. С include_archived
+    в список попадают и заказы из orders_archive.
+    """
+    sort_by = sort_by or "id"
+    order = order or "asc"
+
+    if include_archived:
+        query = _paginate_order_history(
+            user, limit, page, sort_by, order, status, cursor, start_from, start_to
+        )
+    else:
+        query = _paginate_orders(
+            _order_rows_query(), user, limit, page, sort_by, order, status, cursor, start_from, start_to
+        )
+
+    rows = (await session.execute(query)).all()
+    await _check_not_empty(session, rows, user, include_archived)
+    rows, next_cursor = _split_page(
+        rows, limit, sort_by, order, key=lambda last: (getattr(last, sort_by), last.id)
+    )
+
+    order_services = await _order_services_payload(session, [row[0] for row in rows], include_archived)
+    orders = [_order_row(row, order_services[row[0]]) for row in rows]
+    return orders, next_cursor
 
-    orders = result.unique().scalars().all()
 
+async def get_archived_order(session: AsyncSession, order_id: int, user: User) -> dict:
+    # Заказ из orders_archive в формате get_orders_lean; 404/403 как в get_order
+    row = (
+        await session.execute(
+            _order_rows_query(OrderArchive)
+            .add_columns(order_visible_to(user, OrderArchive).label("visible"))
+            .filter(OrderArchive.id == order_id)
+        )
+    ).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="Заказ не найден")
+    if not row.visible:
+        raise HTTPException(status_code=403, detail="У вас недостаточно прав для просмотра")
+
+    order_services = await _order_services_payload(session, [order_id], include_archived=True)
+    return _order_row(row, order_services[order_id])
 
-    if sort_by:
-        if not hasattr(Order, sort_by):
-            raise HTTPException(status_code=400, detail=f"Invalid sort_by value: {sort_by}")
 
-        reverse = order == "desc"
-        orders = sorted(orders, key=lambda order: getattr(order, sort_by), reverse=reverse)
+async def stream_orders(
+        session: AsyncSession,
+        start_from: Optional[datetime] = None,
+        start_to: Optional[datetime] = None,
+        batch_size: int = 1000,
+        include_archived: bool = False,
+) -> AsyncIterator[List[dict]]:
+    """
+    Все заказы (start_from <= start_date < start_to) пачками по batch_size
+    в формате get_orders_lean, по порядку start_date, id; с include_archived —
+    вместе с orders_archive.
+
+    Строки читаются серверным курсором (yield_per), поэтому в памяти
+    одновременно находится только одна пачка.
+    """
+    if include_archived:
+        rows = union_all(*(
+            _filter_orders(_order_rows_query(orders), orders, None, start_from=start_from, start_to=start_to)
+            for orders in (Order, OrderArchive)
+        )).subquery()
+        query = select(rows).order_by(rows.c.start_date, rows.c.id)
+    else:
+        query = _filter_orders(_order_rows_query(), Order, None, start_from=start_from, start_to=start_to)
+        query = query.order_by(Order.start_date, Order.id)
+    query = query.execution_options(yield_per=batch_size)
 
-    return orders
+    result = await session.stream(query)
+    try:
+        async for rows in result.partitions():
+            order_services = await _order_services_payload(session, [row[0] for row in rows], include_archived)
+            yield [_order_row(row, order_services[row[0]]) for row in rows]
+    finally:
+        await result.close()
 
 async def update_order(session: AsyncSession, order_id: int, order_update: OrderUpdate) -> Order:
 
@@ -137,10 +401,14 @@ async def update_order(session: AsyncSession, order_id: int, order_update: Order
     if order.end_date < now:
         raise HTTPException(status_code=400, detail=f"Ты не можешь обновить выполненный заказ!")
 
-    for key, value in order_update.dict(exclude_unset=True).items():
-        setattr(order, key, value)
+    # при переносе заказа пересчитываются оба дня
+    old_start_date = order.start_date
+    async with booking_conflicts(session):
+        for key, value in order_update.dict(exclude_unset=True).items():
+            setattr(order, key, value)
 
-    await session.commit()
+        await mark_days_dirty(session, [old_start_date, order.start_date])
+        await session.commit()
     await session.refresh(order)
     return order
 
@@ -152,6 +420,7 @@ async def delete_order(session: AsyncSession, order_id: int) -> Order:
     if not order:
         raise ValueError("Заказ не найден")
 
+    await mark_days_dirty(session, [order.start_date])
     await session.delete(order)
     await session.commit()
     return order
@@ -0,0 +1,78 @@
+import codecs
+import csv
+import io
+from datetime import datetime
+from typing import AsyncIterator, Optional
+
+import orjson
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from crud.carwash.order import stream_orders
+
+EXPORT_MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+}
+
+CSV_COLUMNS = (
+    "id",
+    "status",
+    "start_date",
+    "end_date",
+    "car",
+    "customer_car_id",
+    "employee_id",
+    "employee_name",
+    "administrator_id",
+    "administrator_name",
+    "services",
+    "total_price",
+    "total_time_minutes",
+)
+
+
+def _ndjson_batch(orders: list[dict]) -> bytes:
+    return b"".join(orjson.dumps(order) + b"\n" for order in orders)
+
+
+def _csv_row(order: dict) -> list:
+    row = dict(order)
+    row["start_date"] = order["start_date"].isoformat() if order["start_date"] else None
+    row["end_date"] = order["end_date"].isoformat() if order["end_date"] else None
+    row["services"] = "; ".join(service["name"] for service in order["services"])
+    return [row[column] for column in CSV_COLUMNS]
+
+
+def _csv_batch(orders: list[dict], header: bool = False) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(CSV_COLUMNS)
+    writer.writerows(_csv_row(order) for order in orders)
+    return buffer.getvalue().encode()
+
+
+async def export_orders(
+    session_factory: async_sessionmaker[AsyncSession],
+    export_format: str = "ndjson",
+    start_from: Optional[datetime] = None,
+    start_to: Optional[datetime] = None,
+    batch_size: int = 1000,
+    include_archived: bool = False,
+) -> AsyncIterator[bytes]:
+    """
+    Тело ответа выгрузки заказов: по одному куску байт на пачку.
+
+    Сессия открывается здесь, а не берется из зависимости: зависимость
+    закрывается до того, как StreamingResponse начнет читать генератор.
+    """
+    async with session_factory() as session:
+        if export_format == "csv":
+            # BOM, чтобы Excel открывал кириллицу без перекодировки
+            yield codecs.BOM_UTF8 + _csv_batch([], header=True)
+
+        async for orders in stream_orders(session, start_from, start_to, batch_size, include_archived):
+            if export_format == "csv":
+                yield _csv_batch(orders)
+            else:
+                yield _ndjson_batch(orders)
@@ -19,8 +19,12 @@ logger = logging.getLogger(__name__)
 from fastapi import HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from core.models import OrderService, Order, Service
+from sqlalchemy import insert, update, func
+from core.models import OrderService, Order, Service, User
 from core.schemas.carwash import OrderServiceCreate
+from crud.carwash.analytics import mark_days_dirty
+from crud.carwash.booking import booking_conflicts
+from crud.carwash.visibility import order_visible_to
 import pytz
 from datetime import datetime, timedelta
 import logging
@@ -28,28 +32,81 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _shift_order_totals(order: Order, services, sign: int = 1) -> None:
+    # sign=1 — услуги добавлены в заказ, sign=-1 — убраны из него
+    order.total_price += sign * sum(service.convert_price(service.price) for service in services)
+    order.total_time_minutes += sign * sum(service.convert_time(service.time) for service in services)
+    total_time = timedelta(seconds=sum(service.time for service in services))
+    order.end_date = (order.end_date or order.start_date) + sign * total_time
+
+
+def order_totals_values() -> dict:
+    """
+    Значения total_price / total_time_minutes, посчитанные в SQL по
+    order_service заказа — для массового пересчета через UPDATE orders.
+    """
+    def total(expression):
+        return (
+            select(func.coalesce(func.sum(expression), 0))
+            .select_from(OrderService)
+            .join(Service, OrderService.service_id == Service.id)
+            .where(OrderService.order_id == Order.id)
+            .scalar_subquery()
+        )
+
+    return {
+        "total_price": total(Service.price // 100),
+        "total_time_minutes": total(Service.time // 60),
+    }
+
+
+async def recompute_order_totals(session: AsyncSession, service_id: int) -> None:
+    # После изменения цены или времени услуги пересчитываем итоги всех заказов с ней
+    stmt = (
+        update(Order)
+        .where(Order.id.in_(select(OrderService.order_id).where(OrderService.service_id == service_id)))
+        .values(**order_totals_values())
+        .execution_options(synchronize_session=False)
+    )
+    await session.execute(stmt)
+
+
 async def create_order_services(session: AsyncSession, order_service_create: OrderServiceCreate):
     # Шаг 1: Проверка заказа
-    stmt_order = select(Order).filter(Order.id == order_service_create.order_id)
+    stmt_order = select(Order).filter(Order.id == order_service_create.order_id).with_for_update()
     result_order = await session.execute(stmt_order)
     order = result_order.scalars().first()
 
     if not order:
         return [{"error": "order_not_found", "message": "Order not found"}]
 
+    service_ids = order_service_create.service_ids
+
+    # Шаг 2: Все запрошенные услуги одним запросом
+    result_services = await session.execute(
+        select(Service).filter(Service.id.in_(set(service_ids)))
+    )
+    services = {service.id: service for service in result_services.scalars().all()}
+
+    # Шаг 3: Услуги, которые уже есть в заказе, одним запросом
+    result_existing = await session.execute(
+        select(OrderService.service_id).filter(
+            OrderService.order_id == order.id,
+            OrderService.service_id.in_(services.keys()),
+        )
+    )
+    attached_ids = set(result_existing.scalars().all())
+
     results = []
+    new_services = []
 
-    for service_id in order_service_create.service_ids:
-        # Шаг 2: Проверка услуги
-        stmt_service = select(Service).filter(Service.id == service_id)
-        result_service = await session.execute(stmt_service)
-        service = result_service.scalars().first()
+    for service_id in service_ids:
+        service = services.get(service_id)
 
         if not service:
             results.append({"error": "service_not_found", "service_id": service_id, "message": "Service not found"})
             continue
 
-        # Шаг 3: Проверка статуса заказа
         if order.status == 0:
             results.append({
                 "error": "Статус == 0",
@@ -58,77 +115,93 @@ async def create_order_services(session: AsyncSession, order_service_create: Ord
             })
             continue
 
-        # Шаг 4: Проверка на дублирование услуги
-        stmt_existing_service = select(OrderService).filter(
-            OrderService.order_id == order_service_create.order_id,
-            OrderService.service_id == service_id
-        )
-        result_existing_service = await session.execute(stmt_existing_service)
-        existing_service = result_existing_service.scalars().first()
-
-        if existing_service:
+        # Повтор ловим и среди уже добавленных, и внутри самого запроса
+        if service_id in attached_ids:
             results.append({
                 "error": "Повтороное добавление услуги",
                 "service_id": service_id,
-                "message": f"Услуга '{existing_service.service.name}' уже есть в заказе"
+                "message": f"Услуга '{service.name}' уже есть в заказе"
             })
             continue
 
-        # Шаг 5: Добавление услуги в OrderService
-        order_service = OrderService(service_id=service_id, order_id=order_service_create.order_id)
-        session.add(order_service)
-
-        # Шаг 6: Обновление даты окончания заказа
-        if order.end_date:
-            order.end_date += timedelta(seconds=service.time)
-        else:
-            order.end_date = order.start_date + timedelta(seconds=service.time)
+        attached_ids.add(service_id)
+        new_services.append(service)
+        # место в ответе резервируется, чтобы результаты шли в порядке service_ids
+        results.append(None)
+
+    # Сдвиг end_date может наложить заказ на следующий заказ работника
+    async with booking_conflicts(session):
+        if new_services:
+            # Шаг 4: Один многострочный INSERT ... RETURNING
+            created = await session.scalars(
+                insert(OrderService).returning(OrderService, sort_by_parameter_order=True),
+                [
+                    {"service_id": service.id, "order_id": order.id, "order_start_date": order.start_date}
+                    for service in new_services
+                ],
+            )
+            free = (index for index, result in enumerate(results) if result is None)
+            for index, order_service in zip(free, created.all()):
+                results[index] = {"success": True, "data": order_service}
+
+            # Шаг 5: Итоги и дата окончания сдвигаются один раз на все новые услуги
+            _shift_order_totals(order, new_services)
+            await mark_days_dirty(session, [order.start_date])
+
+        await session.commit()
 
-        session.add(order)
-        await session.flush()  # Обновляем объект, чтобы получить id
-
-        results.append({"success": True, "data": order_service})
-
-    await session.commit()
+    return results
 
-    # Обновляем состояние заказа и услуг
-    await session.refresh(order)
+ORDER_SERVICE_SORT_COLUMNS = {
+    "id": OrderService.id,
+    "order_id": OrderService.order_id,
+    "service_name": Service.name,
+}
 
-    for result in results:
-        if "data" in result:
-            await session.refresh(result["data"])
 
-    return results
-
-async def get_order_service(session: AsyncSession, order_service_id: int) -> OrderService:
-    stmt = select(OrderService).filter(OrderService.id == order_service_id)
+async def get_order_service(session: AsyncSession, order_service_id: int, user: User) -> Optional[OrderService]:
+    stmt = (
+        select(OrderService)
+        .join(Order, OrderService.order_id == Order.id)
+        .filter(OrderService.id == order_service_id, order_visible_to(user))
+    )
     result = await session.execute(stmt)
-    order_service = result.scalars().first()
-    if not order_service:
-        raise ValueError("OrderService not found")
-    return order_service
+    return result.scalars().first()
 
 async def get_order_services(
     session: AsyncSession,
-    orders: list[OrderService],
+    user: User,
     order_id: Optional[int] = None,
     sort_by: Optional[str] = "id",
-    order: Optional[str] = "asc"
+    order: Optional[str] = "asc",
+    limit: int = 10,
+    page: int = 1,
 ) -> Sequence[OrderService]:
-    order_services = orders
+    sort_column = ORDER_SERVICE_SORT_COLUMNS.get(sort_by or "id")
+    if sort_column is None:
+        raise HTTPException(status_code=400, detail=f"Invalid sort_by value: {sort_by}")
+
+    stmt = (
+        select(OrderService)
+        .join(Order, OrderService.order_id == Order.id)
+        .filter(order_visible_to(user))
+    )
 
     if order_id is not None:
-        order_services = [service for service in order_services if service.order_id == order_id]
+        stmt = stmt.filter(OrderService.order_id == order_id)
 
-    if sort_by:
+    if sort_column is Service.name:
+        stmt = stmt.join(Service, OrderService.service_id == Service.id)
 
-        if not hasattr(OrderService, sort_by):
-            raise HTTPException(status_code=400, detail=f"Invalid sort_by value: {sort_by}")
+    if order == "desc":
+        stmt = stmt.order_by(sort_column.desc(), OrderService.id.desc())
+    else:
+        stmt = stmt.order_by(sort_column.asc(), OrderService.id.asc())
 
-        reverse = order == "desc"
-        order_services = sorted(order_services, key=lambda service: getattr(service, sort_by), reverse=reverse)
+    stmt = stmt.offset((page - 1) * limit).limit(limit)
 
-    return order_services
+    result = await session.execute(stmt)
+    return result.scalars().all()
 
 async def update_order_service(session: AsyncSession, order_service_id: int, order_service_update: OrderServiceUpdate) -> OrderService:
     stmt = select(OrderService).filter(OrderService.id == order_service_id)
@@ -137,10 +210,30 @@ async def update_order_service(session: AsyncSession, order_service_id: int, ord
     if not order_service:
         raise ValueError("OrderService not found")
 
-    for key, value in order_service_update.dict(exclude_unset=True).items():
-        setattr(order_service, key, value)
-
-    await session.commit()
+    old_order_id, old_service_id = order_service.order_id, order_service.service_id
+
+    async with booking_conflicts(session):
+        for key, value in order_service_update.dict(exclude_unset=True).items():
+            setattr(order_service, key, value)
+
+        if (order_service.order_id, order_service.service_id) != (old_order_id, old_service_id):
+            new_order = await session.get(Order, order_service.order_id, with_for_update=True)
+            new_service = await session.get(Service, order_service.service_id)
+            if not new_order:
+                raise ValueError("Order not found")
+            if not new_service:
+                raise ValueError("Service not found")
+            # часть внешнего ключа на секционированную orders
+            order_service.order_start_date = new_order.start_date
+
+            old_order = await session.get(Order, old_order_id, with_for_update=True)
+            old_service = await session.get(Service, old_service_id)
+            if old_order and old_service:
+                _shift_order_totals(old_order, [old_service], -1)
+            _shift_order_totals(new_order, [new_service])
+            await mark_days_dirty(session, [old_order.start_date if old_order else None, new_order.start_date])
+
+        await session.commit()
     await session.refresh(order_service)
     return order_service
 
@@ -151,7 +244,16 @@ async def delete_order_service(session: AsyncSession, order_service_id: int) ->
     if not order_service:
         raise ValueError("Запись в OrderService не найдена")
 
-    await session.delete(order_service)
-    await session.commit()
+    # Возвращаем итоги и дату окончания заказа к состоянию без этой услуги
+    order = await session.get(Order, order_service.order_id, with_for_update=True)
+    service = await session.get(Service, order_service.service_id)
+    # заданная вручную end_date может уйти раньше start_date — тогда 422
+    async with booking_conflicts(session):
+        if order and service:
+            _shift_order_totals(order, [service], -1)
+            await mark_days_dirty(session, [order.start_date])
+
+        await session.delete(order_service)
+        await session.commit()
     return order_service
 
@@ -0,0 +1,81 @@
+import base64
+import binascii
+from datetime import datetime
+from typing import Any
+
+import orjson
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+from sqlalchemy.sql.elements import ColumnElement
+
+
+# Курсор — непрозрачная для клиента строка: base64 от JSON с ключом сортировки
+# последней отданной записи. Клиент передает его обратно без изменений.
+def encode_cursor(sort_by: str, order: str, value: Any, last_id: int) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    payload = orjson.dumps({"s": sort_by, "o": order, "v": value, "id": last_id})
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = orjson.loads(base64.urlsafe_b64decode(padded))
+        value, last_id = payload["v"], int(payload["id"])
+        cursor_sort_by, cursor_order = payload["s"], payload["o"]
+    except (binascii.Error, orjson.JSONDecodeError, KeyError, TypeError, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if cursor_sort_by != sort_by or cursor_order != order:
+        raise HTTPException(
+            status_code=400,
+            detail="Cursor was issued for a different sort_by/order",
+        )
+
+    if sort_by.endswith("_date") and value is not None:
+        value = datetime.fromisoformat(value)
+    return value, last_id
+
+
+def keyset_filter(
+    sort_column,
+    id_column,
+    value: Any,
+    last_id: int,
+    order: str,
+) -> ColumnElement[bool]:
+    """
+    Условие "строго после курсора" для порядка keyset_order_by. NULL в
+    sort_column считается больше любого значения: при asc такие строки идут
+    в конце, при desc — в начале; value = None — курсор среди них.
+    """
+    if sort_column is id_column:
+        return id_column > last_id if order == "asc" else id_column < last_id
+    if order == "asc":
+        if value is None:
+            return and_(sort_column.is_(None), id_column > last_id)
+        # Условие на одну sort_column (для start_date — ключ секционирования
+        # orders) нужно Postgres, чтобы отсечь лишние секции: из OR он его не выводит
+        return or_(
+            and_(
+                sort_column >= value,
+                or_(sort_column > value, and_(sort_column == value, id_column > last_id)),
+            ),
+            sort_column.is_(None),
+        )
+    if value is None:
+        return or_(sort_column.is_not(None), and_(sort_column.is_(None), id_column < last_id))
+    return and_(
+        sort_column <= value,
+        or_(sort_column < value, and_(sort_column == value, id_column < last_id)),
+    )
+
+
+def keyset_order_by(sort_column, id_column, order: str) -> list:
+    if sort_column is id_column:
+        return [id_column.asc() if order == "asc" else id_column.desc()]
+    # порядок NULL задан явно: по умолчанию в SQLite и Postgres он разный
+    if order == "asc":
+        return [sort_column.asc().nulls_last(), id_column.asc()]
+    return [sort_column.desc().nulls_first(), id_column.desc()]
@@ -0,0 +1,74 @@
+import logging
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+log = logging.getLogger(__name__)
+
+# orders секционирована миграцией 6a3c9e1f7b52 только в Postgres
+IS_PARTITIONED = text(
+    "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = 'orders'::regclass)"
+)
+
+
+def month_start(value: datetime) -> datetime:
+    value = value.astimezone(timezone.utc)
+    return datetime(value.year, value.month, 1, tzinfo=timezone.utc)
+
+
+def next_month(month: datetime) -> datetime:
+    return datetime(month.year + month.month // 12, month.month % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"orders_y{month:%Y}m{month:%m}"
+
+
+async def ensure_order_partitions(
+    session: AsyncSession,
+    months_ahead: int,
+    now: Optional[datetime] = None,
+) -> list[str]:
+    """
+    Создает месячные секции orders с текущего месяца на months_ahead вперед,
+    если их еще нет. Возвращает имена созданных.
+
+    Заказ на месяц без секции попадает в orders_default, и создать секцию
+    поверх таких строк уже нельзя — такой месяц пропускается с ошибкой в
+    логе, строки нужно перенести вручную.
+    """
+    if session.bind.dialect.name != "postgresql" or not await session.scalar(IS_PARTITIONED):
+        return []
+
+    existing = set(
+        await session.scalars(
+            text(
+                "SELECT child.relname FROM pg_inherits "
+                "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+                "WHERE pg_inherits.inhparent = 'orders'::regclass"
+            )
+        )
+    )
+    created = []
+    month = month_start(now or datetime.now(timezone.utc))
+    for _ in range(months_ahead + 1):
+        name = partition_name(month)
+        if name not in existing:
+            try:
+                # у каждой секции своя транзакция: ошибка одной не отменяет остальные
+                async with session.begin_nested():
+                    await session.execute(
+                        text(
+                            f"CREATE TABLE {name} PARTITION OF orders "
+                            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{next_month(month).isoformat()}')"
+                        )
+                    )
+            except Exception as exc:
+                log.error("Partition %s was not created: %s", name, exc)
+            else:
+                created.append(name)
+        month = next_month(month)
+    await session.commit()
+    return created
@@ -0,0 +1,32 @@
+from sqlalchemy import case, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.sql.elements import ColumnElement
+
+LIKE_ESCAPE = "\\"
+
+
+def escape_like(term: str) -> str:
+    return (
+        term.replace(LIKE_ESCAPE, LIKE_ESCAPE * 2)
+        .replace("%", LIKE_ESCAPE + "%")
+        .replace("_", LIKE_ESCAPE + "_")
+    )
+
+
+# Поиск подстроки без учета регистра. На Postgres ILIKE '%...%' обслуживается
+# GIN-индексом pg_trgm, на SQLite выполняется обычным сканированием.
+def contains(column, term: str) -> ColumnElement[bool]:
+    return column.ilike(f"%{escape_like(term)}%", escape=LIKE_ESCAPE)
+
+
+def relevance_order_by(session: AsyncSession, column, term: str) -> list:
+    """
+    Сортировка совпадений по релевантности: на Postgres по триграммной
+    похожести, на остальных диалектах — сначала совпадения с начала строки,
+    затем более короткие значения.
+    """
+    if session.bind.dialect.name == "postgresql":
+        return [func.similarity(column, term).desc()]
+
+    starts_with = column.ilike(f"{escape_like(term)}%", escape=LIKE_ESCAPE)
+    return [case((starts_with, 0), else_=1), func.length(column)]
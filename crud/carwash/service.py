@@ -1,8 +1,13 @@
 from sqlalchemy import select, Sequence
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from core.cache import invalidation_bus
 from core.models import Service
 from core.schemas.carwash import ServiceUpdate, ServiceCreate
+from crud.carwash.analytics import mark_service_orders_dirty
+from crud.carwash.catalog_version import SERVICES, bump_catalog_version
+from crud.carwash.order_service import recompute_order_totals
+from crud.carwash.service_catalog import SERVICE_CATALOG_TOPIC
 
 
 async def create_service(session: AsyncSession, service_create: ServiceCreate) -> Service:
@@ -12,8 +17,10 @@ async def create_service(session: AsyncSession, service_create: ServiceCreate) -
         time=service_create.time,
     )
     session.add(service)
+    await bump_catalog_version(session, SERVICES)
     await session.commit()
     await session.refresh(service)
+    await invalidation_bus.publish(session, SERVICE_CATALOG_TOPIC)
     return service
 
 async def get_service(session: AsyncSession, service_id: int) -> Service:
@@ -36,11 +43,19 @@ async def update_service(session: AsyncSession, service_id: int, service_update:
     if not service:
         raise ValueError("Service not found")
 
-    for key, value in service_update.dict(exclude_unset=True).items():
+    changes = service_update.dict(exclude_unset=True)
+    for key, value in changes.items():
         setattr(service, key, value)
 
+    if "price" in changes or "time" in changes:
+        await session.flush()
+        await recompute_order_totals(session, service.id)
+        await mark_service_orders_dirty(session, service.id)
+
+    await bump_catalog_version(session, SERVICES)
     await session.commit()
     await session.refresh(service)
+    await invalidation_bus.publish(session, SERVICE_CATALOG_TOPIC)
     return service
 
 async def delete_service(session: AsyncSession, service_id: int) -> Service:
@@ -51,5 +66,7 @@ async def delete_service(session: AsyncSession, service_id: int) -> Service:
         raise ValueError("Service not found")
 
     await session.delete(service)
+    await bump_catalog_version(session, SERVICES)
     await session.commit()
+    await invalidation_bus.publish(session, SERVICE_CATALOG_TOPIC)
     return service
\ No newline at end of file
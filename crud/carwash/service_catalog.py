@@ -0,0 +1,116 @@
+import asyncio
+from time import monotonic
+from typing import Optional, Mapping
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.cache import invalidation_bus
+from core.config import settings
+from core.models import Service, db_helper
+from core.schemas.carwash import ServiceRead
+
+SERVICE_CATALOG_TOPIC = "services"
+
+SERVICE_SORT_KEYS = {
+    "id": lambda service: service.id,
+    "name": lambda service: service.name,
+    "price": lambda service: service.price.minValue,
+}
+
+
+class _Snapshot:
+    __slots__ = ("services", "by_id", "expires_at", "_sorted", "_payload")
+
+    def __init__(self, services: tuple[ServiceRead, ...], expires_at: float) -> None:
+        self.services = services
+        self.by_id = {service.id: service for service in services}
+        self.expires_at = expires_at
+        self._sorted: dict[tuple[str, str], tuple[ServiceRead, ...]] = {}
+        self._payload: Optional[dict[int, dict]] = None
+
+    @property
+    def payload(self) -> dict[int, dict]:
+        # Услуги в виде готовых к orjson словарей, сериализуются один раз на снимок
+        if self._payload is None:
+            self._payload = {service.id: service.model_dump() for service in self.services}
+        return self._payload
+
+    def sorted(self, sort_by: str, order: str) -> tuple[ServiceRead, ...]:
+        key = (sort_by, order)
+        services = self._sorted.get(key)
+        if services is None:
+            services = tuple(
+                sorted(self.services, key=SERVICE_SORT_KEYS[sort_by], reverse=order == "desc")
+            )
+            self._sorted[key] = services
+        return services
+
+
+class ServiceCatalog:
+    """
+    Кэш справочника услуг в памяти воркера.
+
+    Хранит полный снимок таблицы services и индекс по id. Снимок живет ttl
+    секунд и сбрасывается сразу после create/update/delete услуги — в том числе
+    в других воркерах через invalidation_bus.
+    """
+
+    def __init__(self, ttl: float) -> None:
+        self.ttl = ttl
+        self._snapshot: Optional[_Snapshot] = None
+        self._generation = 0
+        self._lock = asyncio.Lock()
+
+    def invalidate(self, key: Optional[str] = None) -> None:
+        self._generation += 1
+        self._snapshot = None
+
+    async def _get_snapshot(self, session: AsyncSession) -> _Snapshot:
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.expires_at > monotonic():
+            return snapshot
+
+        async with self._lock:
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.expires_at > monotonic():
+                return snapshot
+
+            generation = self._generation
+            # снимок кэшируется, поэтому грузится из primary, а не с реплики
+            async with db_helper.primary_session(session) as primary:
+                result = await primary.execute(select(Service).order_by(Service.id))
+                services = tuple(ServiceRead.from_orm(service) for service in result.scalars().all())
+            snapshot = _Snapshot(services=services, expires_at=monotonic() + self.ttl)
+            # Если во время загрузки пришел сброс, снимок мог устареть — не сохраняем
+            if generation == self._generation:
+                self._snapshot = snapshot
+            return snapshot
+
+    async def get_index(self, session: AsyncSession) -> Mapping[int, ServiceRead]:
+        snapshot = await self._get_snapshot(session)
+        return snapshot.by_id
+
+    async def get_payload_index(self, session: AsyncSession) -> Mapping[int, dict]:
+        snapshot = await self._get_snapshot(session)
+        return snapshot.payload
+
+    async def get_service(self, session: AsyncSession, service_id: int) -> Optional[ServiceRead]:
+        snapshot = await self._get_snapshot(session)
+        return snapshot.by_id.get(service_id)
+
+    async def get_services(
+        self,
+        session: AsyncSession,
+        sort_by: str = "id",
+        order: str = "asc",
+        limit: int = 10,
+        page: int = 1,
+    ) -> list[ServiceRead]:
+        snapshot = await self._get_snapshot(session)
+        offset = (page - 1) * limit
+        return list(snapshot.sorted(sort_by, order)[offset:offset + limit])
+
+
+service_catalog = ServiceCatalog(ttl=settings.cache.service_catalog_ttl)
+invalidation_bus.subscribe(SERVICE_CATALOG_TOPIC, service_catalog.invalidate)
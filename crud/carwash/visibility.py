@@ -0,0 +1,28 @@
+from sqlalchemy import exists, or_, true
+from sqlalchemy.sql.elements import ColumnElement
+
+from core.models import Order, Customer_Car, User
+
+
+# Единое правило "кто может видеть заказ": администратор видит все заказы,
+# остальные — заказы, где они исполнитель, администратор или владелец машины.
+# Условие подставляется в любой запрос, где в FROM уже есть orders, поэтому
+# EXISTS коррелирует с внешним запросом. Структура выражения не зависит от
+# пользователя (id уходит bind-параметром), так что скомпилированный SQL
+# переиспользуется из кэша SQLAlchemy. orders — Order или OrderArchive.
+def order_visible_to(user: User, orders=Order) -> ColumnElement[bool]:
+    if user.role_id == 1:
+        return true()
+
+    return or_(
+        orders.employee_id == user.id,
+        orders.administrator_id == user.id,
+        # correlate: внешний запрос может сам соединять customer_cars (список
+        # заказов с моделью машины), EXISTS все равно читает свою копию
+        exists()
+        .where(
+            Customer_Car.id == orders.customer_car_id,
+            Customer_Car.customer_id == user.id,
+        )
+        .correlate(orders),
+    )